@@ -1,15 +1,56 @@
 # api_gateway.py
-from fastapi import APIRouter, Depends, HTTPException, Body
-from fastapi_limiter.depends import RateLimiter
+import asyncio
+import math
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from sqlalchemy.orm import exc as orm_exc
 from datetime import timedelta
 from typing import List
-from app.services.list_management_service import ListManagementService
-from app.tasks.celery_tasks import bulk_add_task, bulk_delete_task
-from app.utils.auth import authenticate_user, create_access_token
+from app.config import settings
+from app.container import container
+from app.services.import_service import ListImportService
+from app.services.list_management_service import PermissionError, ValidationError
+from app.services.notification_dispatcher import notification_dispatcher
+from app.services.write_behind import write_behind
+from app.tasks.celery_tasks import bulk_add_batches, bulk_delete_task
+from app.utils.auth import (
+    authenticate_token, authenticate_user, bearer_scheme, create_access_token, decode_access_token,
+)
+from app.utils.bloom_filter import async_bloom_filter
+from app.utils.cache_reconciler import read_stats as read_reconcile_stats
+from app.utils.cache_rehydration import read_status, rehydration_guard
+from app.utils.export_stream import FORMATS as EXPORT_FORMATS, accepts_gzip, export_body
+from app.utils import metrics
+from app.utils.import_parser import FORMATS, detect_format
+from app.utils.list_metadata import list_metadata
+from app.utils.local_cache import local_cache
+from app.utils.logging_service import logger as service_logger
+from app.utils.metrics import CHECK_VALUE_LOOKUPS, TimedRoute, register_collector, register_stats
+from app.utils.pagination import InvalidCursor
+from app.utils.rate_limiter import rate_limit, rate_limiter
+from app.utils.task_metrics import render_task_durations
+from app.utils.token_cache import claims_cache
+from app.utils.traffic_capture import traffic_recorder
 
-# Initialize the router
-router = APIRouter()
-list_service = ListManagementService()
+# Initialize the router; every route's latency lands in the request duration histogram
+router = APIRouter(route_class=TimedRoute)
+# HTTP status for mutations (and imports) the current state ruled out, by the service's outcome;
+# cache_warming is a check or mutation throttled while Redis is rehydrated
+MUTATION_STATUS = {"duplicate": 409, "new_value_exists": 409, "not_found": 404, "import_exists": 409,
+                   "cache_warming": 503}
+# Seconds throttled clients are told to wait: the guard re-reads the rehydration state this often
+CACHE_WARMING_RETRY_AFTER = str(math.ceil(settings.REHYDRATE_CHECK_INTERVAL))
+list_service = container.async_list_service
+import_service = ListImportService(list_service)
+# Exports stream through a sync server-side cursor, iterated by Starlette in its threadpool
+export_db = container.database
+
+
+def service_error(result):
+    """HTTPException for an error result of the list or import service, by its outcome."""
+    headers = {"Retry-After": CACHE_WARMING_RETRY_AFTER} if result.get('outcome') == 'cache_warming' else None
+    return HTTPException(status_code=MUTATION_STATUS.get(result.get('outcome'), 400), detail=result['error'],
+                         headers=headers)
 
 
 @router.post("/login")
@@ -22,12 +63,36 @@ def login(username: str = Body(...), password: str = Body(...)):
     return {"access_token": access_token, "token_type": "bearer"}
 
 
-@router.post("/add", dependencies=[Depends(RateLimiter(times=50, seconds=60))])
+@router.post("/logout")
+async def logout(credentials=Depends(bearer_scheme), user: dict = Depends(authenticate_token)):
+    """
+    Revoke the bearer token on every worker until it expires.
+    """
+    claims = decode_access_token(credentials.credentials)
+    try:
+        await asyncio.to_thread(claims_cache.revoke_token, claims)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "Token revoked"}
+
+
+@router.post("/revoke/{username}")
+async def revoke_user_tokens(username: str, user: dict = Depends(authenticate_token)):
+    """
+    Revoke every token issued to a user so far, e.g. after their role changed. Admin only.
+    """
+    if user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can revoke tokens")
+    await asyncio.to_thread(claims_cache.revoke_user, username)
+    return {"status": f"Tokens of {username} revoked"}
+
+
+@router.post("/add", dependencies=[Depends(rate_limit("add"))])
 async def add_value(
         list_id: int = Body(...),
         value: str = Body(...),
         comment: str = Body(default=''),
-        user: dict = Depends(authenticate_user)
+        user: dict = Depends(authenticate_token)
 ):
     """
     Add a new value to a list.
@@ -35,20 +100,22 @@ async def add_value(
     """
     try:
         username, role = user.get("username"), user.get("role")
-        result = list_service.add_value(list_id, value, comment, username, role)
+        result = await list_service.add_value(list_id, value, comment, username, role)
         if 'error' in result:
-            raise HTTPException(status_code=400, detail=result['error'])
+            raise service_error(result)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         # Log the exception and return generic message
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
-@router.get("/check/{list_type}", dependencies=[Depends(RateLimiter(times=100, seconds=60))])
+@router.get("/check/{list_type}", dependencies=[Depends(rate_limit("check"))])
 async def check_value(
         list_type: str,
         value: str = Body(...),
-        user: dict = Depends(authenticate_user)
+        user: dict = Depends(authenticate_token)
 ):
     """
     Check if a value exists in a list.
@@ -56,38 +123,183 @@ async def check_value(
     """
     try:
         username, role = user.get("username"), user.get("role")
-        exists = list_service.check_value(list_type, value, role)
+        exists = await list_service.check_value(list_type, value, role)
         if isinstance(exists, dict) and 'error' in exists:
-            raise HTTPException(status_code=400, detail=exists['error'])
+            raise service_error(exists)
         return {"exists": exists}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.post("/check/{list_type}/batch", dependencies=[Depends(rate_limit("check_batch"))])
+async def check_values(
+        list_type: str,
+        values: List[str] = Body(..., embed=True),
+        user: dict = Depends(authenticate_token)
+):
+    """
+    Check many values against a list in one request.
+    Results are returned in the same order as the submitted values.
+    Rate limit: 100 requests per minute.
+    """
+    try:
+        username, role = user.get("username"), user.get("role")
+        results = await list_service.check_values(list_type, values, role)
+        if isinstance(results, dict) and 'error' in results:
+            raise service_error(results)
+        return {"results": results}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
-@router.post("/bulk-add", dependencies=[Depends(RateLimiter(times=20, seconds=60))])
+@router.post("/bulk-add", dependencies=[Depends(rate_limit("bulk_add"))])
 async def bulk_add_values(
         list_id: int = Body(...),
         values: List[str] = Body(...),
         comment: str = Body(default=''),
-        user: dict = Depends(authenticate_user)
+        user: dict = Depends(authenticate_token)
 ):
     """
-    Bulk add values to a list.
+    Bulk add values to a list, queued as one task per BULK_CHUNK_SIZE values.
     Rate limit: 20 requests per minute.
     """
     try:
         username, role = user.get("username"), user.get("role")
-        task = bulk_add_task.apply_async(args=[list_id, values, comment, username, role])
-        return {"task_id": task.id}
+        batches = bulk_add_batches(list_id, values, comment, username, role)
+        tasks = await asyncio.to_thread(lambda: [batch.apply_async() for batch in batches])
+        return {"task_ids": [task.id for task in tasks]}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.post("/import/{list_id}", dependencies=[Depends(rate_limit("import"))])
+async def import_values(
+        list_id: int,
+        request: Request,
+        format: str = Query(default=None),
+        comment: str = Query(default=''),
+        import_id: str = Query(default=None, max_length=64, pattern=r"^[A-Za-z0-9_-]+$"),
+        user: dict = Depends(authenticate_token)
+):
+    """
+    Stream a CSV (first column) or NDJSON (strings or {"value": ...} objects) upload into a list.
+    The format defaults to the request's Content-Type. Pass your own, unused `import_id` to poll
+    GET /import/{import_id} while the upload is still in progress; an id already taken gets 409.
+    Rate limit: 5 requests per minute.
+    """
+    fmt = format or detect_format(request.headers.get("content-type"))
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported import format '{fmt}'.")
+    try:
+        username, role = user.get("username"), user.get("role")
+        result = await import_service.import_stream(
+            list_id, request.stream(), fmt, comment, username, role, import_id=import_id)
+        if 'error' in result:
+            raise service_error(result)
+        return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
-@router.post("/bulk-delete", dependencies=[Depends(RateLimiter(times=20, seconds=60))])
+@router.get("/import/{import_id}")
+async def get_import_progress(import_id: str, user: dict = Depends(authenticate_token)):
+    """
+    Lines parsed, values accepted and rejected, and batches written so far for one of your imports.
+    """
+    progress = await import_service.get_progress(import_id, user.get("username"))
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return progress
+
+
+@router.get("/export/{list_id}", dependencies=[Depends(rate_limit("export"))])
+async def export_values(
+        list_id: int,
+        request: Request,
+        format: str = Query(default="ndjson"),
+        user: dict = Depends(authenticate_token)
+):
+    """
+    Stream the active values of a list as NDJSON or CSV (value, comment, created_by).
+    Rows are read through a server-side cursor and the body is gzip-encoded
+    when the client sends Accept-Encoding: gzip.
+    Rate limit: 10 requests per minute.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format '{format}'.")
+    try:
+        await list_service.check_list_access(list_id, user.get("role"))
+    except PermissionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except orm_exc.NoResultFound:
+        raise HTTPException(status_code=404, detail="List not found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+    gzip = accepts_gzip(request.headers.get("accept-encoding"))
+    extension = "csv" if format == "csv" else "ndjson"
+    headers = {"Content-Disposition": f'attachment; filename="list-{list_id}.{extension}"', "Vary": "Accept-Encoding"}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(export_body(export_db.iter_list_items(list_id), format, gzip=gzip),
+                             media_type=EXPORT_FORMATS[format], headers=headers)
+
+
+@router.get("/search/{list_id}", dependencies=[Depends(rate_limit("search"))])
+async def search_values(
+        list_id: int,
+        request: Request,
+        prefix: str = Query(default=None),
+        contains: str = Query(default=None),
+        cursor: str = Query(default=None),
+        limit: int = Query(default=None),
+        format: str = Query(default="json"),
+        user: dict = Depends(authenticate_token)
+):
+    """
+    Find the active values of a list starting with `prefix` and/or containing `contains`
+    (at least SEARCH_MIN_CONTAINS characters). JSON returns one page of at most `limit` items
+    with a `next_cursor` to pass back; ndjson or csv streams every match from `cursor` on.
+    Rate limit: 60 requests per minute.
+    """
+    if format != "json" and format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported search format '{format}'.")
+    try:
+        role = user.get("role")
+        if format == "json":
+            result = await list_service.search_values(list_id, role, prefix, contains, cursor, limit)
+            if 'error' in result:
+                raise HTTPException(status_code=404 if result.get('outcome') == 'not_found' else 400,
+                                    detail=result['error'])
+            return result
+
+        prefix, contains, after = await list_service.prepare_search(list_id, role, prefix, contains, cursor)
+    except HTTPException:
+        raise
+    except (PermissionError, ValidationError, InvalidCursor) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except orm_exc.NoResultFound:
+        raise HTTPException(status_code=404, detail="List not found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+    rows = export_db.iter_search_items(list_id, prefix, contains, after)
+    gzip = accepts_gzip(request.headers.get("accept-encoding"))
+    headers = {"Vary": "Accept-Encoding", **({"Content-Encoding": "gzip"} if gzip else {})}
+    return StreamingResponse(export_body(rows, format, gzip=gzip), media_type=EXPORT_FORMATS[format], headers=headers)
+
+
+@router.post("/bulk-delete", dependencies=[Depends(rate_limit("bulk_delete"))])
 async def bulk_delete_values(
         list_id: int = Body(...),
         values: List[str] = Body(...),
-        user: dict = Depends(authenticate_user)
+        user: dict = Depends(authenticate_token)
 ):
     """
     Bulk delete values from a list.
@@ -95,19 +307,19 @@ async def bulk_delete_values(
     """
     try:
         username, role = user.get("username"), user.get("role")
-        task = bulk_delete_task.apply_async(args=[list_id, values, role])
+        task = await asyncio.to_thread(bulk_delete_task.apply_async, args=[list_id, values, role])
         return {"task_id": task.id}
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
-@router.put("/edit", dependencies=[Depends(RateLimiter(times=50, seconds=60))])
+@router.put("/edit", dependencies=[Depends(rate_limit("edit"))])
 async def edit_value(
         list_id: int = Body(...),
         old_value: str = Body(...),
         new_value: str = Body(...),
         comment: str = Body(default=''),
-        user: dict = Depends(authenticate_user)
+        user: dict = Depends(authenticate_token)
 ):
     """
     Edit an existing value in a list.
@@ -115,19 +327,21 @@ async def edit_value(
     """
     try:
         username, role = user.get("username"), user.get("role")
-        result = list_service.edit_value(list_id, old_value, new_value, comment, username, role)
+        result = await list_service.edit_value(list_id, old_value, new_value, comment, username, role)
         if 'error' in result:
-            raise HTTPException(status_code=400, detail=result['error'])
+            raise service_error(result)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
-@router.delete("/delete", dependencies=[Depends(RateLimiter(times=50, seconds=60))])
+@router.delete("/delete", dependencies=[Depends(rate_limit("delete"))])
 async def delete_value(
         list_id: int = Body(...),
         value: str = Body(...),
-        user: dict = Depends(authenticate_user)
+        user: dict = Depends(authenticate_token)
 ):
     """
     Delete a value from a list.
@@ -135,19 +349,21 @@ async def delete_value(
     """
     try:
         username, role = user.get("username"), user.get("role")
-        result = list_service.delete_value(list_id, value, role)
+        result = await list_service.delete_value(list_id, value, role)
         if 'error' in result:
-            raise HTTPException(status_code=400, detail=result['error'])
+            raise service_error(result)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
-@router.post("/change-type", dependencies=[Depends(RateLimiter(times=20, seconds=60))])
+@router.post("/change-type", dependencies=[Depends(rate_limit("change_type"))])
 async def change_list_type(
         list_id: int = Body(...),
         new_type: str = Body(...),
-        user: dict = Depends(authenticate_user)
+        user: dict = Depends(authenticate_token)
 ):
     """
     Change the type of list.
@@ -155,7 +371,7 @@ async def change_list_type(
     """
     try:
         username, role = user.get("username"), user.get("role")
-        result = list_service.change_list_type(list_id, new_type, role)
+        result = await list_service.change_list_type(list_id, new_type, role)
         if 'error' in result:
             raise HTTPException(status_code=400, detail=result['error'])
         return result
@@ -179,10 +395,194 @@ async def get_roles():
 @router.get("/lists", response_model=List[str])
 async def get_lists():
     """
-    Retrieve all lists.
+    Retrieve all lists. Loads every name at once; GET /lists/page pages through them.
     """
     try:
-        lists = list_service.get_all_lists()  # Replace with actual list retrieval logic
+        lists = await list_service.get_all_lists()  # Replace with actual list retrieval logic
         return lists
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.get("/lists/page", dependencies=[Depends(rate_limit("page"))])
+async def get_lists_page(
+        type: str = Query(default=None),
+        deleted: str = Query(default="exclude"),
+        cursor: str = Query(default=None),
+        limit: int = Query(default=None),
+        estimate: bool = Query(default=False),
+        user: dict = Depends(authenticate_token)
+):
+    """
+    One page of lists (id, name, type, is_deleted) in id order, with `next_cursor` for the next.
+    `deleted` is exclude, only or include; `estimate=true` adds the planner's `estimated_total`.
+    Rate limit: 120 requests per minute.
+    """
+    try:
+        result = await list_service.page_lists(user.get("role"), type, deleted, cursor, limit, estimate)
+        if 'error' in result:
+            raise HTTPException(status_code=400, detail=result['error'])
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.get("/lists/{list_id}/items", dependencies=[Depends(rate_limit("page"))])
+async def get_list_items_page(
+        list_id: int,
+        deleted: str = Query(default="exclude"),
+        cursor: str = Query(default=None),
+        limit: int = Query(default=None),
+        estimate: bool = Query(default=False),
+        user: dict = Depends(authenticate_token)
+):
+    """
+    One page of a list's items (id, value, comment, created_by, is_deleted) in id order,
+    with `next_cursor` for the next. Filters and `estimate` work as for /lists/page.
+    Rate limit: 120 requests per minute.
+    """
+    try:
+        result = await list_service.page_list_items(list_id, user.get("role"), deleted, cursor, limit, estimate)
+        if 'error' in result:
+            raise HTTPException(status_code=404 if result.get('outcome') == 'not_found' else 400,
+                                detail=result['error'])
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """
+    Hit, miss and eviction counters for this worker's in-process cache.
+    """
+    return local_cache.stats()
+
+
+@router.get("/cache/rehydration")
+async def get_rehydration_status():
+    """
+    Progress and throughput of the current or last cache rehydration, plus how many
+    checks this worker turned away while the cache was warming.
+    """
+    try:
+        status = await asyncio.to_thread(read_status, rehydration_guard.redis)
+        status["guard"] = rehydration_guard.stats()
+        return status
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.get("/reconcile/stats")
+async def get_reconcile_stats(list_type: List[str] = Query(default=[])):
+    """
+    Drift found and repaired by the cache reconciler: totals over all runs,
+    plus the latest run for each requested list type.
+    """
+    try:
+        return await asyncio.to_thread(read_reconcile_stats, rehydration_guard.redis, list_type)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.get("/bloom/{list_type}/stats")
+async def get_bloom_stats(list_type: str):
+    """
+    Bloom filter lookup counters for this worker, plus the fill ratio and
+    estimated false-positive rate of the filter for the given list type.
+    """
+    try:
+        return await async_bloom_filter.stats(list_type)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.get("/write-behind/stats")
+async def get_write_behind_stats():
+    """
+    Queued and dead-lettered mutations, plus flush batch sizes and lag for this worker's flusher.
+    """
+    return await asyncio.to_thread(write_behind.stats)
+
+
+@router.get("/notifications/stats")
+async def get_notification_stats():
+    """
+    Queue depth and sent, failed, dropped and digested counts of this worker's notification dispatcher.
+    """
+    return notification_dispatcher.stats()
+
+
+@router.get("/pools/stats")
+async def get_pool_stats():
+    """
+    Utilization and checkout wait times of this worker's Postgres and Redis connection pools.
+    """
+    return container.pool_stats()
+
+
+@router.get("/auth/stats")
+async def get_auth_stats():
+    """
+    Hit ratio and size of this worker's bearer token claims cache, and revoked tokens turned away.
+    """
+    return claims_cache.stats()
+
+
+@router.get("/rate-limit/stats")
+async def get_rate_limit_stats():
+    """
+    Requests allowed and rejected by this worker's rate limiter, and how its buckets sync with Redis.
+    """
+    return rate_limiter.stats()
+
+
+@router.get("/logging/stats")
+async def get_logging_stats():
+    """
+    Records waiting for this worker's log writer thread and records dropped because its queue was full.
+    """
+    return service_logger.stats()
+
+
+@router.get("/traffic-capture/stats")
+async def get_traffic_capture_stats():
+    """
+    Requests sampled for replay by this worker, and records written or dropped by its capture writer.
+    """
+    return traffic_recorder.stats()
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """
+    Prometheus exposition of this worker's metrics, plus Celery task durations recorded by the workers.
+    """
+    body = await asyncio.to_thread(metrics.render)
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+
+def _check_value_redis_hit_ratio():
+    """Share of check_value lookups that missed the local cache and were answered by Redis."""
+    name = metrics.PREFIX + "check_value_redis_hit_ratio"
+    redis_hits = CHECK_VALUE_LOOKUPS.value("redis")
+    lookups = redis_hits + CHECK_VALUE_LOOKUPS.value("db") + CHECK_VALUE_LOOKUPS.value("absent")
+    return [f"# TYPE {name} gauge", f"{name} {redis_hits / lookups if lookups else 0.0}"]
+
+
+register_stats("rate_limit", rate_limiter.stats)
+register_stats("local_cache", local_cache.stats)
+register_stats("list_metadata", list_metadata.stats)
+register_stats("write_behind", write_behind.stats)
+register_stats("notifications", notification_dispatcher.stats)
+register_stats("auth_cache", claims_cache.stats)
+register_stats("logging", service_logger.stats)
+register_stats("pools", container.pool_stats)
+register_stats("rehydration_guard", rehydration_guard.stats)
+register_stats("traffic_capture", traffic_recorder.stats)
+register_collector(_check_value_redis_hit_ratio)
+register_collector(lambda: render_task_durations(container.redis_cache.redis))
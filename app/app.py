@@ -1,14 +1,27 @@
 #app.py
+import asyncio
+import logging
 import os
-import redis.asyncio as redis
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from fastapi_limiter import FastAPILimiter
 from fastapi.middleware.cors import CORSMiddleware
 from app.celery_app import celery_app
 from app.routes import list_routes, report_routes, user_routes, auth_routes
 from app.config import settings
+from app.container import container
+from app.db_setup import async_engine, engine
 from app.api_gateway import router as api_gateway_router
+from app.services.notification_dispatcher import notification_dispatcher
+from app.services.write_behind import write_behind
+from app.tasks.celery_tasks import rehydrate_cache
+from app.utils.cache_rehydration import rehydration_guard
+from app.utils.connection_pools import close_redis_pools
+from app.utils.list_metadata import list_metadata
+from app.utils.local_cache import local_cache
+from app.utils.rate_limiter import rate_limiter
+from app.utils.request_profiler import ProfilingMiddleware, install_sql_hooks
+from app.utils.token_cache import claims_cache
+from app.utils.traffic_capture import TrafficCaptureMiddleware, traffic_recorder
 
 
 # CORS configuration: Allow requests from your frontend
@@ -29,6 +42,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Records a sample of gateway requests for replay when TRAFFIC_CAPTURE_ENABLED is set
+app.add_middleware(TrafficCaptureMiddleware)
+
+# Per-request profiling; when disabled neither the middleware nor the SQL hooks exist
+if settings.PROFILING_ENABLED:
+    install_sql_hooks(engine)
+    install_sql_hooks(async_engine.sync_engine)
+    app.add_middleware(ProfilingMiddleware)
+
 # Serve static files (frontend)
 app.mount("/", StaticFiles(directory="frontend", html=True), name="frontend")
 
@@ -46,13 +68,6 @@ def example_task():
     return "Task completed"
 
 
-# Initialize Redis for rate limiting
-async def initialize_redis():
-    redis_url = f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/0"
-    redis_client = redis.from_url(redis_url, decode_responses=True)
-    await FastAPILimiter.init(redis_client)
-
-
 # Avoid circular dependencies by dynamically including routers
 def include_routers(app: FastAPI):
     from app.api_gateway import router as api_gateway_router
@@ -62,10 +77,45 @@ def include_routers(app: FastAPI):
 include_routers(app)
 
 
-# Initialize Redis on app startup for rate limiting
+# Load every list's id -> type mapping so mutations never query it
+async def load_list_metadata():
+    try:
+        count = list_metadata.load(await asyncio.to_thread(container.database.get_list_metadata))
+        logging.getLogger(__name__).info(f"Loaded metadata for {count} lists")
+    except Exception as e:
+        # Lists are then loaded one by one on first use
+        logging.getLogger(__name__).warning(f"Could not preload list metadata: {e}")
+
+
 @app.on_event("startup")
 async def startup():
-    await initialize_redis()
+    # Rate limit buckets reconcile with Redis on a background task
+    rate_limiter.start()
+    local_cache.start_listener()
+    list_metadata.start_listener()
+    claims_cache.start_listener()
+    await load_list_metadata()
+    # Enqueues rehydrate_cache by itself whenever Redis comes back empty
+    rehydration_guard.start(on_cold=rehydrate_cache.delay)
+    # Drains the write-behind stream whenever this worker holds the flusher lease
+    write_behind.start()
+    if settings.REHYDRATE_ON_STARTUP:
+        await asyncio.to_thread(rehydrate_cache.delay)
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await rate_limiter.stop()
+    local_cache.stop_listener()
+    list_metadata.stop_listener()
+    claims_cache.stop_listener()
+    rehydration_guard.stop()
+    await asyncio.to_thread(write_behind.close)
+    await asyncio.to_thread(notification_dispatcher.close)
+    await asyncio.to_thread(traffic_recorder.close)
+    await async_engine.dispose()
+    await asyncio.to_thread(engine.dispose)
+    await close_redis_pools()
 
 
 # Root endpoint for basic welcome message
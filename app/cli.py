@@ -0,0 +1,87 @@
+# app/cli.py
+"""
+Operational commands for the list management service.
+
+Usage: python -m app.cli <command> [options]
+"""
+import argparse
+import json
+
+from app.database import Database
+from app.utils.bloom_filter import bloom_filter
+from app.utils.cache_migration import migrate_string_keys_to_sets
+from app.utils.cache_reconciler import CacheReconciler
+from app.utils.cache_rehydration import CacheRehydrator
+from app.utils.redis_cache import RedisCache
+
+
+def rebuild_bloom(args):
+    """Rebuild the Bloom filter for the given list types (all active types by default)."""
+    db = Database()
+    list_types = args.list_type or db.get_list_types()
+    for list_type in list_types:
+        result = bloom_filter.rebuild(list_type, db.iter_list_values(list_type), batch_size=args.batch_size)
+        result.update(bloom_filter.stats(list_type))
+        print(json.dumps(result))
+
+
+def migrate_cache_sets(args):
+    """Convert legacy per-value cache keys into per-list-type Redis sets and report memory usage."""
+    report = migrate_string_keys_to_sets(
+        RedisCache().redis, batch_size=args.batch_size, dry_run=args.dry_run, keep_legacy=args.keep_legacy)
+    print(json.dumps(report, indent=2))
+
+
+def rehydrate_cache(args):
+    """Reload the Redis sets and Bloom filters from PostgreSQL, printing progress as it goes."""
+    def progress(status):
+        print(f"{status['current_type']}: {status['items']} items, {status['items_per_second']}/s "
+              f"({status['types_done']}/{status['types_total']} types done)", flush=True)
+
+    result = CacheRehydrator(batch_size=args.batch_size).run(args.list_type, progress=progress)
+    print(json.dumps(result, indent=2))
+
+
+def reconcile_cache(args):
+    """Diff Redis against PostgreSQL by bucket digest and (unless --dry-run) repair the drift."""
+    reconciler = CacheReconciler(settle=args.settle)
+    for report in reconciler.run(args.list_type, repair=not args.dry_run):
+        print(json.dumps(report))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="List management service operations.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rebuild_parser = subparsers.add_parser("rebuild-bloom", help="Rebuild Bloom filters from PostgreSQL.")
+    rebuild_parser.add_argument("--list-type", action="append", help="List type to rebuild (repeatable).")
+    rebuild_parser.add_argument("--batch-size", type=int, default=10000)
+    rebuild_parser.set_defaults(func=rebuild_bloom)
+
+    migrate_parser = subparsers.add_parser(
+        "migrate-cache-sets", help="Convert legacy '{list_type}:{value}' keys into per-list Redis sets.")
+    migrate_parser.add_argument("--batch-size", type=int, default=1000)
+    migrate_parser.add_argument("--dry-run", action="store_true", help="Count keys without changing anything.")
+    migrate_parser.add_argument("--keep-legacy", action="store_true", help="Do not delete the old keys.")
+    migrate_parser.set_defaults(func=migrate_cache_sets)
+
+    rehydrate_parser = subparsers.add_parser(
+        "rehydrate-cache", help="Reload Redis list sets and Bloom filters from PostgreSQL.")
+    rehydrate_parser.add_argument("--list-type", action="append", help="List type to reload (repeatable).")
+    rehydrate_parser.add_argument("--batch-size", type=int, default=None)
+    rehydrate_parser.set_defaults(func=rehydrate_cache)
+
+    reconcile_parser = subparsers.add_parser(
+        "reconcile-cache", help="Find and repair drift between Redis list sets and PostgreSQL.")
+    reconcile_parser.add_argument("--list-type", action="append", help="List type to check (repeatable).")
+    reconcile_parser.add_argument("--dry-run", action="store_true", help="Report drift without repairing it.")
+    reconcile_parser.add_argument("--settle", type=float, default=None,
+                                  help="Seconds to wait before re-checking differences.")
+    reconcile_parser.set_defaults(func=reconcile_cache)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -14,8 +14,137 @@ class Settings:
     REDIS_HOST = os.getenv("REDIS_HOST")
     REDIS_PORT = os.getenv("REDIS_PORT")
 
+    # SQLAlchemy engine pools (sync and async engines each get their own pool of this size)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "True").lower() == "true"
+
+    # Process-wide Redis connection pools; callers block up to REDIS_POOL_TIMEOUT for a free connection
+    REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+    REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", 5))
+    REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", 10))
+    REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", 30))
+
     SECRET_KEY = os.getenv("SECRET_KEY", "your_secret_key")  # Fallback if env var is not set
     ALGORITHM = os.getenv("ALGORITHM", "HS256")  # Fallback if env var is not set
     DEBUG = os.getenv("DEBUG", "False").lower() == "true"
 
+    # Service logger: records are queued and written as JSON by a background thread. LOG_SAMPLE_RATES
+    # keeps that fraction of each listed high-volume action; mutations are always logged
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+    LOG_FILE = os.getenv("LOG_FILE", "app.log")
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+    LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", '{"check_value": 0.01, "check_values": 0.1}')
+
+    # Upper bound on the number of values accepted by a single batch check
+    MAX_BATCH_CHECK_SIZE = int(os.getenv("MAX_BATCH_CHECK_SIZE", 1000))
+
+    # Value search: page sizes, and the shortest substring the trigram index can serve
+    SEARCH_DEFAULT_LIMIT = int(os.getenv("SEARCH_DEFAULT_LIMIT", 100))
+    SEARCH_MAX_LIMIT = int(os.getenv("SEARCH_MAX_LIMIT", 1000))
+    SEARCH_MIN_CONTAINS = int(os.getenv("SEARCH_MIN_CONTAINS", 3))
+
+    # Keyset pages of lists and list items
+    PAGE_DEFAULT_LIMIT = int(os.getenv("PAGE_DEFAULT_LIMIT", 100))
+    PAGE_MAX_LIMIT = int(os.getenv("PAGE_MAX_LIMIT", 1000))
+
+    # In-process (L1) cache in front of Redis for check_value
+    LOCAL_CACHE_ENABLED = os.getenv("LOCAL_CACHE_ENABLED", "True").lower() == "true"
+    LOCAL_CACHE_MAX_SIZE = int(os.getenv("LOCAL_CACHE_MAX_SIZE", 10000))
+    LOCAL_CACHE_TTL = float(os.getenv("LOCAL_CACHE_TTL", 30))
+
+    # In-process list id -> type map used by every mutation
+    LIST_METADATA_CACHE_ENABLED = os.getenv("LIST_METADATA_CACHE_ENABLED", "True").lower() == "true"
+    # Entries are reloaded after this many seconds, in case an invalidation broadcast was lost
+    LIST_METADATA_TTL = float(os.getenv("LIST_METADATA_TTL", 300))
+
+    # Verified bearer tokens and their users, cached until expiry (at most AUTH_CACHE_TTL seconds)
+    AUTH_CACHE_ENABLED = os.getenv("AUTH_CACHE_ENABLED", "True").lower() == "true"
+    AUTH_CACHE_MAX_SIZE = int(os.getenv("AUTH_CACHE_MAX_SIZE", 10000))
+    AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", 300))
+    # How long "revoke every token of this user" is remembered; keep above the longest token lifetime
+    AUTH_REVOKE_USER_TTL = int(os.getenv("AUTH_REVOKE_USER_TTL", 86400))
+
+    # Background notification dispatcher (Slack, email, SMS)
+    NOTIFY_ENABLED = os.getenv("NOTIFY_ENABLED", "True").lower() == "true"
+    NOTIFY_QUEUE_SIZE = int(os.getenv("NOTIFY_QUEUE_SIZE", 1000))
+    NOTIFY_WORKERS = int(os.getenv("NOTIFY_WORKERS", 2))
+    NOTIFY_DIGEST_INTERVAL = float(os.getenv("NOTIFY_DIGEST_INTERVAL", 60))
+    NOTIFY_CONNECT_TIMEOUT = float(os.getenv("NOTIFY_CONNECT_TIMEOUT", 3))
+    NOTIFY_READ_TIMEOUT = float(os.getenv("NOTIFY_READ_TIMEOUT", 5))
+    NOTIFY_MAX_RETRIES = int(os.getenv("NOTIFY_MAX_RETRIES", 3))
+    NOTIFY_BACKOFF = float(os.getenv("NOTIFY_BACKOFF", 0.5))
+    NOTIFY_POOL_SIZE = int(os.getenv("NOTIFY_POOL_SIZE", 10))
+
+    # Gateway rate limits: "local" (in-process buckets synced with Redis), "redis" (exact, one round trip
+    # per request) or "off". RATE_LIMITS is JSON overriding DEFAULT_LIMITS per route, role or "user:<name>"
+    RATE_LIMIT_MODE = os.getenv("RATE_LIMIT_MODE", "local")
+    RATE_LIMIT_SYNC_INTERVAL = float(os.getenv("RATE_LIMIT_SYNC_INTERVAL", 1))
+    RATE_LIMITS = os.getenv("RATE_LIMITS", "")
+
+    # Per-list-type Bloom filter used to answer "definitely absent" without Postgres
+    BLOOM_FILTER_ENABLED = os.getenv("BLOOM_FILTER_ENABLED", "True").lower() == "true"
+    BLOOM_CAPACITY = int(os.getenv("BLOOM_CAPACITY", 1000000))
+    BLOOM_ERROR_RATE = float(os.getenv("BLOOM_ERROR_RATE", 0.01))
+
+    # Write-behind queue (a Redis stream) that batches list item mutations into bulk Postgres statements.
+    # A backlog above WRITE_BEHIND_MAX_PENDING is flagged in the stats; a batch failing
+    # WRITE_BEHIND_MAX_RETRIES times is applied one by one and the failures are dead-lettered
+    WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "True").lower() == "true"
+    WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", 500))
+    WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", 0.5))
+    WRITE_BEHIND_MAX_PENDING = int(os.getenv("WRITE_BEHIND_MAX_PENDING", 50000))
+    WRITE_BEHIND_MAX_RETRIES = int(os.getenv("WRITE_BEHIND_MAX_RETRIES", 5))
+    # Seconds a deleted value is remembered in Redis so concurrent deletes of it succeed only once
+    DELETE_TOMBSTONE_TTL = int(os.getenv("DELETE_TOMBSTONE_TTL", 30))
+
+    # Values per /bulk-add task message, and rows per COPY / multi-row INSERT chunk in bulk_add_task
+    BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", 50000))
+
+    # Streaming CSV/NDJSON imports
+    IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 10000))
+    IMPORT_MAX_LINE_LENGTH = int(os.getenv("IMPORT_MAX_LINE_LENGTH", 65536))
+    IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", 100))
+    IMPORT_PROGRESS_TTL = int(os.getenv("IMPORT_PROGRESS_TTL", 86400))
+
+    # Reloading Redis from PostgreSQL after a restart or flush
+    REHYDRATE_ON_STARTUP = os.getenv("REHYDRATE_ON_STARTUP", "False").lower() == "true"
+    REHYDRATE_AUTO = os.getenv("REHYDRATE_AUTO", "True").lower() == "true"
+    REHYDRATE_BATCH_SIZE = int(os.getenv("REHYDRATE_BATCH_SIZE", 20000))
+    REHYDRATE_CHECK_INTERVAL = float(os.getenv("REHYDRATE_CHECK_INTERVAL", 5))
+    REHYDRATE_RETRY_INTERVAL = float(os.getenv("REHYDRATE_RETRY_INTERVAL", 60))
+    REHYDRATE_LOCK_TTL = int(os.getenv("REHYDRATE_LOCK_TTL", 600))
+    # While warming, at most this many cache misses per worker query Postgres at once
+    REHYDRATE_DB_CONCURRENCY = int(os.getenv("REHYDRATE_DB_CONCURRENCY", 8))
+    REHYDRATE_DB_WAIT = float(os.getenv("REHYDRATE_DB_WAIT", 0.5))
+
+    # Redis/PostgreSQL drift reconciliation
+    RECONCILE_INTERVAL = float(os.getenv("RECONCILE_INTERVAL", 300))
+    # Trailing bytes of a value that pick its digest bucket (2 bytes: ~3.8k buckets for alphanumerics)
+    RECONCILE_SUFFIX_BYTES = int(os.getenv("RECONCILE_SUFFIX_BYTES", 2))
+    RECONCILE_SCAN_COUNT = int(os.getenv("RECONCILE_SCAN_COUNT", 10000))
+    # Differences are re-checked after this delay so in-flight write-behind batches are not repaired
+    RECONCILE_SETTLE_SECONDS = float(os.getenv("RECONCILE_SETTLE_SECONDS", 2))
+
+    # Sampled gateway traffic recorded to NDJSON for benchmarks/traffic_replay.py. Bodies over
+    # TRAFFIC_CAPTURE_MAX_BODY bytes are not kept; excluded path prefixes carry credentials
+    TRAFFIC_CAPTURE_ENABLED = os.getenv("TRAFFIC_CAPTURE_ENABLED", "False").lower() == "true"
+    TRAFFIC_CAPTURE_SAMPLE_RATE = float(os.getenv("TRAFFIC_CAPTURE_SAMPLE_RATE", 0.01))
+    TRAFFIC_CAPTURE_FILE = os.getenv("TRAFFIC_CAPTURE_FILE", "logs/traffic.ndjson")
+    TRAFFIC_CAPTURE_MAX_BODY = int(os.getenv("TRAFFIC_CAPTURE_MAX_BODY", 65536))
+    TRAFFIC_CAPTURE_QUEUE_SIZE = int(os.getenv("TRAFFIC_CAPTURE_QUEUE_SIZE", 10000))
+    TRAFFIC_CAPTURE_PATHS = os.getenv("TRAFFIC_CAPTURE_PATHS", "/api/")
+    TRAFFIC_CAPTURE_EXCLUDE = os.getenv("TRAFFIC_CAPTURE_EXCLUDE", "/api/login,/api/logout,/api/revoke/")
+
+    # Per-request profiles (spans plus a cProfile call profile), written to PROFILING_DIR. Requested
+    # with an `X-Profile: 1` header by users in PROFILING_ROLES, or sampled at PROFILING_SAMPLE_RATE
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "False").lower() == "true"
+    PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", 0))
+    PROFILING_ROLES = os.getenv("PROFILING_ROLES", "admin")
+    PROFILING_DIR = os.getenv("PROFILING_DIR", "logs/profiles")
+    PROFILING_TOP = int(os.getenv("PROFILING_TOP", 40))
+
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,67 @@
+# app/container.py
+import threading
+
+from app.database import AsyncDatabase, Database
+from app.db_setup import async_engine, engine
+from app.utils.connection_pools import redis_pool_stats
+from app.utils.redis_cache import AsyncRedisCache, RedisCache
+
+
+class ServiceContainer:
+    """
+    Process-wide clients and services, built on first use and shared by routes and Celery tasks.
+    Every client sits on the process's pooled engines and Redis pools, so sharing them costs
+    nothing per request.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._instances = {}
+
+    def _get(self, name, factory):
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(name)
+                if instance is None:
+                    instance = self._instances[name] = factory()
+        return instance
+
+    @property
+    def database(self) -> Database:
+        return self._get("database", Database)
+
+    @property
+    def async_database(self) -> AsyncDatabase:
+        return self._get("async_database", AsyncDatabase)
+
+    @property
+    def redis_cache(self) -> RedisCache:
+        return self._get("redis_cache", RedisCache)
+
+    @property
+    def async_redis_cache(self) -> AsyncRedisCache:
+        return self._get("async_redis_cache", AsyncRedisCache)
+
+    @property
+    def list_service(self):
+        # Imported here: the services import the Celery tasks, which import this module
+        from app.services.list_management_service import ListManagementService
+        return self._get("list_service", lambda: ListManagementService(db=self.database, redis_client=self.redis_cache))
+
+    @property
+    def async_list_service(self):
+        from app.services.async_list_management_service import AsyncListManagementService
+        return self._get("async_list_service", lambda: AsyncListManagementService(
+            db=self.async_database, redis_client=self.async_redis_cache))
+
+    def pool_stats(self):
+        """Utilization and checkout wait times of the Postgres and Redis pools in this process."""
+        return {
+            "postgres": {"sync": engine.pool.stats(), "async": async_engine.sync_engine.pool.stats()},
+            "redis": redis_pool_stats(),
+        }
+
+
+# Process-wide container shared by every route and task in this worker
+container = ServiceContainer()
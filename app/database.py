@@ -1,14 +1,21 @@
 # app/database.py
+from sqlalchemy import bindparam, insert, select, text, true, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import scoped_session
+from sqlalchemy.sql.expression import ClauseElement, Executable
 from sqlalchemy.exc import IntegrityError, NoResultFound
-from contextlib import contextmanager
+from contextlib import asynccontextmanager, contextmanager
+import io
+import json
 import redis
-import os
 from dotenv import load_dotenv
 import logging
 
 from app.models import User, List, ListItem  # Only import models here
-from app.db_setup import Base, SessionLocal  # Import Base and SessionLocal from db_setup.py
+from app.db_setup import Base, SessionLocal, AsyncSessionLocal  # Import Base and SessionLocal from db_setup.py
+from app.utils.connection_pools import redis_pool
+from app.utils.metrics import instrument
 
 # Initialize logger
 logger = logging.getLogger(__name__)
@@ -16,11 +23,6 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
-# Redis connection
-redis_host = os.getenv('REDIS_HOST')
-redis_port = os.getenv('REDIS_PORT')
-REDIS_URL = f"redis://{redis_host}:{redis_port}/0"
-
 # Scoped session
 Session = scoped_session(SessionLocal)
 
@@ -47,12 +49,447 @@ def session_scope():
         session.close()
 
 
+@asynccontextmanager
+async def async_session_scope():
+    """Asyncio counterpart of session_scope."""
+    session = AsyncSessionLocal()
+    try:
+        yield session
+        await session.commit()
+    except Exception as e:
+        await session.rollback()
+        logger.error(f"Session rollback due to: {e}")
+        raise
+    finally:
+        await session.close()
+
+
+def active_values_query(list_type, values):
+    """Values among `values` that are active in some list of `list_type` (served by ix_list_items_active_type_value)."""
+    return (
+        select(ListItem.value)
+        .where(
+            ListItem.list_type == list_type,
+            ListItem.is_deleted == 0,
+            ListItem.value.in_(list(values)),
+        )
+        .distinct()
+    )
+
+
+def search_items_query(list_id, prefix=None, contains=None, after=None):
+    """
+    Active items of a list whose value starts with `prefix` and/or contains `contains`.
+    With a prefix, rows come in byte order of value from ix_list_items_active_list_value_c
+    and `after` is the last value seen; otherwise ix_list_items_active_list_value_trgm finds
+    them within the list, they come in id order and `after` is the last id seen.
+    """
+    ordered_value = ListItem.value.collate("C")
+    query = select(ListItem.id, ListItem.value, ListItem.comment, ListItem.created_by).where(
+        ListItem.list_id == list_id, ListItem.is_deleted == 0)
+    if contains:
+        query = query.where(ListItem.value.contains(contains, autoescape=True))
+    if prefix:
+        query = query.where(ordered_value.startswith(prefix, autoescape=True)).order_by(ordered_value)
+        return query.where(ordered_value > after) if after is not None else query
+    query = query.order_by(ListItem.id)
+    return query.where(ListItem.id > after) if after is not None else query
+
+
+def deleted_filter(column, deleted):
+    """Condition for a page's `deleted` filter: "exclude" (the default), "only" or "include" soft-deleted rows."""
+    if deleted == "include":
+        return true()
+    return column == 0 if deleted == "exclude" else column != 0
+
+
+def lists_page_query(list_type=None, deleted="exclude", after=None):
+    """Lists in id order, optionally of one type, starting after the id `after`."""
+    query = select(List.id, List.name, List.type, List.is_deleted).where(deleted_filter(List.is_deleted, deleted))
+    if list_type is not None:
+        query = query.where(List.type == list_type)
+    if after is not None:
+        query = query.where(List.id > after)
+    return query.order_by(List.id)
+
+
+def list_items_page_query(list_id, deleted="exclude", after=None):
+    """Items of a list in id order (ix_list_items_list_id_id), starting after the id `after`."""
+    query = select(ListItem.id, ListItem.value, ListItem.comment, ListItem.created_by, ListItem.is_deleted).where(
+        ListItem.list_id == list_id, deleted_filter(ListItem.is_deleted, deleted))
+    if after is not None:
+        query = query.where(ListItem.id > after)
+    return query.order_by(ListItem.id)
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) of a query, compiled by the executing connection's dialect with bound parameters."""
+    inherit_cache = False
+
+    def __init__(self, query):
+        self.query = query
+
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.query, **kw)
+
+
+def estimate_statement(query):
+    """EXPLAIN of `query`; the planner's row estimate stands in for a COUNT(*) that would scan every match."""
+    return Explain(query.order_by(None))
+
+
+def plan_rows(explain_output):
+    plan = json.loads(explain_output) if isinstance(explain_output, str) else explain_output
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+@instrument("postgres")
 class Database:
     def __init__(self):
-        self.redis = redis.StrictRedis.from_url(REDIS_URL)  # Redis client
+        self.redis = redis.StrictRedis(connection_pool=redis_pool())  # Redis client on the shared pool
 
     def create_tables(self):
         """Create database tables."""
         Base.metadata.create_all(SessionLocal().get_bind())
 
-    # The rest of your methods go here...
\ No newline at end of file
+    def get_list_by_id(self, list_id):
+        """Return the list with the given id, detached from the session."""
+        with session_scope() as session:
+            list_obj = session.get(List, list_id)
+            if list_obj is None:
+                raise NoResultFound(f"List {list_id} not found")
+            session.expunge(list_obj)
+            return list_obj
+
+    def get_list_metadata(self):
+        """(id, name, type) of every list, for the in-process metadata cache."""
+        with session_scope() as session:
+            return session.execute(select(List.id, List.name, List.type).order_by(List.id)).all()
+
+    def update_list_type(self, list_id, new_type):
+        """Change the type of a list and of the denormalized copy on its items."""
+        with session_scope() as session:
+            list_obj = session.get(List, list_id)
+            if list_obj is None:
+                raise NoResultFound(f"List {list_id} not found")
+            list_obj.type = new_type
+            session.execute(update(ListItem).where(ListItem.list_id == list_id).values(list_type=new_type))
+
+    def check_value_in_list(self, list_type, value):
+        """Check whether value is present in any active list of `list_type`."""
+        return value in self.check_values_in_list(list_type, [value])
+
+    def check_values_in_list(self, list_type, values):
+        """Return the subset of `values` present in active lists of `list_type`, using one IN query."""
+        if not values:
+            return set()
+        with session_scope() as session:
+            return set(session.execute(active_values_query(list_type, values)).scalars())
+
+    def iter_list_values(self, list_type, batch_size=10000):
+        """Stream the active values of every list of `list_type` without loading them all into memory."""
+        with session_scope() as session:
+            query = (
+                session.query(ListItem.value)
+                .filter(ListItem.list_type == list_type, ListItem.is_deleted == 0)
+                .yield_per(batch_size)
+            )
+            for row in query:
+                yield row.value
+
+    def iter_list_item_values(self, list_id, batch_size=10000):
+        """Stream the active values of a single list."""
+        with session_scope() as session:
+            query = (
+                session.query(ListItem.value)
+                .filter(ListItem.list_id == list_id, ListItem.is_deleted == 0)
+                .yield_per(batch_size)
+            )
+            for row in query:
+                yield row.value
+
+    def iter_list_items(self, list_id, batch_size=10000):
+        """
+        Stream (value, comment, created_by) for the active items of a list through a server-side
+        cursor, in id order. Uses its own session rather than the thread-scoped one because a
+        streaming response resumes the generator on whichever threadpool thread is free.
+        """
+        session = SessionLocal()
+        try:
+            result = session.execute(
+                select(ListItem.value, ListItem.comment, ListItem.created_by)
+                .where(ListItem.list_id == list_id, ListItem.is_deleted == 0)
+                .order_by(ListItem.id)
+                .execution_options(stream_results=True, yield_per=batch_size)
+            )
+            for partition in result.partitions():
+                yield from partition
+        finally:
+            session.close()
+
+    def search_list_items(self, list_id, prefix=None, contains=None, after=None, limit=100):
+        """Up to `limit` rows (id, value, comment, created_by) of search_items_query."""
+        with session_scope() as session:
+            return session.execute(search_items_query(list_id, prefix, contains, after).limit(limit)).all()
+
+    def iter_search_items(self, list_id, prefix=None, contains=None, after=None, batch_size=10000):
+        """Stream (value, comment, created_by) for every match, like iter_list_items."""
+        session = SessionLocal()
+        try:
+            query = search_items_query(list_id, prefix, contains, after).with_only_columns(
+                ListItem.value, ListItem.comment, ListItem.created_by)
+            result = session.execute(query.execution_options(stream_results=True, yield_per=batch_size))
+            for partition in result.partitions():
+                yield from partition
+        finally:
+            session.close()
+
+    def page_lists(self, list_type=None, deleted="exclude", after=None, limit=100):
+        """Up to `limit` rows (id, name, type, is_deleted) of lists_page_query."""
+        with session_scope() as session:
+            return session.execute(lists_page_query(list_type, deleted, after).limit(limit)).all()
+
+    def page_list_items(self, list_id, deleted="exclude", after=None, limit=100):
+        """Up to `limit` rows (id, value, comment, created_by, is_deleted) of list_items_page_query."""
+        with session_scope() as session:
+            return session.execute(list_items_page_query(list_id, deleted, after).limit(limit)).all()
+
+    def estimate_rows(self, query):
+        """Planner estimate of the number of rows `query` returns."""
+        with session_scope() as session:
+            return plan_rows(session.execute(estimate_statement(query)).scalar())
+
+    # Bucket and hash expressions matching app.utils.list_digest.member_hash
+    _BUCKET_SQL = "encode(substring(convert_to(value, 'UTF8') from greatest(octet_length(value) - :suffix + 1, 1)), 'hex')"
+    _HASH_SQL = "(('x' || substr(md5(value), {start}, 8))::bit(32)::int & 2147483647)"
+
+    def bucket_digests(self, list_type, suffix_bytes):
+        """{bucket: (count, sum_h1, sum_h2)} over the distinct active values of `list_type`, computed in Postgres."""
+        query = text(f"""
+            SELECT bucket, count(*), sum(h1), sum(h2)
+            FROM (
+                SELECT {self._BUCKET_SQL} AS bucket,
+                       {self._HASH_SQL.format(start=1)} AS h1,
+                       {self._HASH_SQL.format(start=9)} AS h2
+                FROM (SELECT DISTINCT value FROM list_items WHERE list_type = :list_type AND is_deleted = 0) v
+            ) hashed
+            GROUP BY bucket
+        """)
+        with session_scope() as session:
+            rows = session.execute(query, {"list_type": list_type, "suffix": suffix_bytes}).all()
+        return {bucket: (int(count), int(a), int(b)) for bucket, count, a, b in rows}
+
+    def values_in_buckets(self, list_type, buckets, suffix_bytes):
+        """The distinct active values of `list_type` that fall in the given buckets."""
+        if not buckets:
+            return set()
+        query = text(f"""
+            SELECT DISTINCT value FROM list_items
+            WHERE list_type = :list_type AND is_deleted = 0 AND {self._BUCKET_SQL} IN :buckets
+        """).bindparams(bindparam("buckets", expanding=True))
+        with session_scope() as session:
+            rows = session.execute(query, {"list_type": list_type, "suffix": suffix_bytes, "buckets": list(buckets)})
+            return {row.value for row in rows}
+
+    def count_lists_of_type(self, list_type):
+        """Count the active lists of a given type."""
+        with session_scope() as session:
+            return session.query(List).filter(List.type == list_type, List.is_deleted == 0).count()
+
+    def apply_mutations(self, mutations, before_commit=None):
+        """
+        Apply add/delete mutations as multi-row statements in a single transaction.
+        Expects at most one mutation per (list_id, value), as produced by the write-behind buffer.
+        `before_commit` is called last inside the transaction; whatever it raises rolls it back.
+        """
+        deletes = [(m["list_id"], m["value"]) for m in mutations if m["action"] == "delete"]
+        adds = [m for m in mutations if m["action"] == "add"]
+        deleted, rows = 0, []
+
+        with session_scope() as session:
+            if deletes:
+                deleted = session.execute(
+                    update(ListItem)
+                    .where(tuple_(ListItem.list_id, ListItem.value).in_(deletes), ListItem.is_deleted == 0)
+                    .values(is_deleted=1)
+                ).rowcount
+            if adds:
+                list_types = dict(session.execute(
+                    select(List.id, List.type).where(List.id.in_({m["list_id"] for m in adds}))
+                ).all())
+                rows = [
+                    {"list_id": m["list_id"], "list_type": list_types.get(m["list_id"]), "value": m["value"],
+                     "comment": m.get("comment"), "created_by": m.get("author"), "is_deleted": 0}
+                    for m in adds
+                ]
+                rows = self._insert_new_rows(session, rows)
+            if before_commit is not None:
+                before_commit()
+        return {"added": len(rows), "deleted": deleted}
+
+    def bulk_insert_values(self, list_id, values, comment, author):
+        """
+        Insert the values that are not already active in the list and return the ones inserted.
+        On PostgreSQL (psycopg2) the chunk is streamed with COPY into a temporary staging table and
+        moved over with one INSERT ... SELECT; other backends use a single multi-row INSERT.
+        """
+        values = list(dict.fromkeys(values))
+        if not values:
+            return []
+        with session_scope() as session:
+            list_obj = session.get(List, list_id)
+            if list_obj is None:
+                raise NoResultFound(f"List {list_id} not found")
+            connection = session.connection()
+            if connection.dialect.name == "postgresql" and connection.dialect.driver == "psycopg2":
+                return self._copy_insert(connection, list_id, list_obj.type, values, comment, author)
+
+            rows = [
+                {"list_id": list_id, "list_type": list_obj.type, "value": value, "comment": comment,
+                 "created_by": author, "is_deleted": 0}
+                for value in values
+            ]
+            return [row["value"] for row in self._insert_new_rows(session, rows)]
+
+    def _insert_new_rows(self, session, rows):
+        """
+        Insert rows whose (list_id, value) has no active row yet and return the ones inserted.
+        PostgreSQL resolves conflicts against the unique partial index; elsewhere they are
+        filtered out with a lookup first.
+        """
+        if not rows:
+            return []
+        if session.get_bind().dialect.name == "postgresql":
+            stmt = (
+                pg_insert(ListItem)
+                .on_conflict_do_nothing(index_elements=["list_id", "value"], index_where=ListItem.is_deleted == 0)
+                .returning(ListItem.list_id, ListItem.value)
+            )
+            inserted = set(session.execute(stmt, rows).all())
+        else:
+            existing = set(session.execute(
+                select(ListItem.list_id, ListItem.value).where(
+                    tuple_(ListItem.list_id, ListItem.value).in_([(row["list_id"], row["value"]) for row in rows]),
+                    ListItem.is_deleted == 0,
+                )
+            ).all())
+            rows = [row for row in rows if (row["list_id"], row["value"]) not in existing]
+            if rows:
+                session.execute(insert(ListItem), rows)
+            return rows
+        return [row for row in rows if (row["list_id"], row["value"]) in inserted]
+
+    def _copy_insert(self, connection, list_id, list_type, values, comment, author):
+        cursor = connection.connection.cursor()
+        try:
+            cursor.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS list_items_staging (value text) ON COMMIT DELETE ROWS")
+            payload = "\n".join(
+                value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+                for value in values
+            )
+            cursor.copy_expert("COPY list_items_staging (value) FROM STDIN", io.StringIO(payload))
+            cursor.execute(
+                """
+                INSERT INTO list_items (list_id, list_type, value, comment, created_by, is_deleted)
+                SELECT %(list_id)s, %(list_type)s, s.value, %(comment)s, %(author)s, 0
+                FROM list_items_staging s
+                ON CONFLICT (list_id, value) WHERE is_deleted = 0 DO NOTHING
+                RETURNING value
+                """,
+                {"list_id": list_id, "list_type": list_type, "comment": comment, "author": author},
+            )
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+    def add_list_item(self, list_id, value, comment, author):
+        """Insert a single value into a list."""
+        return self.apply_mutations(
+            [{"list_id": list_id, "value": value, "action": "add", "comment": comment, "author": author}])
+
+    def delete_list_item(self, list_id, value):
+        """Soft-delete a single value from a list."""
+        return self.apply_mutations([{"list_id": list_id, "value": value, "action": "delete"}])
+
+    def update_list_item(self, list_id, old_value, new_value, comment, author):
+        """Rename an active value in place."""
+        with session_scope() as session:
+            return session.execute(
+                update(ListItem)
+                .where(ListItem.list_id == list_id, ListItem.value == old_value, ListItem.is_deleted == 0)
+                .values(value=new_value, comment=comment, created_by=author)
+            ).rowcount
+
+    def get_list_types(self):
+        """Return the distinct types of all active lists."""
+        with session_scope() as session:
+            rows = session.query(List.type).filter(List.is_deleted == 0).distinct().all()
+        return [row.type for row in rows]
+
+    # The rest of your methods go here...
+
+
+@instrument("postgres_async")
+class AsyncDatabase:
+    """Database counterpart for the asyncio data path, built on SQLAlchemy's asyncio engine."""
+
+    async def get_list_by_id(self, list_id):
+        """Return the list with the given id."""
+        async with async_session_scope() as session:
+            list_obj = await session.get(List, list_id)
+            if list_obj is None:
+                raise NoResultFound(f"List {list_id} not found")
+            return list_obj
+
+    async def update_list_type(self, list_id, new_type):
+        """Change the type of a list and of the denormalized copy on its items."""
+        async with async_session_scope() as session:
+            list_obj = await session.get(List, list_id)
+            if list_obj is None:
+                raise NoResultFound(f"List {list_id} not found")
+            list_obj.type = new_type
+            await session.execute(update(ListItem).where(ListItem.list_id == list_id).values(list_type=new_type))
+
+    async def check_value_in_list(self, list_type, value):
+        """Check whether value is present in any active list of `list_type`."""
+        return value in await self.check_values_in_list(list_type, [value])
+
+    async def check_values_in_list(self, list_type, values):
+        """Return the subset of `values` present in active lists of `list_type`, using one IN query."""
+        if not values:
+            return set()
+        async with async_session_scope() as session:
+            result = await session.execute(active_values_query(list_type, values))
+            return set(result.scalars().all())
+
+    async def search_list_items(self, list_id, prefix=None, contains=None, after=None, limit=100):
+        """Up to `limit` rows (id, value, comment, created_by) of search_items_query."""
+        async with async_session_scope() as session:
+            result = await session.execute(search_items_query(list_id, prefix, contains, after).limit(limit))
+            return result.all()
+
+    async def page_lists(self, list_type=None, deleted="exclude", after=None, limit=100):
+        """Up to `limit` rows (id, name, type, is_deleted) of lists_page_query."""
+        async with async_session_scope() as session:
+            result = await session.execute(lists_page_query(list_type, deleted, after).limit(limit))
+            return result.all()
+
+    async def page_list_items(self, list_id, deleted="exclude", after=None, limit=100):
+        """Up to `limit` rows (id, value, comment, created_by, is_deleted) of list_items_page_query."""
+        async with async_session_scope() as session:
+            result = await session.execute(list_items_page_query(list_id, deleted, after).limit(limit))
+            return result.all()
+
+    async def estimate_rows(self, query):
+        """Planner estimate of the number of rows `query` returns."""
+        async with async_session_scope() as session:
+            return plan_rows((await session.execute(estimate_statement(query))).scalar())
+
+    async def get_all_lists(self):
+        """Return the names of all active lists."""
+        async with async_session_scope() as session:
+            result = await session.execute(select(List.name).where(List.is_deleted == 0).order_by(List.id))
+            return list(result.scalars().all())
\ No newline at end of file
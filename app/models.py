@@ -1,6 +1,6 @@
 #app/models
 from pydantic import BaseModel
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import DDL, Column, Integer, String, ForeignKey, Index, event, text
 from sqlalchemy.orm import relationship
 from app.db_setup import Base
 
@@ -24,10 +24,33 @@ class List(Base):
 
 class ListItem(Base):
     __tablename__ = "list_items"
+    __table_args__ = (
+        # At most one active row per value in a list; soft-deleted rows stay out of the index
+        Index("uq_list_items_active_list_value", "list_id", "value", unique=True,
+              postgresql_where=text("is_deleted = 0")),
+        # Lookups by list type go straight to the items, without joining lists
+        Index("ix_list_items_active_type_value", "list_type", "value",
+              postgresql_where=text("is_deleted = 0")),
+        # Keyset pages and streams of one list's items, in id order
+        Index("ix_list_items_list_id_id", "list_id", "id"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     list_id = Column(Integer, ForeignKey('lists.id'))
+    # Copy of List.type, kept in step by Database.update_list_type
+    list_type = Column(String)
     value = Column(String)
     is_deleted = Column(Integer, default=0)
     created_by = Column(String)
     comment = Column(String)
-    list = relationship("List")
\ No newline at end of file
+    list = relationship("List")
+
+# Value search (Database.search_list_items). Byte-ordered values per list serve LIKE 'abc%'
+# and paging in value order; trigrams per list (btree_gin indexes list_id) serve LIKE '%abc%'
+# without reading the whole list or the matches of other lists.
+Index("ix_list_items_active_list_value_c", ListItem.list_id, ListItem.value.collate("C"),
+      postgresql_where=ListItem.is_deleted == 0)
+Index("ix_list_items_active_list_value_trgm", ListItem.list_id, ListItem.value, postgresql_using="gin",
+      postgresql_ops={"value": "gin_trgm_ops"}, postgresql_where=ListItem.is_deleted == 0)
+for extension in ("pg_trgm", "btree_gin"):
+    event.listen(ListItem.__table__, "before_create",
+                 DDL(f"CREATE EXTENSION IF NOT EXISTS {extension}").execute_if(dialect="postgresql"))
\ No newline at end of file
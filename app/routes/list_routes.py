@@ -1,13 +1,15 @@
 # app/routes/list_routes.py
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
+from app.container import container
 from app.services.list_management_service import ListManagementService
 
 router = APIRouter()
 
 
-# Injecting ListManagementService through FastAPI's Depends
+# Injecting the process-wide ListManagementService through FastAPI's Depends
 def get_list_service():
-    return ListManagementService()
+    return container.list_service
 
 
 @router.get("/check/{list_type}")
@@ -25,4 +27,22 @@ async def check_value(
     if 'error' in exists:
         raise HTTPException(status_code=400, detail=exists['error'])
 
-    return {"exists": exists}
\ No newline at end of file
+    return {"exists": exists}
+
+
+@router.post("/check/{list_type}/batch")
+async def check_values(
+        list_type: str,
+        values: List[str] = Body(..., embed=True),
+        list_service: ListManagementService = Depends(get_list_service)
+):
+    """
+    Check many values against a list in one request.
+    - `list_type`: The type of list (e.g., 'blacklist', 'whitelist').
+    - `values`: The values to check; results come back in the same order.
+    """
+    results = list_service.check_values(list_type, values, role="viewer")
+    if isinstance(results, dict) and 'error' in results:
+        raise HTTPException(status_code=400, detail=results['error'])
+
+    return {"results": results}
@@ -1,8 +1,8 @@
 # app/routes/report_routes.py
 from fastapi import APIRouter
-from app.services.list_management_service import ListManagementService  # Correct import
+from app.container import container
 router = APIRouter()
-service = ListManagementService()
+service = container.list_service
 
 @router.get("/report/actions")
 def get_action_report():
@@ -1,8 +1,8 @@
 # app/routes/user_routes.py
 from fastapi import APIRouter, HTTPException, Body
-from app.services.list_management_service import ListManagementService
+from app.container import container
 router = APIRouter()
-service = ListManagementService()
+service = container.list_service
 
 
 @router.post("/user/create")
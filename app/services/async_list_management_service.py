@@ -0,0 +1,156 @@
+import asyncio
+from app.database import AsyncDatabase
+from app.services.list_management_service import BaseListManagementService
+from app.services.notification_dispatcher import NotificationDispatcher
+from app.services.write_behind import AsyncWriteBehindBuffer, async_write_behind
+from app.utils.bloom_filter import AsyncBloomFilter, async_bloom_filter
+from app.utils.cache_rehydration import RehydrationGuard
+from app.utils.list_metadata import METADATA_CHANNEL, ListMetadataCache
+from app.utils.local_cache import INVALIDATION_CHANNEL, LocalCache
+from app.utils.redis_cache import AsyncRedisCache
+
+
+class AsyncListManagementService(BaseListManagementService):
+    """
+    ListManagementService for async route handlers. The flows are the base class's; here every
+    step is awaited, Redis and Postgres through redis.asyncio and SQLAlchemy's asyncio engine.
+    Celery enqueueing, which only has a blocking client, runs in the default thread pool so it
+    never stalls the event loop. Postgres writes go through the write-behind stream and
+    notifications through the dispatcher's queue, both drained off the loop.
+    """
+
+    def __init__(self, db: AsyncDatabase = None, redis_client: AsyncRedisCache = None,
+                 notifications: NotificationDispatcher = None, local_cache: LocalCache = None,
+                 bloom_filter: AsyncBloomFilter = None, write_behind: AsyncWriteBehindBuffer = None,
+                 rehydration: RehydrationGuard = None, list_metadata: ListMetadataCache = None):
+        super().__init__(
+            db=db or AsyncDatabase(),
+            redis_client=redis_client or AsyncRedisCache(),
+            notifications=notifications,
+            local_cache=local_cache,
+            bloom_filter=bloom_filter or async_bloom_filter,
+            write_behind=write_behind or async_write_behind,
+            rehydration=rehydration,
+            list_metadata=list_metadata,
+        )
+
+    async def _run(self, flow):
+        """Drive a flow to its result, awaiting each call it yields."""
+        reply, error = None, None
+        while True:
+            try:
+                step = flow.send(reply) if error is None else flow.throw(error)
+            except StopIteration as done:
+                return done.value
+            call, *args = step
+            try:
+                reply, error = await call(*args), None
+            except Exception as e:
+                reply, error = None, e
+
+    async def _db_check_value(self, list_type, value):
+        async with self.rehydration.async_db_slot():
+            return await self.db.check_value_in_list(list_type, value)
+
+    async def _db_check_values(self, list_type, values):
+        async with self.rehydration.async_db_slot():
+            return await self.db.check_values_in_list(list_type, values)
+
+    async def _invalidate_local(self, list_type, values):
+        """Drop values from the in-process cache on this and every other worker."""
+        keys = [self._cache_key(list_type, value) for value in values]
+        if not keys or not self.local_cache.enabled:
+            return
+        self.local_cache.invalidate(keys, broadcast=False)
+        await self._broadcast(self.local_cache.invalidation_message(keys))
+
+    async def _forget_list(self, list_id):
+        """Drop a retyped list's metadata and every cached answer, on this and every other worker."""
+        if self.list_metadata.enabled:
+            self.list_metadata.invalidate([list_id], broadcast=False)
+            await self._broadcast(self.list_metadata.invalidation_message([list_id]), METADATA_CHANNEL)
+        if self.local_cache.enabled:
+            self.local_cache.clear(broadcast=False)
+            await self._broadcast(self.local_cache.invalidation_message(clear=True))
+
+    async def _broadcast(self, message, channel=INVALIDATION_CHANNEL):
+        try:
+            await self.redis_client.publish(channel, message)
+        except Exception as e:
+            # Entries on other workers still expire after the TTL
+            self.logger.warning(f"Failed to broadcast cache invalidation: {e}")
+
+    async def _enqueue(self, task, *args):
+        """Publish a Celery task without blocking the event loop."""
+        return await asyncio.to_thread(task.delay, *args)
+
+    async def check_value(self, list_type, value, role):
+        """Check if a value exists in the list, using Redis first."""
+        return await self._run(self._check_value(list_type, value, role))
+
+    async def check_values(self, list_type, values, role):
+        """
+        Check many values in one call: cache hits are resolved with a single SMISMEMBER,
+        all misses with a single IN query. Results are returned in request order.
+        """
+        return await self._run(self._check_values(list_type, values, role))
+
+    async def check_list_access(self, list_id, role, action='view'):
+        """Type of the list, once role may perform `action`; raises PermissionError or NoResultFound."""
+        return await self._run(self._check_list_access(list_id, role, action))
+
+    async def prepare_search(self, list_id, role, prefix=None, contains=None, cursor=None):
+        """
+        Validate a search whose matches are streamed rather than paged and return (prefix, contains,
+        after) for Database.iter_search_items. Raises what search_values reports as errors.
+        """
+        return await self._run(self._prepare_search(list_id, role, prefix, contains, cursor))
+
+    async def search_values(self, list_id, role, prefix=None, contains=None, cursor=None, limit=None):
+        """
+        One page of the active values of a list that start with `prefix` and/or contain `contains`,
+        with the cursor of the next page (None on the last one). Served by the search indexes.
+        """
+        return await self._run(self._search_values(list_id, role, prefix, contains, cursor, limit))
+
+    async def page_lists(self, role, list_type=None, deleted="exclude", cursor=None, limit=None, estimate=False):
+        """
+        One page of lists in id order, optionally of one type, with the cursor of the next page
+        and, on request, the planner's estimate of how many lists match.
+        """
+        return await self._run(self._page_lists(role, list_type, deleted, cursor, limit, estimate))
+
+    async def page_list_items(self, list_id, role, deleted="exclude", cursor=None, limit=None, estimate=False):
+        """
+        One page of a list's items in id order, with the cursor of the next page and, on request,
+        the planner's estimate of how many items match.
+        """
+        return await self._run(self._page_list_items(list_id, role, deleted, cursor, limit, estimate))
+
+    async def add_value(self, list_id, value, comment, author, role):
+        """Add a value to the list and sync it to PostgreSQL."""
+        return await self._run(self._add_value(list_id, value, comment, author, role))
+
+    async def bulk_add_values(self, list_id, values, comment, author, role):
+        """Bulk add values to the list."""
+        return await self._run(self._bulk_add_values(list_id, values, comment, author, role))
+
+    async def edit_value(self, list_id, old_value, new_value, comment, author, role):
+        """Edit an existing value in the list."""
+        return await self._run(self._edit_value(list_id, old_value, new_value, comment, author, role))
+
+    async def delete_value(self, list_id, value, role):
+        """Delete a value from the list."""
+        return await self._run(self._delete_value(list_id, value, role))
+
+    async def bulk_delete_values(self, list_id, values, role):
+        """Bulk delete values from the list."""
+        return await self._run(self._bulk_delete_values(list_id, values, role))
+
+    async def change_list_type(self, list_id, new_type, role):
+        """Change the type of list."""
+        return await self._run(self._change_list_type(list_id, new_type, role))
+
+    async def get_all_lists(self):
+        """Return the names of all active lists."""
+        return await self.db.get_all_lists()
@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import uuid
+
+from app.config import settings
+from app.services.async_list_management_service import AsyncListManagementService
+from app.services.list_management_service import PermissionError, ValidationError
+from app.tasks.celery_tasks import bulk_add_task
+from app.utils.import_parser import ImportFormatError, aiter_lines, aiter_values
+from app.utils.import_progress import ImportProgress
+from sqlalchemy.orm import exc as orm_exc
+
+
+class ListImportService:
+    """
+    Streams a CSV or NDJSON upload into a list. The body is parsed line by line and valid values are
+    handed to bulk_add_task in fixed-size batches, so at most one batch is held in memory no matter
+    how large the file is. Each batch is published before more of the body is read, which also
+    slows the upload down to the rate the broker accepts it.
+    """
+
+    def __init__(self, list_service: AsyncListManagementService = None, batch_size=None, max_line_length=None):
+        self.list_service = list_service or AsyncListManagementService()
+        self.batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+        self.max_line_length = max_line_length or settings.IMPORT_MAX_LINE_LENGTH
+        self.logger = logging.getLogger(__name__)
+
+    async def import_stream(self, list_id, chunks, fmt, comment, author, role, import_id=None):
+        """
+        Import values from an async iterable of byte chunks. Returns the progress snapshot once the
+        whole body has been queued; batches keep being written by Celery workers after that.
+        """
+        try:
+            list_type = await self.list_service.check_list_access(list_id, role, 'bulk_add')
+        except (orm_exc.NoResultFound, PermissionError) as e:
+            return {"error": str(e)}
+
+        progress = ImportProgress(import_id or uuid.uuid4().hex)
+        if not await asyncio.to_thread(progress.start, list_id, fmt, author):
+            return {"error": f"Import '{progress.import_id}' already exists.", "outcome": "import_exists"}
+        batch, errors = [], []
+        lines = reported_lines = rejected = 0
+        error_budget = progress.max_errors
+
+        try:
+            async for line_number, value, error in aiter_values(aiter_lines(chunks, self.max_line_length), fmt):
+                lines = line_number
+                if error is None:
+                    try:
+                        self.list_service.validate_value(value, list_type)
+                    except ValidationError as e:
+                        error = str(e)
+                if error is not None:
+                    rejected += 1
+                    if error_budget > 0:
+                        errors.append({"line": line_number, "error": error})
+                        error_budget -= 1
+                    continue
+
+                batch.append(value)
+                if len(batch) >= self.batch_size:
+                    await asyncio.to_thread(self._publish, progress, list_id, batch, comment, author, role,
+                                            lines - reported_lines, rejected, errors)
+                    batch, errors = [], []
+                    reported_lines, rejected = lines, 0
+
+            await asyncio.to_thread(self._publish, progress, list_id, batch, comment, author, role,
+                                    lines - reported_lines, rejected, errors)
+        except ImportFormatError as e:
+            await asyncio.to_thread(progress.finish, "failed", str(e))
+            self.logger.warning(f"Import {progress.import_id} into list {list_id} failed: {e}")
+            return {"error": str(e), "import_id": progress.import_id}
+
+        await asyncio.to_thread(progress.finish)
+        return await asyncio.to_thread(progress.get)
+
+    async def get_progress(self, import_id, author):
+        """Progress of an import started by author; None for anyone else's."""
+        return await asyncio.to_thread(ImportProgress(import_id).get, author)
+
+    def _publish(self, progress, list_id, batch, comment, author, role, lines, rejected, errors):
+        """Enqueue one batch (if any) and record the lines parsed since the previous one."""
+        if batch:
+            bulk_add_task.apply_async(
+                args=[list_id, batch, comment, author, role],
+                kwargs={"import_id": progress.import_id},
+            )
+        progress.record(lines=lines, accepted=len(batch), rejected=rejected,
+                        batches_queued=1 if batch else 0, errors=errors)
@@ -1,9 +1,17 @@
 import logging
-from datetime import datetime
-from app.database import Database
-from app.services.notification_service import NotificationService
-from app.utils.redis_cache import RedisCache
-from app.tasks.celery_tasks import sync_to_postgres
+from app.config import settings
+from app.database import Database, list_items_page_query, lists_page_query
+from app.services.notification_dispatcher import NotificationDispatcher, notification_dispatcher
+from app.services.write_behind import WriteBehindBuffer, write_behind as default_write_behind
+from app.utils.bloom_filter import BloomFilter, bloom_filter as default_bloom_filter
+from app.utils.cache_rehydration import CacheWarmingError, RehydrationGuard, rehydration_guard
+from app.utils.list_metadata import ListMetadataCache, list_metadata as default_list_metadata
+from app.utils.local_cache import LocalCache, local_cache as default_local_cache
+from app.utils.metrics import CHECK_VALUE_LOOKUPS
+from app.utils.pagination import InvalidCursor, decode_cursor, paginate
+from app.utils.request_profiler import span
+from app.utils.redis_cache import RedisCache, list_set_key, tombstone_key
+from app.tasks.celery_tasks import move_cached_list, rebuild_bloom_filter, sync_to_postgres
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import exc as orm_exc
 from app.utils.logging_service import logger
@@ -34,11 +42,35 @@ class ValidationError(Exception):
 class PermissionError(Exception):
     pass
 
-class ListManagementService:
-    def __init__(self, db: Database = None, redis_client: RedisCache = None, notification_service: NotificationService = None):
-        self.db = db or Database()
-        self.redis_client = redis_client or RedisCache()
-        self.notification_service = notification_service or NotificationService()
+class MutationConflict(ValueError):
+    """A mutation the list's current contents rule out; `outcome` says which way."""
+
+    def __init__(self, outcome, message):
+        super().__init__(message)
+        self.outcome = outcome
+
+class BaseListManagementService:
+    """
+    Everything the sync and async services decide: permissions, validation, key naming, paging,
+    when Postgres is consulted, what gets cached and which outcome each failure maps to.
+
+    Each operation is written once, as a flow: a generator that yields `(call, *args)` for every
+    Redis, Postgres, write-behind or Celery step and is sent back the call's result, or has its
+    exception thrown in. A subclass drives flows with `_run`, calling each step plainly or awaiting
+    it, and supplies the few steps that differ between the two: `_db_check_value`,
+    `_db_check_values`, `_invalidate_local`, `_forget_list` and `_enqueue`.
+    """
+    def __init__(self, db, redis_client, notifications: NotificationDispatcher = None, local_cache: LocalCache = None,
+                 bloom_filter=None, write_behind=None, rehydration: RehydrationGuard = None,
+                 list_metadata: ListMetadataCache = None):
+        self.db = db
+        self.redis_client = redis_client
+        self.notifications = notifications or notification_dispatcher
+        self.local_cache = local_cache or default_local_cache
+        self.bloom_filter = bloom_filter
+        self.write_behind = write_behind
+        self.rehydration = rehydration or rehydration_guard
+        self.list_metadata = list_metadata or default_list_metadata
         self.logger = logging.getLogger(__name__)
         logging.basicConfig(level=logging.INFO)
 
@@ -49,10 +81,15 @@ class ListManagementService:
             'viewer': ['view']
         }
 
-    def log_action(self, action, user, details):
-        """Log user actions."""
-        timestamp = datetime.utcnow().isoformat()
-        self.logger.info(f"{timestamp} - User: {user}, Action: {action}, Details: {details}")
+    def log_action(self, action, user, **fields):
+        """Log user actions as structured records through the queued service logger (check_* actions are sampled)."""
+        logger.log_action(action, user, **fields)
+
+    def _notify_duplicate(self, list_type, value):
+        """Queue a Slack alert; bursts on the same list type are collapsed into one summary per interval."""
+        with span("notify", "slack digest"):
+            self.notifications.digest("slack", f"duplicate attempts on {list_type}",
+                                      f"Duplicate value attempt: {value} in list {list_type}")
 
     def check_permission(self, role, action):
         """Check if the user role has permission for the specified action."""
@@ -67,153 +104,535 @@ class ListManagementService:
             raise ValidationError("Value contains invalid characters. Only alphanumeric characters are allowed.")
 
     def _cache_key(self, list_type, value):
-        """Generate the Redis cache key."""
+        """Generate the key identifying a value in the in-process cache and invalidation messages."""
         return f"{list_type}:{value}"
 
-    def _check_in_cache(self, list_type, value):
-        """Check if the value exists in Redis cache."""
-        return self.redis_client.exists(self._cache_key(list_type, value))
-
-    def _cache_value(self, list_type, value):
-        """Cache the value in Redis."""
-        self.redis_client.set(self._cache_key(list_type, value), 'cached')
-
-    def _remove_from_cache(self, list_type, value):
-        """Remove a value from Redis cache."""
-        self.redis_client.delete(self._cache_key(list_type, value))
-
-    def check_value(self, list_type, value, role):
-        """Check if a value exists in the list, using Redis first."""
+    def _set_key(self, list_type):
+        """Generate the Redis SET key holding the cached members of a list type."""
+        return list_set_key(list_type)
+
+    def _search_terms(self, list_id, prefix, contains, limit):
+        """Validate a search and return (page size, the parameters its cursors are bound to)."""
+        if not prefix and not contains:
+            raise ValidationError("Search needs a prefix, a substring, or both.")
+        if len(prefix or "") > 255 or len(contains or "") > 255:
+            raise ValidationError("Search term exceeds the maximum length of 255 characters.")
+        if contains and not prefix and len(contains) < settings.SEARCH_MIN_CONTAINS:
+            raise ValidationError(
+                f"Substring searches need at least {settings.SEARCH_MIN_CONTAINS} characters.")
+        limit = self._page_size(limit, settings.SEARCH_DEFAULT_LIMIT, settings.SEARCH_MAX_LIMIT)
+        return limit, {"scope": "search", "list_id": list_id, "prefix": prefix or None, "contains": contains or None}
+
+    def _page_size(self, limit, default, maximum):
+        limit = default if limit is None else limit
+        if not 1 <= limit <= maximum:
+            raise ValidationError(f"Limit must be between 1 and {maximum}.")
+        return limit
+
+    def _page_terms(self, limit, deleted, **params):
+        """Validate a page request and return (page size, the parameters its cursors are bound to)."""
+        if deleted not in ("exclude", "only", "include"):
+            raise ValidationError("deleted must be 'exclude', 'only' or 'include'.")
+        return self._page_size(limit, settings.PAGE_DEFAULT_LIMIT, settings.PAGE_MAX_LIMIT), {"deleted": deleted, **params}
+
+    def _search_page(self, rows, limit, params):
+        # Prefix matches are paged by value, substring-only matches by id
+        key = (lambda row: row.value) if params["prefix"] else (lambda row: row.id)
+        rows, next_cursor = paginate(rows, limit, key, **params)
+        items = [{"value": row.value, "comment": row.comment, "created_by": row.created_by} for row in rows]
+        return {"items": items, "next_cursor": next_cursor}
+
+    def _get_list_type(self, list_id):
+        """Type of a list from the in-process metadata cache, loading it on a miss."""
+        metadata = self.list_metadata.lookup(list_id)
+        if metadata is None:
+            generation = self.list_metadata.generation
+            metadata = self.list_metadata.store((yield self.db.get_list_by_id, list_id), generation)
+        return metadata.type
+
+    def _in_db(self, list_id, list_type, value):
+        """Postgres membership, corrected for write-behind mutations not flushed yet."""
+        pending = yield self.write_behind.pending_action, list_id, value
+        if pending is not None:
+            return pending == 'add'
+        return (yield from self._check_in_db(list_type, value))
+
+    def _check_in_db(self, list_type, value):
+        """Check Postgres, unless the Bloom filter proves the value is absent."""
+        maybe = yield self.bloom_filter.might_contain, list_type, value
+        if maybe is False:
+            return False
+        exists = bool((yield self._db_check_value, list_type, value))
+        if maybe and not exists:
+            self.bloom_filter.record_false_positive()
+        return exists
+
+    def _restore(self, list_type, values):
+        """
+        Re-cache values Postgres reported, except those deleted moments ago whose delete Postgres
+        has not seen yet; returns the ones still members.
+        """
+        live = yield (self.redis_client.restore_members, self._set_key(list_type), values,
+                      [tombstone_key(list_type, value) for value in values])
+        return [value for value, kept in zip(values, live) if kept]
+
+    def _find_existing(self, list_type, values, list_id=None, restore=True):
+        """
+        Split values into those found in Redis and those found only in Postgres, using one
+        SMISMEMBER, one Bloom filter round trip and at most one IN query. With a list_id, values
+        with an unflushed write-behind mutation are decided by it instead of by Postgres. Postgres
+        hits are re-cached, minus the ones just deleted, unless `restore` is False because the
+        caller is about to remove them.
+        """
+        values = list(dict.fromkeys(values))
+        hits = yield self.redis_client.smismember, self._set_key(list_type), values
+        cached = {value for value, hit in zip(values, hits) if hit}
+        misses = [value for value, hit in zip(values, hits) if not hit]
+
+        found = set()
+        if misses and list_id is not None:
+            pending = yield self.write_behind.pending_actions, list_id, misses
+            found = {value for value, action in pending.items() if action == 'add'}
+            misses = [value for value in misses if value not in pending]
+        if misses:
+            maybes = yield self.bloom_filter.might_contain_many, list_type, misses
+            in_db = yield self._db_check_values, list_type, [
+                value for value, maybe in zip(misses, maybes) if maybe is not False]
+            self.bloom_filter.record_false_positive(
+                sum(1 for value, maybe in zip(misses, maybes) if maybe and value not in in_db))
+            in_db = [value for value in misses if value in in_db]
+            if restore:
+                in_db = yield from self._restore(list_type, in_db)
+            found.update(in_db)
+        return cached, found
+
+    def _check_value(self, list_type, value, role):
         try:
             self.check_permission(role, 'view')
             self.validate_value(value, list_type)
 
             redis_key = self._cache_key(list_type, value)
-            exists = self._check_in_cache(list_type, value)
+            exists = self.local_cache.get(redis_key)
+            source = "local"
+
+            if exists is None:
+                generation = self.local_cache.generation
+                exists = bool((yield self.redis_client.sismember, self._set_key(list_type), value))
+                source = "redis"
+                if not exists:
+                    exists = yield from self._check_in_db(list_type, value)
+                    if exists:
+                        exists = bool((yield from self._restore(list_type, [value])))
+                    source = "db" if exists else "absent"
+                self.local_cache.set(redis_key, exists, generation)
+            CHECK_VALUE_LOOKUPS.inc(source)
+
+            self.log_action('check_value', 'system', list_type=list_type, value=value)
+            return exists
+        except CacheWarmingError as e:
+            return {"error": str(e), "outcome": "cache_warming"}
+        except (ValidationError, PermissionError) as e:
+            return {"error": str(e)}
 
-            if not exists:
-                exists = self.db.check_value_in_list(list_type, value)
-                if exists:
-                    self._cache_value(list_type, value)
+    def _check_values(self, list_type, values, role):
+        try:
+            self.check_permission(role, 'view')
+            if len(values) > settings.MAX_BATCH_CHECK_SIZE:
+                raise ValidationError(
+                    f"Batch size exceeds the maximum of {settings.MAX_BATCH_CHECK_SIZE} values.")
 
-            self.log_action('check_value', 'system', f"Checked value '{value}' in list '{list_type}'")
-            return exists
+            results, pending = {}, []
+            for value in dict.fromkeys(values):
+                try:
+                    self.validate_value(value, list_type)
+                except ValidationError as e:
+                    results[value] = {"error": str(e)}
+                    continue
+                exists = self.local_cache.get(self._cache_key(list_type, value))
+                if exists is None:
+                    pending.append(value)
+                else:
+                    results[value] = {"exists": exists}
+
+            generation = self.local_cache.generation
+            cached, found = yield from self._find_existing(list_type, pending)
+            for value in pending:
+                exists = value in cached or value in found
+                results[value] = {"exists": exists}
+                self.local_cache.set(self._cache_key(list_type, value), exists, generation)
+
+            self.log_action('check_values', 'system', list_type=list_type, count=len(values))
+            return [{"value": value, **results[value]} for value in values]
+        except CacheWarmingError as e:
+            return {"error": str(e), "outcome": "cache_warming"}
         except (ValidationError, PermissionError) as e:
             return {"error": str(e)}
 
-    def add_value(self, list_id, value, comment, author, role):
-        """Add a value to the list and sync it to PostgreSQL."""
+    def _check_list_access(self, list_id, role, action):
+        self.check_permission(role, action)
+        return (yield from self._get_list_type(list_id))
+
+    def _prepare_search(self, list_id, role, prefix, contains, cursor):
+        self.check_permission(role, 'view')
+        _, params = self._search_terms(list_id, prefix, contains, None)
+        after = decode_cursor(cursor, **params)
+        yield from self._get_list_type(list_id)
+        return params["prefix"], params["contains"], after
+
+    def _search_values(self, list_id, role, prefix, contains, cursor, limit):
         try:
-            self.check_permission(role, 'add')
-            list_type = self.db.get_list_by_id(list_id).type
-            self.validate_value(value, list_type)
+            self.check_permission(role, 'view')
+            limit, params = self._search_terms(list_id, prefix, contains, limit)
+            after = decode_cursor(cursor, **params)
+            yield from self._get_list_type(list_id)
+            rows = yield self.db.search_list_items, list_id, params["prefix"], params["contains"], after, limit + 1
+            self.log_action('search_values', 'system', list_id=list_id, prefix=prefix, contains=contains)
+            return self._search_page(rows, limit, params)
+        except (ValidationError, PermissionError, InvalidCursor) as e:
+            return {"error": str(e)}
+        except orm_exc.NoResultFound as e:
+            return {"error": str(e), "outcome": "not_found"}
 
-            if self._check_in_cache(list_type, value) or self.db.check_value_in_list(list_type, value):
-                self.notification_service.send_slack_notification(f"Duplicate value attempt: {value} in list {list_type}")
-                raise ValueError("Value already exists in the list")
+    def _page_lists(self, role, list_type, deleted, cursor, limit, estimate):
+        try:
+            self.check_permission(role, 'view')
+            limit, params = self._page_terms(limit, deleted, scope="lists", list_type=list_type)
+            after = decode_cursor(cursor, **params)
+            rows = yield self.db.page_lists, list_type, deleted, after, limit + 1
+            rows, next_cursor = paginate(rows, limit, lambda row: row.id, **params)
+            page = {"items": [dict(row._mapping) for row in rows], "next_cursor": next_cursor}
+            if estimate:
+                page["estimated_total"] = yield self.db.estimate_rows, lists_page_query(list_type, deleted)
+            return page
+        except (ValidationError, PermissionError, InvalidCursor) as e:
+            return {"error": str(e)}
 
-            self._cache_value(list_type, value)
-            sync_to_postgres.delay(list_id, value, 'add', comment, author)
+    def _page_list_items(self, list_id, role, deleted, cursor, limit, estimate):
+        try:
+            self.check_permission(role, 'view')
+            limit, params = self._page_terms(limit, deleted, scope="list_items", list_id=list_id)
+            after = decode_cursor(cursor, **params)
+            yield from self._get_list_type(list_id)
+            rows = yield self.db.page_list_items, list_id, deleted, after, limit + 1
+            rows, next_cursor = paginate(rows, limit, lambda row: row.id, **params)
+            page = {"items": [dict(row._mapping) for row in rows], "next_cursor": next_cursor}
+            if estimate:
+                page["estimated_total"] = yield self.db.estimate_rows, list_items_page_query(list_id, deleted)
+            return page
+        except (ValidationError, PermissionError, InvalidCursor) as e:
+            return {"error": str(e)}
+        except orm_exc.NoResultFound as e:
+            return {"error": str(e), "outcome": "not_found"}
 
-            self.log_action('add_value', author, f"Added value '{value}' to list '{list_id}'")
-            return {"status": "Added successfully"}
+    def _add_value(self, list_id, value, comment, author, role):
+        try:
+            self.check_permission(role, 'add')
+            list_type = yield from self._get_list_type(list_id)
+            self.validate_value(value, list_type)
+
+            # Check and SADD in one script: of two concurrent adds of a value only one gets here with True
+            key = self._set_key(list_type)
+            added = yield self.redis_client.add_member, key, value
+            try:
+                # A value missing from Redis may still be in Postgres; if so it rightly stays cached
+                duplicate = not added or (yield from self._in_db(list_id, list_type, value))
+            except Exception:
+                yield self.redis_client.remove_member, key, value
+                raise
+            if duplicate:
+                self._notify_duplicate(list_type, value)
+                raise MutationConflict("duplicate", "Value already exists in the list")
+
+            yield self.bloom_filter.add, list_type, [value]
+            yield self._invalidate_local, list_type, [value]
+            yield self.write_behind.submit, list_id, value, 'add', comment, author
+
+            self.log_action('add_value', author, list_id=list_id, value=value)
+            return {"status": "Added successfully", "outcome": "added"}
+        except MutationConflict as e:
+            return {"error": str(e), "outcome": e.outcome}
+        except CacheWarmingError as e:
+            return {"error": str(e), "outcome": "cache_warming"}
         except (IntegrityError, ValidationError, PermissionError, ValueError) as e:
             return {"error": str(e)}
 
-    def bulk_add_values(self, list_id, values, comment, author, role):
-        """Bulk add values to the list."""
+    def _bulk_add_values(self, list_id, values, comment, author, role):
         try:
             self.check_permission(role, 'bulk_add')
-            list_type = self.db.get_list_by_id(list_id).type
-            added_values, errors = [], []
+            list_type = yield from self._get_list_type(list_id)
+            added_values, errors, candidates = [], [], []
 
             for value in values:
                 try:
                     self.validate_value(value, list_type)
-                    if not self._check_in_cache(list_type, value) and not self.db.check_value_in_list(list_type, value):
-                        self._cache_value(list_type, value)
-                        added_values.append(value)
-                        sync_to_postgres.delay(list_id, value, 'add', comment, author)
-                    else:
-                        errors.append(f"Value '{value}' already exists.")
+                    candidates.append(value)
                 except ValidationError as e:
                     errors.append(str(e))
 
-            self.log_action('bulk_add_values', author, f"Bulk added values to list '{list_id}'")
+            cached, found = yield from self._find_existing(list_type, candidates, list_id)
+            existing = cached | found
+            for value in candidates:
+                if value in existing:
+                    errors.append(f"Value '{value}' already exists.")
+                else:
+                    existing.add(value)
+                    added_values.append(value)
+                    yield self.write_behind.submit, list_id, value, 'add', comment, author
+
+            yield self.redis_client.add_members, self._set_key(list_type), added_values
+            yield self.bloom_filter.add, list_type, added_values
+            yield self._invalidate_local, list_type, added_values
+            self.log_action('bulk_add_values', author, list_id=list_id, count=len(values))
             if errors:
                 return {"status": "Partial success", "added_values": added_values, "errors": errors}
             return {"status": "All values added successfully", "added_values": added_values}
+        except CacheWarmingError as e:
+            return {"error": str(e), "outcome": "cache_warming"}
         except PermissionError as e:
             return {"error": str(e)}
 
-    def edit_value(self, list_id, old_value, new_value, comment, author, role):
-        """Edit an existing value in the list."""
+    def _edit_value(self, list_id, old_value, new_value, comment, author, role):
         try:
             self.check_permission(role, 'edit')
-            list_type = self.db.get_list_by_id(list_id).type
+            list_type = yield from self._get_list_type(list_id)
             self.validate_value(new_value, list_type)
 
-            if self._check_in_cache(list_type, new_value) or self.db.check_value_in_list(list_type, new_value):
-                raise ValueError("New value already exists in the list")
-
-            self._remove_from_cache(list_type, old_value)
-            self._cache_value(list_type, new_value)
-
-            sync_to_postgres.delay(list_id, new_value, 'edit', comment, author)
-
-            self.log_action('edit_value', author, f"Edited value from '{old_value}' to '{new_value}' in list '{list_id}'")
-            return {"status": "Value edited successfully"}
+            # Values only Postgres knows about are ruled out first; the rename itself is one script
+            if (yield from self._in_db(list_id, list_type, new_value)):
+                raise MutationConflict("new_value_exists", "New value already exists in the list")
+            key = self._set_key(list_type)
+            tombstone = tombstone_key(list_type, old_value)
+            outcome = yield (self.redis_client.rename_member, key, tombstone, old_value, new_value,
+                             settings.DELETE_TOMBSTONE_TTL)
+            if outcome == "claimed":
+                # Old value not cached: this edit holds its tombstone while Postgres decides, then
+                # adds the new value; the claim is released if the edit does not go ahead
+                try:
+                    found = yield from self._in_db(list_id, list_type, old_value)
+                    added = found and (yield self.redis_client.add_member, key, new_value)
+                except Exception:
+                    yield self.redis_client.delete, tombstone
+                    raise
+                if not added:
+                    yield self.redis_client.delete, tombstone
+                    if not found:
+                        raise MutationConflict("not_found", "Value does not exist in the list")
+                    raise MutationConflict("new_value_exists", "New value already exists in the list")
+            elif outcome == "gone":
+                raise MutationConflict("not_found", "Value does not exist in the list")
+            elif outcome == "exists":
+                raise MutationConflict("new_value_exists", "New value already exists in the list")
+
+            yield self.bloom_filter.add, list_type, [new_value]
+            yield self._invalidate_local, list_type, [old_value, new_value]
+
+            yield self.write_behind.submit_edit, list_id, old_value, new_value, comment, author
+
+            self.log_action('edit_value', author, list_id=list_id, old_value=old_value, new_value=new_value)
+            return {"status": "Value edited successfully", "outcome": "renamed"}
+        except MutationConflict as e:
+            return {"error": str(e), "outcome": e.outcome}
+        except CacheWarmingError as e:
+            return {"error": str(e), "outcome": "cache_warming"}
         except (orm_exc.NoResultFound, IntegrityError, ValidationError, PermissionError, ValueError) as e:
             return {"error": str(e)}
 
-    def delete_value(self, list_id, value, role):
-        """Delete a value from the list."""
+    def _delete_value(self, list_id, value, role):
         try:
             self.check_permission(role, 'delete')
-            list_type = self.db.get_list_by_id(list_id).type
-
-            if not self._check_in_cache(list_type, value) and not self.db.check_value_in_list(list_type, value):
-                raise ValueError("Value does not exist in the list")
-
-            self._remove_from_cache(list_type, value)
-            sync_to_postgres.delay(list_id, value, 'delete', '', 'system')
-
-            self.log_action('delete_value', 'system', f"Deleted value '{value}' from list '{list_id}'")
-            return {"status": "Deleted successfully"}
+            list_type = yield from self._get_list_type(list_id)
+
+            # Delete-if-exists in one script; of concurrent deletes of a value only one gets past it
+            tombstone = tombstone_key(list_type, value)
+            outcome = yield (self.redis_client.delete_member, self._set_key(list_type), tombstone, value,
+                             settings.DELETE_TOMBSTONE_TTL)
+            if outcome == "claimed":
+                # Not cached: Postgres decides, and the claim is released unless the delete goes ahead
+                try:
+                    found = yield from self._in_db(list_id, list_type, value)
+                except CacheWarmingError:
+                    yield self.redis_client.delete, tombstone
+                    raise
+                if not found:
+                    yield self.redis_client.delete, tombstone
+                    raise MutationConflict("not_found", "Value does not exist in the list")
+            elif outcome == "gone":
+                raise MutationConflict("not_found", "Value does not exist in the list")
+
+            yield self._invalidate_local, list_type, [value]
+            yield self.write_behind.submit, list_id, value, 'delete', '', 'system'
+
+            self.log_action('delete_value', 'system', list_id=list_id, value=value)
+            return {"status": "Deleted successfully", "outcome": "deleted"}
+        except MutationConflict as e:
+            return {"error": str(e), "outcome": e.outcome}
+        except CacheWarmingError as e:
+            return {"error": str(e), "outcome": "cache_warming"}
         except (orm_exc.NoResultFound, IntegrityError, PermissionError, ValueError) as e:
             return {"error": str(e)}
 
-    def bulk_delete_values(self, list_id, values, role):
-        """Bulk delete values from the list."""
+    def _bulk_delete_values(self, list_id, values, role):
         try:
             self.check_permission(role, 'bulk_delete')
-            list_type = self.db.get_list_by_id(list_id).type
+            list_type = yield from self._get_list_type(list_id)
             deleted_values, errors = [], []
 
+            cached, found = yield from self._find_existing(list_type, values, list_id, restore=False)
+            existing = cached | found
             for value in values:
-                try:
-                    if self._check_in_cache(list_type, value) or self.db.check_value_in_list(list_type, value):
-                        self._remove_from_cache(list_type, value)
-                        deleted_values.append(value)
-                        sync_to_postgres.delay(list_id, value, 'delete', '', 'system')
-                    else:
-                        errors.append(f"Value '{value}' does not exist.")
-                except Exception as e:
-                    errors.append(str(e))
-
-            self.log_action('bulk_delete_values', 'system', f"Bulk deleted values from list '{list_id}'")
+                if value in existing:
+                    existing.discard(value)
+                    deleted_values.append(value)
+                    yield self.write_behind.submit, list_id, value, 'delete', '', 'system'
+                else:
+                    errors.append(f"Value '{value}' does not exist.")
+
+            # Tombstones first, so a check that misses Redis from here on does not re-cache them
+            yield (self.redis_client.set_tombstones, [tombstone_key(list_type, value) for value in deleted_values],
+                   settings.DELETE_TOMBSTONE_TTL)
+            yield self.redis_client.remove_members, self._set_key(list_type), deleted_values
+            yield self._invalidate_local, list_type, deleted_values
+            self.log_action('bulk_delete_values', 'system', list_id=list_id, count=len(values))
             if errors:
                 return {"status": "Partial success", "deleted_values": deleted_values, "errors": errors}
             return {"status": "All values deleted successfully"}
+        except CacheWarmingError as e:
+            return {"error": str(e), "outcome": "cache_warming"}
         except PermissionError as e:
             return {"error": str(e)}
 
-    def change_list_type(self, list_id, new_type, role):
-        """Change the type of list."""
+    def _change_list_type(self, list_id, new_type, role):
         try:
             self.check_permission(role, 'change_type')
-            self.db.update_list_type(list_id, new_type)
-            self.log_action('change_list_type', 'system', f"Changed list type for list '{list_id}' to '{new_type}'")
+            old_type = (yield self.db.get_list_by_id, list_id).type
+            # The new type's filter does not know this list's values yet
+            yield self.bloom_filter.invalidate, new_type
+            yield self.db.update_list_type, list_id, new_type
+            yield self._forget_list, list_id
+            if old_type != new_type:
+                yield self._enqueue, move_cached_list, list_id, old_type, new_type
+            yield self._enqueue, rebuild_bloom_filter, new_type
+            self.log_action('change_list_type', 'system', list_id=list_id, new_type=new_type)
             return {"status": "List type updated successfully"}
         except (orm_exc.NoResultFound, PermissionError) as e:
-            return {"error": str(e)}
\ No newline at end of file
+            return {"error": str(e)}
+
+
+class ListManagementService(BaseListManagementService):
+    """The list service for threads and Celery workers; every flow step is a blocking call."""
+
+    def __init__(self, db: Database = None, redis_client: RedisCache = None, notifications: NotificationDispatcher = None,
+                 local_cache: LocalCache = None, bloom_filter: BloomFilter = None,
+                 write_behind: WriteBehindBuffer = None, rehydration: RehydrationGuard = None,
+                 list_metadata: ListMetadataCache = None):
+        super().__init__(
+            db=db or Database(),
+            redis_client=redis_client or RedisCache(),
+            notifications=notifications,
+            local_cache=local_cache,
+            bloom_filter=bloom_filter or default_bloom_filter,
+            write_behind=write_behind or default_write_behind,
+            rehydration=rehydration,
+            list_metadata=list_metadata,
+        )
+
+    def _run(self, flow):
+        """Drive a flow to its result, making each call it yields."""
+        reply, error = None, None
+        while True:
+            try:
+                step = flow.send(reply) if error is None else flow.throw(error)
+            except StopIteration as done:
+                return done.value
+            call, *args = step
+            try:
+                reply, error = call(*args), None
+            except Exception as e:
+                reply, error = None, e
+
+    def _db_check_value(self, list_type, value):
+        with self.rehydration.db_slot():
+            return self.db.check_value_in_list(list_type, value)
+
+    def _db_check_values(self, list_type, values):
+        with self.rehydration.db_slot():
+            return self.db.check_values_in_list(list_type, values)
+
+    def _invalidate_local(self, list_type, values):
+        """Drop values from the in-process cache on this and every other worker."""
+        self.local_cache.invalidate(self._cache_key(list_type, value) for value in values)
+
+    def _forget_list(self, list_id):
+        """Drop a retyped list's metadata and every cached answer, on this and every other worker."""
+        self.list_metadata.invalidate([list_id])
+        self.local_cache.clear()
+
+    def _enqueue(self, task, *args):
+        return task.delay(*args)
+
+    def check_value(self, list_type, value, role):
+        """Check if a value exists in the list, using Redis first."""
+        return self._run(self._check_value(list_type, value, role))
+
+    def check_values(self, list_type, values, role):
+        """
+        Check many values in one call: cache hits are resolved with a single SMISMEMBER,
+        all misses with a single IN query. Results are returned in request order.
+        """
+        return self._run(self._check_values(list_type, values, role))
+
+    def check_list_access(self, list_id, role, action='view'):
+        """Type of the list, once role may perform `action`; raises PermissionError or NoResultFound."""
+        return self._run(self._check_list_access(list_id, role, action))
+
+    def prepare_search(self, list_id, role, prefix=None, contains=None, cursor=None):
+        """
+        Validate a search whose matches are streamed rather than paged and return (prefix, contains,
+        after) for Database.iter_search_items. Raises what search_values reports as errors.
+        """
+        return self._run(self._prepare_search(list_id, role, prefix, contains, cursor))
+
+    def search_values(self, list_id, role, prefix=None, contains=None, cursor=None, limit=None):
+        """
+        One page of the active values of a list that start with `prefix` and/or contain `contains`,
+        with the cursor of the next page (None on the last one). Served by the search indexes.
+        """
+        return self._run(self._search_values(list_id, role, prefix, contains, cursor, limit))
+
+    def page_lists(self, role, list_type=None, deleted="exclude", cursor=None, limit=None, estimate=False):
+        """
+        One page of lists in id order, optionally of one type, with the cursor of the next page
+        and, on request, the planner's estimate of how many lists match.
+        """
+        return self._run(self._page_lists(role, list_type, deleted, cursor, limit, estimate))
+
+    def page_list_items(self, list_id, role, deleted="exclude", cursor=None, limit=None, estimate=False):
+        """
+        One page of a list's items in id order, with the cursor of the next page and, on request,
+        the planner's estimate of how many items match.
+        """
+        return self._run(self._page_list_items(list_id, role, deleted, cursor, limit, estimate))
+
+    def add_value(self, list_id, value, comment, author, role):
+        """Add a value to the list and sync it to PostgreSQL."""
+        return self._run(self._add_value(list_id, value, comment, author, role))
+
+    def bulk_add_values(self, list_id, values, comment, author, role):
+        """Bulk add values to the list."""
+        return self._run(self._bulk_add_values(list_id, values, comment, author, role))
+
+    def edit_value(self, list_id, old_value, new_value, comment, author, role):
+        """Edit an existing value in the list."""
+        return self._run(self._edit_value(list_id, old_value, new_value, comment, author, role))
+
+    def delete_value(self, list_id, value, role):
+        """Delete a value from the list."""
+        return self._run(self._delete_value(list_id, value, role))
+
+    def bulk_delete_values(self, list_id, values, role):
+        """Bulk delete values from the list."""
+        return self._run(self._bulk_delete_values(list_id, values, role))
+
+    def change_list_type(self, list_id, new_type, role):
+        """Change the type of list."""
+        return self._run(self._change_list_type(list_id, new_type, role))
@@ -0,0 +1,178 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from app.config import settings
+from app.services.notification_service import NotificationService
+
+logger = logging.getLogger(__name__)
+
+# Dispatcher channel -> NotificationService method
+CHANNELS = {
+    "slack": "send_slack_notification",
+    "email": "send_email_notification",
+    "sms": "send_sms_notification",
+}
+
+_STOP = object()
+
+
+class NotificationDispatcher:
+    """
+    Sends notifications from background threads so request handlers never wait on a webhook.
+
+    send() puts a notification on a bounded queue and returns at once; when the queue is full
+    the notification is dropped and counted rather than blocking the caller. digest() is for
+    events that come in bursts: the first event of a topic in each interval is sent as is, the
+    rest are only counted and go out as one summary when the interval ends, e.g.
+    "499 more duplicate attempts on blacklist in the last 60s".
+    """
+
+    def __init__(self, service: NotificationService = None, max_queue=None, workers=None,
+                 digest_interval=None, enabled=None):
+        self.service = service
+        self.enabled = settings.NOTIFY_ENABLED if enabled is None else enabled
+        self.workers = workers or settings.NOTIFY_WORKERS
+        self.digest_interval = digest_interval or settings.NOTIFY_DIGEST_INTERVAL
+        self._queue = queue.Queue(max_queue or settings.NOTIFY_QUEUE_SIZE)
+        self._digests = {}
+        self._lock = threading.Lock()
+        self._threads = []
+        self._stop = threading.Event()
+
+        self.queued = 0
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.digested = 0
+
+    def send(self, channel, **kwargs):
+        """Queue one notification, e.g. send("sms", phone_number=..., message=...); returns False if dropped."""
+        if channel not in CHANNELS:
+            raise ValueError(f"Unknown notification channel '{channel}'")
+        if not self.enabled:
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((channel, kwargs))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            logger.warning(f"Notification queue full, dropped {channel} notification")
+            return False
+        with self._lock:
+            self.queued += 1
+        return True
+
+    def digest(self, channel, topic, message, **kwargs):
+        """
+        Send `message` if it is the first of `topic` in the current interval, otherwise count it
+        towards the interval's summary. kwargs are the channel's other arguments (recipient...).
+        """
+        if not self.enabled:
+            return
+        key = (channel, topic, tuple(sorted(kwargs.items())))
+        with self._lock:
+            pending = self._digests.get(key)
+            if pending is not None:
+                pending["count"] += 1
+                self.digested += 1
+                return
+            self._digests[key] = {"count": 0, "started": time.monotonic()}
+        self.send(channel, **self._arguments(channel, message, kwargs))
+
+    def flush_digests(self, force=False):
+        """Queue the summaries of every interval that has ended (all of them when force is set)."""
+        now = time.monotonic()
+        with self._lock:
+            due = [(key, pending) for key, pending in self._digests.items()
+                   if force or now - pending["started"] >= self.digest_interval]
+            for key, _ in due:
+                del self._digests[key]
+        for (channel, topic, kwargs), pending in due:
+            if pending["count"]:
+                seconds = max(int(now - pending["started"]), 1)
+                message = f"{pending['count']} more {topic} in the last {seconds}s"
+                self.send(channel, **self._arguments(channel, message, dict(kwargs)))
+
+    def close(self, timeout=10):
+        """Send outstanding summaries, drain the queue and stop the worker threads."""
+        if not self._threads:
+            return
+        self.flush_digests(force=True)
+        self._stop.set()
+        for _ in self._threads:
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                break
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "queue_size": self._queue.qsize(),
+                "queue_capacity": self._queue.maxsize,
+                "queued": self.queued,
+                "sent": self.sent,
+                "failed": self.failed,
+                "dropped": self.dropped,
+                "digested": self.digested,
+                "open_digests": len(self._digests),
+            }
+
+    @staticmethod
+    def _arguments(channel, message, kwargs):
+        if channel == "email":
+            return {"subject": message, "body": message, **kwargs}
+        return {"message": message, **kwargs}
+
+    def _ensure_started(self):
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            if self.service is None:
+                self.service = NotificationService()
+            self._stop.clear()
+            self._threads = [threading.Thread(target=self._run, name=f"notifications-{index}", daemon=True)
+                             for index in range(self.workers)]
+            for thread in self._threads:
+                thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=min(self.digest_interval, 1))
+            except queue.Empty:
+                if not self._stop.is_set():
+                    self.flush_digests()
+                continue
+            if item is _STOP:
+                return
+            self._deliver(*item)
+            if not self._stop.is_set():
+                self.flush_digests()
+
+    def _deliver(self, channel, kwargs):
+        try:
+            # Retries with backoff happen inside the service's session
+            result = getattr(self.service, CHANNELS[channel])(**kwargs)
+        except Exception as e:
+            result = {"error": str(e)}
+        with self._lock:
+            if "error" in result:
+                self.failed += 1
+            else:
+                self.sent += 1
+
+
+# Process-wide dispatcher shared by every list service in this worker
+notification_dispatcher = NotificationDispatcher()
+atexit.register(notification_dispatcher.close)
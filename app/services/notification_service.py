@@ -1,57 +1,71 @@
 import requests
 import os
 import logging
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.config import settings
+
+
+def build_session(retries=None, backoff=None, pool_size=None):
+    """requests.Session with pooled keep-alive connections, retrying 429/5xx and connection errors with backoff."""
+    retry = Retry(
+        total=settings.NOTIFY_MAX_RETRIES if retries is None else retries,
+        backoff_factor=settings.NOTIFY_BACKOFF if backoff is None else backoff,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"POST"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_maxsize=pool_size or settings.NOTIFY_POOL_SIZE)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
 
 class NotificationService:
-    def __init__(self):
+    """
+    Blocking Slack, email and SMS senders. Request handlers should not call these directly;
+    they go through the NotificationDispatcher, which sends on a background thread.
+    """
+
+    def __init__(self, session: requests.Session = None, timeout=None):
         self.webhook_url = os.getenv('SLACK_WEBHOOK_URL')
         self.email_service_url = os.getenv('EMAIL_SERVICE_URL')  # Example for email service
         self.sms_service_url = os.getenv('SMS_SERVICE_URL')  # Example for SMS service
+        self.session = session or build_session()
+        self.timeout = timeout or (settings.NOTIFY_CONNECT_TIMEOUT, settings.NOTIFY_READ_TIMEOUT)
 
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
 
     def send_slack_notification(self, message):
-        if not self.webhook_url:
-            self.logger.error("Slack webhook URL not configured.")
-            return {"error": "Slack webhook URL not configured."}
-
-        payload = {"text": message}
-        try:
-            response = requests.post(self.webhook_url, json=payload)
-            response.raise_for_status()
+        result = self._post("Slack", self.webhook_url, {"text": message})
+        if "status" in result:
             self.logger.info(f"Slack notification sent: {message}")
-            return {"status": "Slack notification sent successfully"}
-        except requests.exceptions.RequestException as e:
-            self.logger.error(f"Failed to send Slack notification: {e}")
-            return {"error": f"Failed to send Slack notification: {e}"}
+        return result
 
     def send_email_notification(self, to_email, subject, body):
-        if not self.email_service_url:
-            self.logger.error("Email service URL not configured.")
-            return {"error": "Email service URL not configured."}
-
-        payload = {"to": to_email, "subject": subject, "body": body}
-        try:
-            response = requests.post(self.email_service_url, json=payload)
-            response.raise_for_status()
+        result = self._post("Email", self.email_service_url, {"to": to_email, "subject": subject, "body": body})
+        if "status" in result:
             self.logger.info(f"Email notification sent to {to_email}: {subject}")
-            return {"status": "Email notification sent successfully"}
-        except requests.exceptions.RequestException as e:
-            self.logger.error(f"Failed to send email notification: {e}")
-            return {"error": f"Failed to send email notification: {e}"}
+        return result
 
     def send_sms_notification(self, phone_number, message):
-        if not self.sms_service_url:
-            self.logger.error("SMS service URL not configured.")
-            return {"error": "SMS service URL not configured."}
+        result = self._post("SMS", self.sms_service_url, {"to": phone_number, "message": message})
+        if "status" in result:
+            self.logger.info(f"SMS notification sent to {phone_number}: {message}")
+        return result
 
-        payload = {"to": phone_number, "message": message}
+    def _post(self, channel, url, payload):
+        if not url:
+            self.logger.error(f"{channel} service URL not configured.")
+            return {"error": f"{channel} service URL not configured."}
         try:
-            response = requests.post(self.sms_service_url, json=payload)
+            response = self.session.post(url, json=payload, timeout=self.timeout)
             response.raise_for_status()
-            self.logger.info(f"SMS notification sent to {phone_number}: {message}")
-            return {"status": "SMS notification sent successfully"}
+            return {"status": f"{channel} notification sent successfully"}
         except requests.exceptions.RequestException as e:
-            self.logger.error(f"Failed to send SMS notification: {e}")
-            return {"error": f"Failed to send SMS notification: {e}"}
\ No newline at end of file
+            self.logger.error(f"Failed to send {channel} notification: {e}")
+            return {"error": f"Failed to send {channel} notification: {e}"}
@@ -0,0 +1,442 @@
+import asyncio
+import atexit
+import logging
+import threading
+import time
+import uuid
+
+from app.config import settings
+from app.database import Database
+from app.tasks.celery_tasks import sync_to_postgres
+from app.utils.redis_cache import AsyncRedisCache, RedisCache
+
+logger = logging.getLogger(__name__)
+
+# Mutations waiting for Postgres, in submission order across every worker
+STREAM_KEY = "writebehind:stream"
+# "<list_id>:<value>" -> "<action>|<stream id>" of the latest mutation of that value not yet written
+PENDING_KEY = "writebehind:pending"
+# Mutations Postgres kept rejecting after WRITE_BEHIND_MAX_RETRIES, with the error
+DEAD_LETTER_KEY = "writebehind:dead"
+# Held by the one flusher applying batches, so batches are applied in stream order
+LEASE_KEY = "writebehind:lease"
+
+# XADD every mutation and point its pending entry at it. ARGV: (list_id, value, action, comment, author)...
+SUBMIT_SCRIPT = """
+local ids = {}
+for i = 1, #ARGV, 5 do
+    local id = redis.call('XADD', KEYS[1], '*', 'list_id', ARGV[i], 'value', ARGV[i + 1], 'action', ARGV[i + 2],
+                          'comment', ARGV[i + 3], 'author', ARGV[i + 4])
+    redis.call('HSET', KEYS[2], ARGV[i] .. ':' .. ARGV[i + 1], ARGV[i + 2] .. '|' .. id)
+    ids[#ids + 1] = id
+end
+return ids
+"""
+
+# Drop written entries, and their pending entries unless a later mutation replaced them.
+# ARGV: (stream id, pending field, pending value)...
+ACK_SCRIPT = """
+for i = 1, #ARGV, 3 do
+    redis.call('XDEL', KEYS[1], ARGV[i])
+    if redis.call('HGET', KEYS[2], ARGV[i + 1]) == ARGV[i + 2] then
+        redis.call('HDEL', KEYS[2], ARGV[i + 1])
+    end
+end
+return #ARGV / 3
+"""
+
+# Take or extend the flusher lease. ARGV: token, lease milliseconds
+LEASE_SCRIPT = """
+local holder = redis.call('GET', KEYS[1])
+if holder == ARGV[1] then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    return 1
+end
+if not holder then
+    redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+    return 1
+end
+return 0
+"""
+
+# Extend the lease only if this flusher still holds it. ARGV: token, lease milliseconds
+RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class LeaseLost(Exception):
+    """The flusher's lease lapsed and another flusher may be applying the same entries."""
+
+
+def _text(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _submit_args(mutations):
+    args = []
+    for list_id, value, action, comment, author in mutations:
+        args.extend((list_id, value, action, comment or '', author or 'system'))
+    return args
+
+
+def _pending_action(raw):
+    return _text(raw).partition("|")[0] if raw is not None else None
+
+
+def _pending_actions(values, replies):
+    return {value: _pending_action(raw) for value, raw in zip(values, replies) if raw is not None}
+
+
+class WriteBehindBuffer:
+    """
+    Queues list item mutations in a Redis stream and writes them to PostgreSQL in batches, one
+    transaction per flush.
+
+    A mutation is acknowledged once it is in the stream, so it survives the worker that submitted
+    it. One flusher at a time, across every worker, holds the lease and applies the oldest batch.
+    The lease is renewed inside the transaction just before it commits, so a flusher that stalled
+    past its lease rolls back rather than committing behind the new holder. Entries are deleted
+    only after their transaction commits, and a batch interrupted by a crash
+    is applied again by the next flusher (inserts and soft deletes are idempotent). Within a batch
+    only the latest mutation per (list_id, value) is kept, which is the state the row must end up
+    in, so deletes and inserts can be grouped into single statements without breaking per-key
+    ordering. A batch that fails WRITE_BEHIND_MAX_RETRIES times is applied one mutation at a time
+    and the mutations that still fail go to the dead-letter stream.
+
+    Any process can submit; processes that should drain the stream call start().
+    """
+
+    def __init__(self, db: Database = None, redis_client=None, batch_size=None, flush_interval=None,
+                 max_pending=None, max_retries=None, enabled=None):
+        self.db = db or Database()
+        self._redis = redis_client
+        self.enabled = settings.WRITE_BEHIND_ENABLED if enabled is None else enabled
+        self.batch_size = batch_size or settings.WRITE_BEHIND_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.WRITE_BEHIND_FLUSH_INTERVAL
+        self.max_pending = max_pending or settings.WRITE_BEHIND_MAX_PENDING
+        self.max_retries = max_retries or settings.WRITE_BEHIND_MAX_RETRIES
+        # The lease outlives a few missed renewals, and a dead flusher's lease lapses quickly
+        self.lease_ms = int(1000 * max(5 * self.flush_interval, 5))
+
+        self._token = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._failures = {}
+
+        self.submitted = 0
+        self.coalesced = 0
+        self.flushes = 0
+        self.flushed_mutations = 0
+        self.failed_flushes = 0
+        self.dead_lettered = 0
+        self.last_batch_size = 0
+        self.max_batch_size = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.last_flush_seconds = 0.0
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = RedisCache().redis
+        return self._redis
+
+    def _scripts(self):
+        if not hasattr(self, "_submit_script"):
+            self._submit_script = self.redis.register_script(SUBMIT_SCRIPT)
+            self._ack_script = self.redis.register_script(ACK_SCRIPT)
+            self._lease_script = self.redis.register_script(LEASE_SCRIPT)
+            self._renew_script = self.redis.register_script(RENEW_SCRIPT)
+            self._release_script = self.redis.register_script(RELEASE_SCRIPT)
+
+    def submit(self, list_id, value, action, comment='', author='system'):
+        """Durably queue an 'add' or 'delete' of value in one round trip."""
+        if not self.enabled:
+            sync_to_postgres.delay(list_id, value, action, comment, author)
+            return
+        self._submit([(list_id, value, action, comment, author)])
+
+    def submit_edit(self, list_id, old_value, new_value, comment='', author='system'):
+        """Queue an edit as a delete of the old value followed by an add of the new one, atomically."""
+        if not self.enabled:
+            sync_to_postgres.delay(list_id, new_value, 'edit', comment, author, old_value)
+            return
+        self._submit([(list_id, old_value, 'delete', comment, author), (list_id, new_value, 'add', comment, author)])
+
+    def _submit(self, mutations):
+        self._scripts()
+        self._submit_script(keys=[STREAM_KEY, PENDING_KEY], args=_submit_args(mutations))
+        with self._lock:
+            self.submitted += len(mutations)
+        self._wake.set()
+
+    def pending_action(self, list_id, value):
+        """'add' or 'delete' if a mutation of value, from any worker, is waiting to be written, else None."""
+        if not self.enabled:
+            return None
+        return _pending_action(self.redis.hget(PENDING_KEY, f"{list_id}:{value}"))
+
+    def pending_actions(self, list_id, values):
+        """{value: 'add' or 'delete'} for those of values with a mutation waiting to be written, in one HMGET."""
+        if not self.enabled or not values:
+            return {}
+        return _pending_actions(values, self.redis.hmget(PENDING_KEY, [f"{list_id}:{value}" for value in values]))
+
+    def start(self):
+        """Run the flusher in this process; it applies batches whenever it holds the lease."""
+        if not self.enabled or self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._stopped.clear()
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+
+    def close(self, timeout=10):
+        """Stop the flusher, then write what is queued if no other worker's flusher holds the lease."""
+        self._stopped.set()
+        self._wake.set()
+        flushing = self._thread is not None
+        if flushing:
+            self._thread.join(timeout)
+            self._thread = None
+        # A worker that neither flushed nor submitted has nothing of its own to see through
+        if not self.enabled or not (flushing or self.submitted):
+            return
+        deadline = time.monotonic() + timeout
+        try:
+            while time.monotonic() < deadline and self._hold_lease():
+                entries = self.redis.xrange(STREAM_KEY, "-", "+", count=self.batch_size)
+                if not entries or not self._flush(entries):
+                    break
+            remaining = self.redis.xlen(STREAM_KEY)
+        except Exception as e:
+            logger.error(f"Write-behind could not drain on close: {e}")
+            return
+        finally:
+            self._release_lease()
+        if remaining:
+            logger.warning(f"Write-behind stopping with {remaining} mutations queued for another flusher")
+
+    def stats(self):
+        stats = {"enabled": self.enabled, "pending": 0, "oldest_pending_seconds": 0.0, "dead_letters": 0}
+        if self.enabled:
+            with self.redis.pipeline(transaction=False) as pipe:
+                pipe.xlen(STREAM_KEY)
+                pipe.xrange(STREAM_KEY, "-", "+", count=1)
+                pipe.xlen(DEAD_LETTER_KEY)
+                pending, oldest, dead_letters = pipe.execute()
+            stats.update({
+                "pending": pending,
+                "oldest_pending_seconds": time.time() - self._entry_time(oldest[0][0]) if oldest else 0.0,
+                "dead_letters": dead_letters,
+                "backlogged": pending > self.max_pending,
+            })
+        with self._lock:
+            stats.update({
+                "flushing": self._thread is not None,
+                "submitted": self.submitted,
+                "coalesced": self.coalesced,
+                "flushes": self.flushes,
+                "flushed_mutations": self.flushed_mutations,
+                "failed_flushes": self.failed_flushes,
+                "dead_lettered": self.dead_lettered,
+                "last_batch_size": self.last_batch_size,
+                "max_batch_size": self.max_batch_size,
+                "avg_batch_size": self.flushed_mutations / self.flushes if self.flushes else 0.0,
+                "last_lag_seconds": self.last_lag,
+                "max_lag_seconds": self.max_lag,
+                "last_flush_seconds": self.last_flush_seconds,
+            })
+        return stats
+
+    def _hold_lease(self):
+        self._scripts()
+        return bool(self._lease_script(keys=[LEASE_KEY], args=[self._token, self.lease_ms]))
+
+    def _confirm_lease(self):
+        """Renew the lease for a full term just before a commit, or raise LeaseLost if it is gone."""
+        self._scripts()
+        if not self._renew_script(keys=[LEASE_KEY], args=[self._token, self.lease_ms]):
+            raise LeaseLost("write-behind lease lapsed during a flush")
+
+    def _release_lease(self):
+        try:
+            self._scripts()
+            self._release_script(keys=[LEASE_KEY], args=[self._token])
+        except Exception as e:
+            logger.warning(f"Write-behind could not release its lease: {e}")
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                if not self._hold_lease():
+                    self._stopped.wait(self.flush_interval)
+                    continue
+                entries = self.redis.xrange(STREAM_KEY, "-", "+", count=self.batch_size)
+                if not entries:
+                    self._wake.wait(self.flush_interval)
+                    self._wake.clear()
+                    continue
+                # A short batch waits until its oldest mutation is flush_interval old
+                age = time.time() - self._entry_time(entries[0][0])
+                if len(entries) < self.batch_size and age < self.flush_interval:
+                    self._stopped.wait(self.flush_interval - age)
+                    continue
+                if not self._flush(entries):
+                    self._stopped.wait(self.flush_interval)
+            except Exception as e:
+                logger.error(f"Write-behind flusher error: {e}")
+                self._stopped.wait(self.flush_interval)
+        self._release_lease()
+
+    @staticmethod
+    def _entry_time(entry_id):
+        return int(_text(entry_id).partition("-")[0]) / 1000
+
+    def _flush(self, entries):
+        """Apply one batch of stream entries; returns False if it failed and stays queued."""
+        started = time.monotonic()
+        latest, acks = {}, []
+        for entry_id, fields in entries:
+            fields = {_text(name): _text(field) for name, field in fields.items()}
+            mutation = {"list_id": int(fields["list_id"]), "value": fields["value"], "action": fields["action"],
+                        "comment": fields["comment"], "author": fields["author"]}
+            key = (mutation["list_id"], mutation["value"])
+            latest.pop(key, None)
+            latest[key] = mutation
+            entry_id = _text(entry_id)
+            acks.extend((entry_id, f"{key[0]}:{key[1]}", f"{mutation['action']}|{entry_id}"))
+        batch = list(latest.values())
+        first_id = _text(entries[0][0])
+
+        # The commit is fenced by the lease: a flusher whose lease lapsed while it applied the batch
+        # rolls back instead of committing over what the new holder has written since
+        try:
+            self._confirm_lease()
+            self.db.apply_mutations(batch, before_commit=self._confirm_lease)
+        except LeaseLost as e:
+            logger.warning(f"Write-behind flush of {len(batch)} mutations rolled back: {e}")
+            return False
+        except Exception as e:
+            failures = self._failures.get(first_id, 0) + 1
+            logger.error(f"Write-behind flush of {len(batch)} mutations failed ({failures}/{self.max_retries}): {e}")
+            with self._lock:
+                self.failed_flushes += 1
+            if failures < self.max_retries:
+                self._failures = {first_id: failures}
+                return False
+            if not self._dead_letter(batch):
+                logger.warning(f"Write-behind lost its lease while dead-lettering {len(batch)} mutations")
+                return False
+        self._failures.pop(first_id, None)
+        self._ack_script(keys=[STREAM_KEY, PENDING_KEY], args=acks)
+
+        finished = time.time()
+        lag = finished - self._entry_time(first_id)
+        with self._lock:
+            self.coalesced += len(entries) - len(batch)
+            self.flushes += 1
+            self.flushed_mutations += len(batch)
+            self.last_batch_size = len(batch)
+            self.max_batch_size = max(self.max_batch_size, len(batch))
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self.last_flush_seconds = time.monotonic() - started
+        return True
+
+    def _dead_letter(self, batch):
+        """
+        Apply a batch that keeps failing one mutation at a time and park the ones that still fail;
+        returns False, leaving the batch queued, if the lease is lost partway.
+        """
+        for mutation in batch:
+            try:
+                self.db.apply_mutations([mutation], before_commit=self._confirm_lease)
+            except LeaseLost:
+                return False
+            except Exception as e:
+                logger.error(f"Write-behind dead-lettering {mutation['action']} of {mutation['value']!r}: {e}")
+                self.redis.xadd(DEAD_LETTER_KEY, {**{name: str(field) for name, field in mutation.items()},
+                                                  "error": str(e)[:500]})
+                with self._lock:
+                    self.dead_lettered += 1
+        return True
+
+
+class AsyncWriteBehindBuffer:
+    """
+    Submission side of WriteBehindBuffer for the asyncio data path: mutations go to the same
+    stream through redis.asyncio, so submitting never blocks the event loop. The process's
+    WriteBehindBuffer flusher drains them.
+    """
+
+    def __init__(self, flusher: WriteBehindBuffer = None, redis_client=None):
+        self.flusher = flusher or write_behind
+        self._redis = redis_client
+        self._submit_script = None
+
+    @property
+    def enabled(self):
+        return self.flusher.enabled
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = AsyncRedisCache().redis
+        return self._redis
+
+    async def submit(self, list_id, value, action, comment='', author='system'):
+        """Durably queue an 'add' or 'delete' of value in one round trip."""
+        if not self.enabled:
+            await asyncio.to_thread(sync_to_postgres.delay, list_id, value, action, comment, author)
+            return
+        await self._submit([(list_id, value, action, comment, author)])
+
+    async def submit_edit(self, list_id, old_value, new_value, comment='', author='system'):
+        """Queue an edit as a delete of the old value followed by an add of the new one, atomically."""
+        if not self.enabled:
+            await asyncio.to_thread(sync_to_postgres.delay, list_id, new_value, 'edit', comment, author, old_value)
+            return
+        await self._submit([(list_id, old_value, 'delete', comment, author), (list_id, new_value, 'add', comment, author)])
+
+    async def _submit(self, mutations):
+        if self._submit_script is None:
+            self._submit_script = self.redis.register_script(SUBMIT_SCRIPT)
+        await self._submit_script(keys=[STREAM_KEY, PENDING_KEY], args=_submit_args(mutations))
+        with self.flusher._lock:
+            self.flusher.submitted += len(mutations)
+
+    async def pending_action(self, list_id, value):
+        """'add' or 'delete' if a mutation of value, from any worker, is waiting to be written, else None."""
+        if not self.enabled:
+            return None
+        return _pending_action(await self.redis.hget(PENDING_KEY, f"{list_id}:{value}"))
+
+    async def pending_actions(self, list_id, values):
+        """{value: 'add' or 'delete'} for those of values with a mutation waiting to be written, in one HMGET."""
+        if not self.enabled or not values:
+            return {}
+        return _pending_actions(values, await self.redis.hmget(PENDING_KEY, [f"{list_id}:{value}" for value in values]))
+
+    def stats(self):
+        return self.flusher.stats()
+
+
+# Process-wide buffer shared by every list service in this worker; the app runs its flusher
+write_behind = WriteBehindBuffer()
+async_write_behind = AsyncWriteBehindBuffer(write_behind)
+atexit.register(write_behind.close)
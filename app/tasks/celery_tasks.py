@@ -1,48 +1,159 @@
+import logging
+import time
+
 from celery import Celery
-from app.database import Database
-from app.models import ListItem
+from celery.signals import after_task_publish, before_task_publish, task_postrun, task_prerun, worker_process_init
+from app.config import settings
+from app.container import container
+from app.db_setup import engine
+from app.models import List, ListItem
 from app.database import session_scope
+from app.utils.bloom_filter import bloom_filter
+from app.utils.cache_reconciler import CacheReconciler
+from app.utils.cache_rehydration import CacheRehydrator
+from app.utils.import_progress import ImportProgress
+from app.utils.iterables import chunked
+from app.utils.list_digest import digest_key
+from app.utils.local_cache import publish_invalidation
+from app.utils import request_profiler
+from app.utils.metrics import CELERY_ENQUEUED
+from app.utils.task_metrics import TIMED_TASKS, record_task_duration
+from app.utils.redis_cache import list_set_key
+
+logger = logging.getLogger(__name__)
 
 # Initialize Celery app with Redis as the broker
 celery = Celery('tasks', broker='redis://localhost:6379/0')
 
+# Periodic tasks, run by `celery -A app.tasks.celery_tasks beat`
+celery.conf.beat_schedule = {
+    'reconcile-cache': {
+        'task': 'app.tasks.celery_tasks.reconcile_cache',
+        'schedule': settings.RECONCILE_INTERVAL,
+    },
+}
+
+@worker_process_init.connect
+def _reset_engine_pool(**kwargs):
+    # Pooled connections opened before the fork belong to the parent; redis-py resets its pools by itself
+    engine.dispose(close=False)
+
+
+# Publish start times by task id, kept only while a request is being profiled
+_publish_started = {}
+
+
+@before_task_publish.connect
+def _count_enqueued(sender=None, headers=None, **kwargs):
+    CELERY_ENQUEUED.inc(str(sender).rsplit(".", 1)[-1])
+    if request_profiler.active and headers:
+        _publish_started[headers.get("id")] = time.perf_counter()
+
+
+@after_task_publish.connect
+def _profile_enqueue(sender=None, headers=None, **kwargs):
+    started = _publish_started.pop(headers.get("id"), None) if _publish_started and headers else None
+    if started is not None:
+        request_profiler.record_span("celery", str(sender), started, time.perf_counter() - started)
+
+
+# Start times of the running TIMED_TASKS, by task id
+_task_started = {}
+
+
+@task_prerun.connect
+def _start_task_timer(task_id=None, task=None, **kwargs):
+    if task is not None and task.name.rsplit(".", 1)[-1] in TIMED_TASKS:
+        _task_started[task_id] = time.monotonic()
+
+
+@task_postrun.connect
+def _record_task_duration(task_id=None, task=None, state=None, retval=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is None:
+        return
+    # bulk tasks report their own errors in the return value instead of raising
+    failed = state != "SUCCESS" or (isinstance(retval, dict) and retval.get("status") == "error") or (
+        isinstance(retval, str) and retval.startswith("Error:"))
+    try:
+        record_task_duration(container.redis_cache.redis, task.name.rsplit(".", 1)[-1],
+                             time.monotonic() - started, failed)
+    except Exception as e:
+        logger.warning(f"Could not record duration of {task.name}: {e}")
+
+
 @celery.task
 def send_registration_email(user_email):
     # Logic to send registration email to the user
-    print(f"Email sent to {user_email}")
+    logger.info(f"Email sent to {user_email}")
 
 
 @celery.task
-def sync_to_postgres(list_id, value, action, comment, author):
+def sync_to_postgres(list_id, value, action, comment, author, old_value=None):
     """Syncs values to PostgreSQL asynchronously."""
-    db = Database()
+    db = container.database
 
-    with session_scope() as session:
-        if action == "add":
-            db.add_list_item(list_id, value, comment, author)
-        elif action == "edit":
-            old_value = "some_old_value"  # Replace with actual logic to fetch old value
-            db.update_list_item(list_id, old_value, value, comment, author)
-        elif action == "delete":
-            db.delete_list_item(list_id, value)
+    if action == "add":
+        db.add_list_item(list_id, value, comment, author)
+    elif action == "edit":
+        db.update_list_item(list_id, old_value, value, comment, author)
+    elif action == "delete":
+        db.delete_list_item(list_id, value)
 
-    print(f"Action {action} performed on list {list_id} for value {value} by {author}.")
+    logger.info(f"Action {action} performed on list {list_id} for value {value} by {author}.")
+
+
+def _list_type(session, list_id):
+    list_obj = session.get(List, list_id)
+    return list_obj.type if list_obj is not None else None
+
+
+def _invalidate_local_caches(list_type, values):
+    """Tell API workers to drop L1 entries for values changed outside ListManagementService."""
+    if list_type is not None:
+        publish_invalidation(f"{list_type}:{value}" for value in values)
 
 
 @celery.task
-def bulk_add_task(list_id, values, comment, author, role):
-    """Bulk add task."""
-    with session_scope() as session:
-        try:
-            for value in values:
-                list_item = ListItem(list_id=list_id, value=value, comment=comment, created_by=author)
-                session.add(list_item)
-            session.commit()
-            return f"Bulk add: {len(values)} items added to list {list_id}"
-        except Exception as e:
-            session.rollback()  # Rollback on error
-            print(f"Error adding items: {str(e)}")
-            return f"Error: {str(e)}"
+def bulk_add_task(list_id, values, comment, author, role, chunk_size=None, import_id=None):
+    """
+    Bulk add task. Values are written in fixed-size chunks, each in its own transaction, skipping
+    ones already active in the list; every chunk is also added to the Redis set and Bloom filter.
+    When the values are one batch of a streaming import, its progress is updated on completion.
+    """
+    db = container.database
+    cache = container.redis_cache
+    inserted = duplicates = 0
+    try:
+        list_type = db.get_list_by_id(list_id).type
+        for chunk in chunked(values, chunk_size or settings.BULK_CHUNK_SIZE):
+            new_values = db.bulk_insert_values(list_id, chunk, comment, author)
+            inserted += len(new_values)
+            duplicates += len(chunk) - len(new_values)
+
+            cache.add_members(list_set_key(list_type), chunk)
+            bloom_filter.add(list_type, new_values)
+            _invalidate_local_caches(list_type, new_values)
+    except Exception as e:
+        logger.exception(f"Bulk add into list {list_id} failed after {inserted} inserts")
+        if import_id:
+            ImportProgress(import_id).batch_finished(inserted, duplicates, failed=True)
+        return {"status": "error", "error": str(e), "list_id": list_id,
+                "inserted": inserted, "duplicates": duplicates}
+
+    logger.info(f"Bulk add: {inserted} items added to list {list_id}, {duplicates} duplicates skipped")
+    if import_id:
+        ImportProgress(import_id).batch_finished(inserted, duplicates)
+    return {"status": "completed", "list_id": list_id, "inserted": inserted, "duplicates": duplicates}
+
+
+def bulk_add_batches(list_id, values, comment, author, role, batch_size=None):
+    """
+    One bulk_add_task signature per BULK_CHUNK_SIZE values, so a large upload is spread over
+    several messages (and workers) instead of travelling through the broker in one.
+    """
+    return [bulk_add_task.si(list_id, batch, comment, author, role)
+            for batch in chunked(values, batch_size or settings.BULK_CHUNK_SIZE)]
 
 
 @celery.task
@@ -53,8 +164,68 @@ def bulk_delete_task(list_id, values, role):
             session.query(ListItem).filter(ListItem.list_id == list_id, ListItem.value.in_(values)).update(
                 {"is_deleted": True})
             session.commit()
+            list_type = _list_type(session, list_id)
+            if list_type is not None:
+                container.redis_cache.remove_members(list_set_key(list_type), values)
+            _invalidate_local_caches(list_type, values)
             return f"Bulk delete: {len(values)} items deleted from list {list_id}"
         except Exception as e:
             session.rollback()  # Rollback on error
-            print(f"Error deleting items: {str(e)}")
-            return f"Error: {str(e)}"
\ No newline at end of file
+            logger.exception(f"Bulk delete from list {list_id} failed")
+            return f"Error: {str(e)}"
+
+
+@celery.task
+def rebuild_bloom_filter(list_type):
+    """Rebuild the Bloom filter for a list type from the active rows in PostgreSQL."""
+    db = container.database
+    result = bloom_filter.rebuild(list_type, db.iter_list_values(list_type))
+    logger.info(f"Rebuilt Bloom filter for {list_type}: {result['items']} items in {result['seconds']}s.")
+    return result
+
+
+@celery.task
+def rehydrate_cache(list_types=None):
+    """Reload the Redis sets and Bloom filters from PostgreSQL, e.g. after Redis lost its data."""
+    result = CacheRehydrator(container.database, container.redis_cache).run(list_types)
+    logger.info(f"Cache rehydration {result['status']}: {result.get('items', 0)} items.")
+    return result
+
+
+@celery.task
+def reconcile_cache(list_types=None, repair=True):
+    """Compare Redis and PostgreSQL bucket digests per list type and repair the buckets that differ."""
+    reports = CacheReconciler(container.database, container.redis_cache).run(list_types, repair=repair)
+    for report in reports:
+        logger.info(f"Reconciled {report['list_type']}: {report['buckets_mismatched']}/{report['buckets']} buckets differ, "
+                    f"+{report['added']} -{report['removed']} in {report['seconds']}s.")
+    return reports
+
+
+@celery.task
+def move_cached_list(list_id, old_type, new_type, batch_size=10000):
+    """Move a list's cached members from the Redis set of its old type to that of its new type."""
+    db = container.database
+    cache = container.redis_cache
+    old_key, new_key = list_set_key(old_type), list_set_key(new_type)
+
+    if db.count_lists_of_type(old_type) == 0:
+        # No other list shares the old set: hand it over whole, including values not yet synced
+        with cache.redis.pipeline(transaction=True) as pipe:
+            pipe.sunionstore(new_key, [new_key, old_key])
+            # Overlapping members make the merged digest unknowable; the reconciler rebuilds it
+            pipe.delete(old_key, digest_key(old_key), digest_key(new_key))
+            pipe.execute()
+        return {"list_id": list_id, "moved": "all", "dropped_old_set": True}
+
+    # Other lists share the old set: drop only the values none of them holds. The list's items
+    # already carry the new type, so the lookup sees the remaining lists of the old type only.
+    moved = released = 0
+    for chunk in chunked(db.iter_list_item_values(list_id, batch_size), batch_size):
+        cache.add_members(new_key, chunk)
+        shared = db.check_values_in_list(old_type, chunk)
+        unshared = [value for value in chunk if value not in shared]
+        cache.remove_members(old_key, unshared)
+        moved += len(chunk)
+        released += len(unshared)
+    return {"list_id": list_id, "moved": moved, "released": released, "dropped_old_set": False}
@@ -1,10 +1,16 @@
 # app/utils/auth.py
 
+import time
+import uuid
 from fastapi import Depends, HTTPException, Header
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
 
+from app.utils.request_profiler import span
+from app.utils.token_cache import TokenRevokedError, claims_cache
+
 # Secret key and algorithm for JWT encoding/decoding
 SECRET_KEY = "fraudster"  # Change this to a secure random key
 ALGORITHM = "HS256"
@@ -32,14 +38,26 @@ def authenticate_user(username: str, password: str):
     user = fake_users_db.get(username)
     if not user:
         return False
-    if not verify_password(password, user["hashed_password"]):
+    with span("auth", "bcrypt"):
+        verified = verify_password(password, user["hashed_password"])
+    if not verified:
         return False
     return user
 
+def lookup_user(claims: dict):
+    """The gateway user named by the token's subject, without its password hash."""
+    user = fake_users_db.get(claims.get("sub"))
+    if not user:
+        return None
+    return {"username": user["username"], "role": user["role"]}
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
+    now = datetime.utcnow()
+    expire = now + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    # iat and jti let tokens be revoked per user or one by one; iat keeps sub-second precision so a
+    # token issued just after revoke_user, in the same second, is not caught by its cutoff
+    to_encode.update({"exp": expire, "iat": time.time(), "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -51,4 +69,27 @@ def decode_access_token(token: str):
             raise HTTPException(status_code=401, detail="Could not validate credentials")
         return payload
     except JWTError:
-        raise HTTPException(status_code=401, detail="Could not validate credentials")
\ No newline at end of file
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+def _credentials_error(detail="Could not validate credentials"):
+    return HTTPException(status_code=401, detail=detail, headers={"WWW-Authenticate": "Bearer"})
+
+async def authenticate_token(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)):
+    """
+    Gateway dependency: the user of a valid, unrevoked bearer token. Tokens seen before are
+    answered from the claims cache without verifying the signature again.
+    """
+    if credentials is None:
+        raise _credentials_error()
+    try:
+        with span("auth", "bearer token"):
+            user = await claims_cache.authenticate_async(
+                credentials.credentials, decode_access_token, lookup_user, scope="gateway")
+    except TokenRevokedError as e:
+        raise _credentials_error(str(e))
+    if user is None:
+        raise _credentials_error()
+    return user
@@ -0,0 +1,261 @@
+# app/utils/bloom_filter.py
+import hashlib
+import math
+import threading
+import time
+
+from app.config import settings
+from app.utils.redis_cache import AsyncRedisCache, RedisCache
+
+
+def optimal_parameters(capacity, error_rate):
+    """Return (bits, hash_count) for a filter holding `capacity` items at `error_rate` false positives."""
+    bits = math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+    hash_count = max(1, round(bits / capacity * math.log(2)))
+    return bits, hash_count
+
+
+class BloomFilter:
+    """
+    Per-list-type Bloom filter stored as a Redis bitmap, shared by every worker.
+
+    A filter only answers once it has been rebuilt from Postgres; until then (or if the
+    configured size changed since the last rebuild) `might_contain` returns None and the
+    caller falls through to the database. Deleted values are never cleared from the bitmap,
+    they only raise the false-positive rate until the next rebuild.
+    """
+
+    def __init__(self, redis_client=None, capacity=None, error_rate=None, enabled=None):
+        self._redis = redis_client
+        self.enabled = settings.BLOOM_FILTER_ENABLED if enabled is None else enabled
+        self.capacity = capacity or settings.BLOOM_CAPACITY
+        self.error_rate = error_rate or settings.BLOOM_ERROR_RATE
+        self.size, self.hash_count = optimal_parameters(self.capacity, self.error_rate)
+        self.signature = f"{self.size}:{self.hash_count}"
+
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.negatives = 0
+        self.false_positives = 0
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = RedisCache().redis
+        return self._redis
+
+    def _key(self, list_type):
+        return f"bloom:{list_type}"
+
+    def _ready_key(self, list_type):
+        return f"bloom:{list_type}:ready"
+
+    def _building_key(self, list_type):
+        return f"bloom:{list_type}:building"
+
+    def _next_key(self, list_type):
+        return f"bloom:{list_type}:next"
+
+    def positions(self, value):
+        """Bit offsets for value (Kirsch-Mitzenmacher double hashing over one blake2b digest)."""
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def might_contain(self, list_type, value):
+        """False if value is definitely absent, True if it may be present, None if the filter is not ready."""
+        return self.might_contain_many(list_type, [value])[0]
+
+    def might_contain_many(self, list_type, values):
+        """Answer `might_contain` for every value with one pipelined round trip."""
+        if not self.enabled or not values:
+            return [None] * len(values)
+        with self.redis.pipeline(transaction=False) as pipe:
+            self._queue_lookup(pipe, list_type, values)
+            replies = pipe.execute()
+        return self._read_lookup(values, replies)
+
+    def _queue_lookup(self, pipe, list_type, values):
+        key = self._key(list_type)
+        pipe.get(self._ready_key(list_type))
+        for value in values:
+            for offset in self.positions(value):
+                pipe.getbit(key, offset)
+
+    def _read_lookup(self, values, replies):
+        ready = replies[0]
+        if ready is None or (ready.decode() if isinstance(ready, bytes) else ready) != self.signature:
+            return [None] * len(values)
+
+        bits = replies[1:]
+        answers = []
+        for index in range(len(values)):
+            chunk = bits[index * self.hash_count:(index + 1) * self.hash_count]
+            answers.append(all(chunk))
+        with self._lock:
+            self.lookups += len(values)
+            self.negatives += answers.count(False)
+        return answers
+
+    def record_false_positive(self, count=1):
+        """Record lookups the filter let through but the database then reported absent."""
+        with self._lock:
+            self.false_positives += count
+
+    def add(self, list_type, values):
+        """Set the bits for values; also feeds a rebuild that is running concurrently."""
+        if not self.enabled:
+            return
+        offsets = self._offsets(values)
+        if not offsets:
+            return
+        with self.redis.pipeline(transaction=False) as pipe:
+            self._queue_add(pipe, list_type, offsets)
+            building = pipe.execute()[0]
+        if building:
+            self._set_bits(self._next_key(list_type), offsets)
+
+    def _offsets(self, values):
+        return [offset for value in values for offset in self.positions(value)]
+
+    def _queue_add(self, pipe, list_type, offsets):
+        pipe.exists(self._building_key(list_type))
+        for offset in offsets:
+            pipe.setbit(self._key(list_type), offset, 1)
+
+    def invalidate(self, list_type):
+        """Stop answering from this filter until it is rebuilt."""
+        self.redis.delete(self._ready_key(list_type))
+
+    def rebuild(self, list_type, values, batch_size=10000):
+        """
+        Rebuild the filter for list_type from an iterable of values (normally streamed from Postgres).
+        The new bitmap is built beside the live one and swapped in atomically.
+        """
+        started = time.monotonic()
+        next_key = self._next_key(list_type)
+        self.redis.delete(next_key)
+        self.redis.set(self._building_key(list_type), 1, ex=3600)
+        count, offsets = 0, []
+        try:
+            for value in values:
+                offsets.extend(self.positions(value))
+                count += 1
+                if count % batch_size == 0:
+                    self._set_bits(next_key, offsets)
+                    offsets = []
+            self._set_bits(next_key, offsets)
+            # Make sure the key exists even for an empty list so RENAME succeeds
+            self.redis.setbit(next_key, self.size - 1, 0)
+
+            with self.redis.pipeline(transaction=True) as pipe:
+                pipe.rename(next_key, self._key(list_type))
+                pipe.set(self._ready_key(list_type), self.signature)
+                pipe.delete(self._building_key(list_type))
+                pipe.execute()
+        except Exception:
+            self.redis.delete(self._building_key(list_type), next_key)
+            raise
+        return {"list_type": list_type, "items": count, "seconds": round(time.monotonic() - started, 3)}
+
+    def _set_bits(self, key, offsets):
+        if not offsets:
+            return
+        with self.redis.pipeline(transaction=False) as pipe:
+            for offset in offsets:
+                pipe.setbit(key, offset, 1)
+            pipe.execute()
+
+    def stats(self, list_type=None):
+        """Lookup counters for this worker plus, per list type, the expected false-positive rate from fill."""
+        stats = self._counter_stats()
+        if list_type is not None:
+            with self.redis.pipeline(transaction=False) as pipe:
+                pipe.get(self._ready_key(list_type))
+                pipe.bitcount(self._key(list_type))
+                ready, bits_set = pipe.execute()
+            stats.update(self._fill_stats(list_type, ready, bits_set))
+        return stats
+
+    def _counter_stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "capacity": self.capacity,
+                "target_error_rate": self.error_rate,
+                "size_bits": self.size,
+                "hash_count": self.hash_count,
+                "lookups": self.lookups,
+                "negatives": self.negatives,
+                "false_positives": self.false_positives,
+                # Share of truly absent values the filter failed to reject
+                "observed_false_positive_rate": (
+                    self.false_positives / (self.false_positives + self.negatives)
+                    if self.false_positives + self.negatives else 0.0
+                ),
+                "passed_to_database": self.lookups - self.negatives,
+            }
+
+    def _fill_stats(self, list_type, ready, bits_set):
+        fill_ratio = bits_set / self.size
+        return {
+            "list_type": list_type,
+            "ready": ready is not None,
+            "fill_ratio": fill_ratio,
+            "estimated_false_positive_rate": fill_ratio ** self.hash_count,
+        }
+
+
+class AsyncBloomFilter(BloomFilter):
+    """BloomFilter for the asyncio data path; lookups and adds await a redis.asyncio client."""
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = AsyncRedisCache().redis
+        return self._redis
+
+    async def might_contain(self, list_type, value):
+        return (await self.might_contain_many(list_type, [value]))[0]
+
+    async def might_contain_many(self, list_type, values):
+        if not self.enabled or not values:
+            return [None] * len(values)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            self._queue_lookup(pipe, list_type, values)
+            replies = await pipe.execute()
+        return self._read_lookup(values, replies)
+
+    async def add(self, list_type, values):
+        if not self.enabled:
+            return
+        offsets = self._offsets(values)
+        if not offsets:
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            self._queue_add(pipe, list_type, offsets)
+            building = (await pipe.execute())[0]
+        if building:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for offset in offsets:
+                    pipe.setbit(self._next_key(list_type), offset, 1)
+                await pipe.execute()
+
+    async def invalidate(self, list_type):
+        await self.redis.delete(self._ready_key(list_type))
+
+    async def stats(self, list_type=None):
+        stats = self._counter_stats()
+        if list_type is not None:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.get(self._ready_key(list_type))
+                pipe.bitcount(self._key(list_type))
+                ready, bits_set = await pipe.execute()
+            stats.update(self._fill_stats(list_type, ready, bits_set))
+        return stats
+
+
+# Process-wide filter clients shared by every list service in this worker
+bloom_filter = BloomFilter()
+async_bloom_filter = AsyncBloomFilter()
@@ -0,0 +1,89 @@
+# app/utils/cache_migration.py
+"""Convert legacy per-value "{list_type}:{value}" string keys into one Redis SET per list type."""
+import time
+from collections import Counter
+
+from app.utils.list_digest import digest_key
+from app.utils.redis_cache import list_set_key
+
+LEGACY_MARKER = b"cached"
+
+# Keys written by other features that happen to contain a colon
+RESERVED_PREFIXES = (b"list_members:", b"bloom:", b"list_cache:", b"cache:", b"import:", b"fastapi-limiter:",
+                     b"celery-task-meta-", b"reconcile:", b"auth:", b"ratelimit:", b"metrics:",
+                     b"list_deleted:", b"writebehind:")
+
+
+def _used_memory(client):
+    return client.info("memory")["used_memory"]
+
+
+def migrate_string_keys_to_sets(client, batch_size=1000, dry_run=False, keep_legacy=False):
+    """
+    SCAN for legacy cache keys, SADD their values into the per-type sets and UNLINK the
+    originals. Returns a report including Redis memory before and after.
+    """
+    started = time.monotonic()
+    memory_before = _used_memory(client)
+    scanned, migrated = 0, Counter()
+
+    batch = []
+    for key in client.scan_iter(match="*:*", count=batch_size):
+        scanned += 1
+        if not key.startswith(RESERVED_PREFIXES):
+            batch.append(key)
+        if len(batch) >= batch_size:
+            migrated.update(_migrate_batch(client, batch, dry_run, keep_legacy))
+            batch = []
+    migrated.update(_migrate_batch(client, batch, dry_run, keep_legacy))
+
+    memory_after = _used_memory(client)
+    return {
+        "dry_run": dry_run,
+        "keys_scanned": scanned,
+        "keys_migrated": sum(migrated.values()),
+        "per_list_type": dict(migrated),
+        "memory_before_bytes": memory_before,
+        "memory_after_bytes": memory_after,
+        "memory_saved_bytes": memory_before - memory_after,
+        "seconds": round(time.monotonic() - started, 3),
+    }
+
+
+def _migrate_batch(client, keys, dry_run, keep_legacy):
+    if not keys:
+        return Counter()
+
+    with client.pipeline(transaction=False) as pipe:
+        for key in keys:
+            pipe.type(key)
+        types = pipe.execute()
+    string_keys = [key for key, key_type in zip(keys, types) if key_type == b"string"]
+
+    with client.pipeline(transaction=False) as pipe:
+        for key in string_keys:
+            pipe.get(key)
+        values = pipe.execute()
+
+    members = {}
+    legacy_keys = []
+    for key, stored in zip(string_keys, values):
+        if stored != LEGACY_MARKER:
+            continue
+        list_type, value = key.decode().split(":", 1)
+        members.setdefault(list_type, []).append(value)
+        legacy_keys.append(key)
+
+    counts = Counter({list_type: len(values) for list_type, values in members.items()})
+    if dry_run or not legacy_keys:
+        return counts
+
+    with client.pipeline(transaction=True) as pipe:
+        for list_type, values in members.items():
+            pipe.sadd(list_set_key(list_type), *values)
+            # Written around the digest scripts, so let the reconciler rebuild the digest
+            pipe.delete(digest_key(list_set_key(list_type)))
+        if not keep_legacy:
+            pipe.unlink(*legacy_keys)
+        pipe.execute()
+    return counts
@@ -0,0 +1,156 @@
+# app/utils/cache_reconciler.py
+import logging
+import time
+
+from app.config import settings
+from app.database import Database
+from app.utils.iterables import chunked
+from app.utils.list_digest import (
+    SCAN_BUCKETS_SCRIPT, SUFFIX_BYTES, VALID_FIELD, compute_digests, digest_key, digest_mapping, parse_digest_hash,
+)
+from app.utils.local_cache import publish_invalidation
+from app.utils.redis_cache import RedisCache, list_set_key
+
+logger = logging.getLogger(__name__)
+
+# Result of the latest run per list type, and counters summed over all runs
+LAST_RUN_KEY = "reconcile:last:{list_type}"
+TOTALS_KEY = "reconcile:totals"
+
+_TOTAL_FIELDS = ("runs", "buckets_mismatched", "missing_in_redis", "extra_in_redis", "added", "removed",
+                 "digest_rebuilds")
+
+
+class CacheReconciler:
+    """
+    Finds and repairs drift between a list type's Redis set and its active rows in Postgres.
+
+    Both sides are reduced to per-bucket digests (see app.utils.list_digest): Redis keeps its
+    digests up to date as members are added and removed, Postgres computes its own in one
+    GROUP BY. Only buckets whose digests differ are fetched from both sides and diffed.
+    Differences are re-checked after `settle` seconds so writes still in the write-behind
+    buffer are not mistaken for drift.
+    """
+
+    def __init__(self, db: Database = None, redis_client: RedisCache = None, suffix_bytes=None,
+                 scan_count=None, settle=None):
+        self.db = db or Database()
+        self.cache = redis_client or RedisCache()
+        self.suffix_bytes = suffix_bytes or SUFFIX_BYTES
+        self.scan_count = scan_count or settings.RECONCILE_SCAN_COUNT
+        self.settle = settings.RECONCILE_SETTLE_SECONDS if settle is None else settle
+        self._scan_script = self.redis.register_script(SCAN_BUCKETS_SCRIPT)
+
+    @property
+    def redis(self):
+        return self.cache.redis
+
+    def run(self, list_types=None, repair=True):
+        """Reconcile the given list types (all active types by default); returns one report per type."""
+        return [self.reconcile(list_type, repair=repair) for list_type in list_types or self.db.get_list_types()]
+
+    def reconcile(self, list_type, repair=True):
+        started = time.monotonic()
+        set_key = list_set_key(list_type)
+        report = {"list_type": list_type, "digest_rebuilds": 0, "missing_in_redis": 0, "extra_in_redis": 0,
+                  "added": 0, "removed": 0}
+
+        redis_digests, valid = parse_digest_hash(self.redis.hgetall(digest_key(set_key)))
+        if not valid:
+            redis_digests = self.rebuild_digest(set_key)
+            report["digest_rebuilds"] = 1
+        pg_digests = self.db.bucket_digests(list_type, self.suffix_bytes)
+
+        mismatched = sorted(bucket for bucket in set(redis_digests) | set(pg_digests)
+                            if redis_digests.get(bucket) != pg_digests.get(bucket))
+        report["buckets"] = len(set(redis_digests) | set(pg_digests))
+        report["buckets_mismatched"] = len(mismatched)
+
+        if mismatched:
+            in_redis = self.members_in_buckets(set_key, mismatched)
+            in_pg = self.db.values_in_buckets(list_type, mismatched, self.suffix_bytes)
+            missing, extra = in_pg - in_redis, in_redis - in_pg
+            report["missing_in_redis"], report["extra_in_redis"] = len(missing), len(extra)
+            if repair and (missing or extra):
+                added, removed = self._repair(list_type, set_key, missing, extra)
+                report["added"], report["removed"] = len(added), len(removed)
+                in_redis = (in_redis - removed) | added
+            if repair:
+                # Members may have been right all along with only the digest off
+                self._write_bucket_digests(set_key, mismatched, in_redis)
+
+        report["seconds"] = round(time.monotonic() - started, 3)
+        self._record(report)
+        if report["missing_in_redis"] or report["extra_in_redis"]:
+            logger.warning(f"Cache drift for {list_type}: {report['missing_in_redis']} missing from Redis, "
+                           f"{report['extra_in_redis']} not in PostgreSQL, {report['buckets_mismatched']} buckets")
+        return report
+
+    def members_in_buckets(self, set_key, buckets):
+        """Members of the Redis set in the given buckets; only those members cross the network."""
+        members, cursor = set(), 0
+        while True:
+            cursor, found = self._scan_script(
+                keys=[set_key], args=[cursor, self.scan_count, self.suffix_bytes, *buckets])
+            members.update(member.decode() if isinstance(member, bytes) else member for member in found)
+            cursor = int(cursor)
+            if cursor == 0:
+                return members
+
+    def rebuild_digest(self, set_key):
+        """Recompute the digest of a set whose incremental digest cannot be trusted (full SSCAN)."""
+        digests = compute_digests(self.redis.sscan_iter(set_key, count=self.scan_count), self.suffix_bytes)
+        with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(digest_key(set_key))
+            pipe.hset(digest_key(set_key), mapping={VALID_FIELD: 1, **digest_mapping(digests)})
+            pipe.execute()
+        return digests
+
+    def _repair(self, list_type, set_key, missing, extra, chunk_size=5000):
+        """Apply the differences that are still there after the settle delay."""
+        if self.settle:
+            time.sleep(self.settle)
+        added, removed = set(), set()
+        for chunk in chunked(sorted(missing) + sorted(extra), chunk_size):
+            still_in_pg = self.db.check_values_in_list(list_type, chunk)
+            redis_hits = dict(zip(chunk, self.cache.smismember(set_key, chunk)))
+            add = [value for value in chunk if value in missing and value in still_in_pg and not redis_hits[value]]
+            remove = [value for value in chunk if value in extra and value not in still_in_pg and redis_hits[value]]
+            self.cache.add_members(set_key, add)
+            self.cache.remove_members(set_key, remove)
+            publish_invalidation(f"{list_type}:{value}" for value in add + remove)
+            added.update(add)
+            removed.update(remove)
+        return added, removed
+
+    def _write_bucket_digests(self, set_key, buckets, members):
+        digests = compute_digests(members, self.suffix_bytes)
+        mapping = digest_mapping({bucket: digests.get(bucket, (0, 0, 0)) for bucket in buckets})
+        self.redis.hset(digest_key(set_key), mapping=mapping)
+
+    def _record(self, report):
+        with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hset(LAST_RUN_KEY.format(list_type=report["list_type"]),
+                      mapping={**report, "finished_at": time.time()})
+            pipe.hincrby(TOTALS_KEY, "runs", 1)
+            for field in _TOTAL_FIELDS[1:]:
+                if report.get(field):
+                    pipe.hincrby(TOTALS_KEY, field, report[field])
+            pipe.execute()
+
+
+def read_stats(client, list_types=()):
+    """Counters summed over all runs plus the latest report for each given list type."""
+    def decode(raw):
+        return {key.decode() if isinstance(key, bytes) else key: value.decode() if isinstance(value, bytes) else value
+                for key, value in raw.items()}
+
+    with client.pipeline(transaction=False) as pipe:
+        pipe.hgetall(TOTALS_KEY)
+        for list_type in list_types:
+            pipe.hgetall(LAST_RUN_KEY.format(list_type=list_type))
+        totals, *last = pipe.execute()
+    return {
+        "totals": {field: int(value) for field, value in decode(totals).items()},
+        "last_runs": {list_type: decode(raw) for list_type, raw in zip(list_types, last) if raw},
+    }
@@ -0,0 +1,243 @@
+# app/utils/cache_rehydration.py
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+
+from app.config import settings
+from app.database import Database
+from app.utils.bloom_filter import bloom_filter as default_bloom_filter
+from app.utils.iterables import chunked
+from app.utils.list_digest import VALID_FIELD, digest_key
+from app.utils.redis_cache import RedisCache, list_set_key
+
+logger = logging.getLogger(__name__)
+
+# Progress of the current or last rehydration run
+STATUS_KEY = "cache:rehydration"
+# Held by the worker running a rehydration so only one runs at a time
+LOCK_KEY = "cache:rehydration:lock"
+# Written when a rehydration completes; its absence means Redis was flushed or lost
+WARM_KEY = "cache:warm"
+
+
+class CacheWarmingError(Exception):
+    pass
+
+
+class CacheRehydrator:
+    """
+    Reloads the per-list-type Redis sets and Bloom filters from the active rows in Postgres.
+    Each type is streamed once through a server-side cursor; every batch is SADDed over one
+    pipeline and fed to the Bloom filter rebuild. Progress is kept in the STATUS_KEY hash.
+    """
+
+    def __init__(self, db: Database = None, redis_client: RedisCache = None, bloom_filter=None, batch_size=None):
+        self.db = db or Database()
+        self.cache = redis_client or RedisCache()
+        self.bloom_filter = bloom_filter or default_bloom_filter
+        self.batch_size = batch_size or settings.REHYDRATE_BATCH_SIZE
+
+    @property
+    def redis(self):
+        return self.cache.redis
+
+    def run(self, list_types=None, progress=None):
+        """
+        Rehydrate the given list types (all active types by default). Returns the final status,
+        or {"status": "already_running"} if another worker holds the lock.
+        `progress` is called with the status dict after every batch.
+        """
+        token = uuid.uuid4().hex
+        if not self.redis.set(LOCK_KEY, token, nx=True, ex=settings.REHYDRATE_LOCK_TTL):
+            return {"status": "already_running"}
+
+        started = time.monotonic()
+        list_types = list_types or self.db.get_list_types()
+        status = {"status": "running", "started_at": time.time(), "types_total": len(list_types),
+                  "types_done": 0, "items": 0, "items_per_second": 0.0, "current_type": ""}
+        try:
+            self.redis.delete(STATUS_KEY)
+            self._save(status)
+            for list_type in list_types:
+                status["current_type"] = list_type
+                self._reset_digest_if_empty(list_type)
+                values = self._stream(list_type, status, started, progress)
+                if self.bloom_filter.enabled:
+                    self.bloom_filter.rebuild(list_type, values, batch_size=self.batch_size)
+                else:
+                    for _ in values:
+                        pass
+                status["types_done"] += 1
+                self._save(status)
+
+            status.update(status="completed", current_type="", finished_at=time.time(),
+                          seconds=round(time.monotonic() - started, 3))
+            with self.redis.pipeline(transaction=True) as pipe:
+                pipe.set(WARM_KEY, status["finished_at"])
+                pipe.hset(STATUS_KEY, mapping=status)
+                pipe.execute()
+            logger.info(f"Cache rehydrated: {status['items']} items in {status['seconds']}s")
+            return status
+        except Exception as e:
+            status.update(status="failed", error=str(e), finished_at=time.time())
+            self._save(status)
+            logger.error(f"Cache rehydration failed: {e}")
+            raise
+        finally:
+            if self.redis.get(LOCK_KEY) == token.encode():
+                self.redis.delete(LOCK_KEY)
+
+    def _stream(self, list_type, status, started, progress):
+        """Yield the active values of list_type, SADDing each batch into its Redis set on the way."""
+        key = list_set_key(list_type)
+        for batch in chunked(self.db.iter_list_values(list_type, self.batch_size), self.batch_size):
+            self.cache.add_members(key, batch)
+            status["items"] += len(batch)
+            status["items_per_second"] = round(status["items"] / max(time.monotonic() - started, 1e-6), 1)
+            self._save(status)
+            self.redis.expire(LOCK_KEY, settings.REHYDRATE_LOCK_TTL)
+            if progress is not None:
+                progress(dict(status))
+            yield from batch
+
+    def _reset_digest_if_empty(self, list_type):
+        """An empty set has a known digest, so the reconciler need not rebuild it by scanning afterwards."""
+        key = list_set_key(list_type)
+        if not self.cache.count_members(key):
+            with self.redis.pipeline(transaction=True) as pipe:
+                pipe.delete(digest_key(key))
+                pipe.hset(digest_key(key), VALID_FIELD, 1)
+                pipe.execute()
+
+    def _save(self, status):
+        self.redis.hset(STATUS_KEY, mapping=status)
+
+    def status(self):
+        return read_status(self.redis)
+
+
+def read_status(client):
+    """The STATUS_KEY hash decoded, plus whether the cache is warm and a run actually holds the lock."""
+    with client.pipeline(transaction=False) as pipe:
+        pipe.hgetall(STATUS_KEY)
+        pipe.exists(WARM_KEY)
+        pipe.exists(LOCK_KEY)
+        raw, warm, locked = pipe.execute()
+    status = {_decode(key): _decode(value) for key, value in raw.items()}
+    if status.get("status") == "running" and not locked:
+        # The worker died mid-run; its lock expired but the status was never updated
+        status["status"] = "abandoned"
+    status["warm"] = bool(warm)
+    return status
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class RehydrationGuard:
+    """
+    Watches for a cold or rehydrating cache and, while it is, caps how many cache misses
+    may fall through to Postgres at once. Callers that cannot get a slot within `wait`
+    seconds get CacheWarmingError instead of joining the stampede. When `on_cold` is set,
+    it is called (at most once per retry interval) to start a rehydration after Redis loss.
+    """
+
+    def __init__(self, redis_client=None, interval=None, db_concurrency=None, wait=None, auto=None):
+        self._redis = redis_client
+        self.interval = interval or settings.REHYDRATE_CHECK_INTERVAL
+        self.db_concurrency = db_concurrency or settings.REHYDRATE_DB_CONCURRENCY
+        self.wait = settings.REHYDRATE_DB_WAIT if wait is None else wait
+        self.auto = settings.REHYDRATE_AUTO if auto is None else auto
+        self.active = False
+        self.rejected = 0
+        self._slots = threading.BoundedSemaphore(self.db_concurrency)
+        self._async_slots = None
+        self._on_cold = None
+        self._last_trigger = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = RedisCache().redis
+        return self._redis
+
+    def start(self, on_cold=None):
+        """Poll the cache state on a background thread."""
+        if self._thread is not None:
+            return
+        self._on_cold = on_cold
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="rehydration-guard", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.interval)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                logger.warning(f"Could not read cache rehydration state: {e}")
+            self._stop.wait(self.interval)
+
+    def poll(self):
+        """Refresh `active` from Redis and trigger a rehydration if the cache went cold."""
+        status = read_status(self.redis)
+        running = status.get("status") == "running"
+        cold = not status["warm"]
+        self.active = running or (cold and self.auto)
+        if cold and not running and self.auto and self._on_cold is not None:
+            now = time.monotonic()
+            if now - self._last_trigger >= settings.REHYDRATE_RETRY_INTERVAL:
+                self._last_trigger = now
+                logger.warning("Redis cache is cold, starting rehydration")
+                self._on_cold()
+
+    @contextmanager
+    def db_slot(self):
+        """Hold one of the limited Postgres fallthrough slots while the cache is warming."""
+        if not self.active:
+            yield
+            return
+        if not self._slots.acquire(timeout=self.wait):
+            self.rejected += 1
+            raise CacheWarmingError("Cache is warming up, please retry shortly.")
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+    @asynccontextmanager
+    async def async_db_slot(self):
+        """Asyncio counterpart of db_slot."""
+        if not self.active:
+            yield
+            return
+        if self._async_slots is None:
+            self._async_slots = asyncio.Semaphore(self.db_concurrency)
+        try:
+            await asyncio.wait_for(self._async_slots.acquire(), self.wait)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise CacheWarmingError("Cache is warming up, please retry shortly.")
+        try:
+            yield
+        finally:
+            self._async_slots.release()
+
+    def stats(self):
+        return {"active": self.active, "db_concurrency": self.db_concurrency, "rejected": self.rejected}
+
+
+# Process-wide guard shared by every list service in this worker
+rehydration_guard = RehydrationGuard()
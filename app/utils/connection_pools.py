@@ -0,0 +1,227 @@
+# app/utils/connection_pools.py
+"""
+Process-wide connection pools that record how long callers wait for a connection.
+
+The SQLAlchemy pool classes are passed to create_engine as `poolclass`; the Redis pools are
+built once per process by redis_pool() / async_redis_pool() and shared by every client.
+"""
+import os
+import threading
+import time
+
+import redis
+import redis.asyncio as aioredis
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.config import settings
+
+
+class WaitStats:
+    """Acquisition counters of one pool: how many, how long they waited, how many failed."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.failed = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, wait, ok=True):
+        with self._lock:
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            if not ok:
+                self.failed += 1
+                return
+            self.acquired += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def released(self):
+        with self._lock:
+            self.in_use = max(self.in_use - 1, 0)
+
+    def snapshot(self):
+        with self._lock:
+            attempts = self.acquired + self.failed
+            return {
+                "acquired": self.acquired,
+                "failed": self.failed,
+                "peak_in_use": self.peak_in_use,
+                "wait_avg_ms": round(1000 * self.wait_total / attempts, 3) if attempts else 0.0,
+                "wait_max_ms": round(1000 * self.wait_max, 3),
+            }
+
+
+class _TimedQueuePoolMixin:
+    """Times QueuePool checkouts; the time includes opening a new connection when the pool grows."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = WaitStats()
+
+    def _do_get(self):
+        started = time.monotonic()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            self.wait_stats.record(time.monotonic() - started, ok=False)
+            raise
+        self.wait_stats.record(time.monotonic() - started)
+        return connection
+
+    def _do_return_conn(self, record):
+        self.wait_stats.released()
+        super()._do_return_conn(record)
+
+    def stats(self):
+        capacity = self.size() + max(self._max_overflow, 0)
+        checked_out = self.checkedout()
+        return {
+            "size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_out": checked_out,
+            "checked_in": self.checkedin(),
+            "overflow": self.overflow(),
+            "utilization": round(checked_out / capacity, 3) if capacity else 0.0,
+            **self.wait_stats.snapshot(),
+        }
+
+
+class TimedQueuePool(_TimedQueuePoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedQueuePoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options():
+    """Pool keyword arguments shared by the sync and async engines."""
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+class TimedBlockingConnectionPool(redis.BlockingConnectionPool):
+    """BlockingConnectionPool that records wait time and connections in use."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = WaitStats()
+
+    def get_connection(self, *args, **kwargs):
+        started = time.monotonic()
+        try:
+            connection = super().get_connection(*args, **kwargs)
+        except Exception:
+            self.wait_stats.record(time.monotonic() - started, ok=False)
+            raise
+        self.wait_stats.record(time.monotonic() - started)
+        return connection
+
+    def release(self, connection):
+        self.wait_stats.released()
+        super().release(connection)
+
+    def stats(self):
+        return _redis_pool_stats(self)
+
+
+class AsyncTimedBlockingConnectionPool(aioredis.BlockingConnectionPool):
+    """asyncio counterpart of TimedBlockingConnectionPool."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = WaitStats()
+
+    async def get_connection(self, *args, **kwargs):
+        started = time.monotonic()
+        try:
+            connection = await super().get_connection(*args, **kwargs)
+        except Exception:
+            self.wait_stats.record(time.monotonic() - started, ok=False)
+            raise
+        self.wait_stats.record(time.monotonic() - started)
+        return connection
+
+    async def release(self, connection):
+        self.wait_stats.released()
+        await super().release(connection)
+
+    def stats(self):
+        return _redis_pool_stats(self)
+
+
+def _redis_pool_stats(pool):
+    in_use = pool.wait_stats.in_use
+    return {
+        "max_connections": pool.max_connections,
+        "in_use": in_use,
+        "utilization": round(in_use / pool.max_connections, 3),
+        **pool.wait_stats.snapshot(),
+    }
+
+
+def _redis_options():
+    return {
+        "host": os.getenv('REDIS_HOST', 'localhost'),
+        "port": int(os.getenv('REDIS_PORT', 6379)),
+        "db": 0,
+        "max_connections": settings.REDIS_MAX_CONNECTIONS,
+        "timeout": settings.REDIS_POOL_TIMEOUT,
+        "socket_timeout": settings.REDIS_SOCKET_TIMEOUT,
+        "health_check_interval": settings.REDIS_HEALTH_CHECK_INTERVAL,
+    }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _shared(name, factory):
+    pool = _pools.get(name)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(name)
+            if pool is None:
+                pool = _pools[name] = factory(**_redis_options())
+    return pool
+
+
+def redis_pool():
+    """The process-wide Redis pool for blocking clients (redis-py resets it in forked children)."""
+    return _shared("sync", TimedBlockingConnectionPool)
+
+
+def async_redis_pool():
+    """The process-wide Redis pool for redis.asyncio clients, used from the API event loop."""
+    return _shared("async", AsyncTimedBlockingConnectionPool)
+
+
+def use_redis_pools(sync_pool, async_pool):
+    """Install pools built elsewhere (e.g. the benchmarks' in-memory stand-in); call before any client is created."""
+    with _pools_lock:
+        _pools["sync"] = sync_pool
+        _pools["async"] = async_pool
+
+
+def redis_pool_stats():
+    return {name: pool.stats() for name, pool in _pools.items()}
+
+
+async def close_redis_pools():
+    with _pools_lock:
+        pools = dict(_pools)
+        _pools.clear()
+    for name, pool in pools.items():
+        if name == "async":
+            await pool.disconnect()
+        else:
+            pool.disconnect()
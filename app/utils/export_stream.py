@@ -0,0 +1,69 @@
+# app/utils/export_stream.py
+import csv
+import io
+import json
+import zlib
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+COLUMNS = ("value", "comment", "created_by")
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(COLUMNS, row)), separators=(",", ":")) + "\n"
+
+
+def csv_lines(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(COLUMNS)
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def encode_blocks(lines, block_size=65536):
+    """Join text lines into byte blocks of roughly block_size so each chunk written is worth sending."""
+    block, size = [], 0
+    for line in lines:
+        data = line.encode()
+        block.append(data)
+        size += len(data)
+        if size >= block_size:
+            yield b"".join(block)
+            block, size = [], 0
+    if block:
+        yield b"".join(block)
+
+
+def gzip_blocks(blocks, level=6):
+    """Gzip a stream of byte blocks incrementally (one gzip member, no buffering of the whole body)."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for block in blocks:
+        data = compressor.compress(block)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_body(rows, fmt, gzip=False, block_size=65536):
+    """Byte chunks for a list export in the given format, optionally gzip-compressed."""
+    lines = ndjson_lines(rows) if fmt == "ndjson" else csv_lines(rows)
+    blocks = encode_blocks(lines, block_size)
+    return gzip_blocks(blocks) if gzip else blocks
+
+
+def accepts_gzip(accept_encoding):
+    """True if an Accept-Encoding header allows gzip (q=0 opts out)."""
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip().lower() in ("gzip", "*"):
+            return params.replace(" ", "").lower() not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
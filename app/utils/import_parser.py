@@ -0,0 +1,84 @@
+# app/utils/import_parser.py
+import codecs
+import csv
+import json
+
+FORMATS = ("csv", "ndjson")
+
+
+class ImportFormatError(Exception):
+    pass
+
+
+def detect_format(content_type, default="csv"):
+    """Pick an import format from a Content-Type header."""
+    content_type = (content_type or "").lower()
+    if "ndjson" in content_type or "jsonl" in content_type or "json" in content_type:
+        return "ndjson"
+    if "csv" in content_type or "text/plain" in content_type:
+        return "csv"
+    return default
+
+
+async def aiter_lines(chunks, max_line_length=65536, encoding="utf-8"):
+    """
+    Split an async stream of byte chunks into text lines without buffering more than one line.
+    Raises ImportFormatError if a line grows past max_line_length.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="strict")
+    pending = ""
+    async for chunk in chunks:
+        try:
+            pending += decoder.decode(chunk)
+        except UnicodeDecodeError as e:
+            raise ImportFormatError(f"Body is not valid {encoding}: {e}")
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+        if len(pending) > max_line_length:
+            raise ImportFormatError(f"Line exceeds the maximum length of {max_line_length} characters.")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+def parse_csv_line(line):
+    """First column of a CSV row; quoted fields may not span lines."""
+    row = next(csv.reader([line]), [])
+    return row[0].strip() if row else ""
+
+
+def parse_ndjson_line(line):
+    """A JSON string, or an object with a "value" field."""
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        raise ImportFormatError(f"Invalid JSON: {e}")
+    if isinstance(record, dict):
+        record = record.get("value")
+    if not isinstance(record, str):
+        raise ImportFormatError('Each line must be a JSON string or an object with a string "value".')
+    return record
+
+
+async def aiter_values(lines, fmt):
+    """
+    Yield (line_number, value, error) for each non-blank line; a leading CSV "value" header is skipped.
+    Exactly one of value and error is set.
+    """
+    if fmt not in FORMATS:
+        raise ImportFormatError(f"Unsupported import format '{fmt}'. Use one of: {', '.join(FORMATS)}.")
+    parse = parse_csv_line if fmt == "csv" else parse_ndjson_line
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            value = parse(line)
+        except (ImportFormatError, csv.Error) as e:
+            yield line_number, None, str(e)
+            continue
+        if fmt == "csv" and line_number == 1 and value.lower() == "value":
+            continue
+        yield line_number, value, None
@@ -0,0 +1,92 @@
+# app/utils/import_progress.py
+import json
+import time
+
+from app.config import settings
+from app.utils.redis_cache import RedisCache
+
+_COUNTERS = ("lines", "accepted", "rejected", "batches_queued", "batches_done",
+             "batches_failed", "inserted", "duplicates")
+
+
+class ImportProgress:
+    """
+    Progress of one streaming import, kept in a Redis hash so any API worker can answer polls and
+    Celery workers can report finished batches. A capped list keeps a sample of rejected lines.
+    """
+
+    def __init__(self, import_id, redis_client=None, ttl=None, max_errors=None):
+        self.import_id = import_id
+        self.redis = redis_client or RedisCache().redis
+        self.ttl = ttl or settings.IMPORT_PROGRESS_TTL
+        self.max_errors = max_errors or settings.IMPORT_MAX_ERRORS
+        self.key = f"import:{import_id}"
+        self.errors_key = f"import:{import_id}:errors"
+
+    def start(self, list_id, fmt, author):
+        """Claim the import id for author; False if an import with this id already exists."""
+        with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hsetnx(self.key, "author", author)
+            pipe.expire(self.key, self.ttl)
+            claimed, _ = pipe.execute()
+        if not claimed:
+            return False
+        with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(self.errors_key)
+            pipe.hset(self.key, mapping={
+                "status": "receiving", "list_id": list_id, "format": fmt,
+                "started_at": time.time(), **{counter: 0 for counter in _COUNTERS},
+            })
+            pipe.execute()
+        return True
+
+    def record(self, lines=0, accepted=0, rejected=0, batches_queued=0, errors=()):
+        """Add counts for the part of the body parsed since the last call."""
+        with self.redis.pipeline(transaction=False) as pipe:
+            for field, amount in (("lines", lines), ("accepted", accepted),
+                                  ("rejected", rejected), ("batches_queued", batches_queued)):
+                if amount:
+                    pipe.hincrby(self.key, field, amount)
+            if errors:
+                pipe.rpush(self.errors_key, *[json.dumps(error) for error in errors])
+                pipe.ltrim(self.errors_key, 0, self.max_errors - 1)
+                pipe.expire(self.errors_key, self.ttl)
+            pipe.execute()
+
+    def batch_finished(self, inserted=0, duplicates=0, failed=False):
+        """Called by bulk_add_task once a batch has been written."""
+        with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hincrby(self.key, "batches_failed" if failed else "batches_done", 1)
+            pipe.hincrby(self.key, "inserted", inserted)
+            pipe.hincrby(self.key, "duplicates", duplicates)
+            pipe.execute()
+
+    def finish(self, status="queued", error=None):
+        mapping = {"status": status, "received_at": time.time()}
+        if error:
+            mapping["error"] = error
+        self.redis.hset(self.key, mapping=mapping)
+
+    def get(self, author=None):
+        """Current progress, or None for an unknown or expired import, or one `author` did not start."""
+        with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hgetall(self.key)
+            pipe.lrange(self.errors_key, 0, -1)
+            raw, errors = pipe.execute()
+        if not raw:
+            return None
+        progress = {_decode(key): _decode(value) for key, value in raw.items()}
+        if author is not None and progress.get("author") != author:
+            return None
+        for counter in _COUNTERS:
+            progress[counter] = int(progress.get(counter, 0))
+        settled = progress["batches_done"] + progress["batches_failed"]
+        if progress["status"] == "queued" and settled >= progress["batches_queued"]:
+            progress["status"] = "completed_with_errors" if progress["batches_failed"] else "completed"
+        progress["import_id"] = self.import_id
+        progress["errors"] = [json.loads(_decode(error)) for error in errors]
+        return progress
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
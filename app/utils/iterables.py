@@ -0,0 +1,12 @@
+# app/utils/iterables.py
+from itertools import islice
+
+
+def chunked(iterable, size):
+    """Yield lists of at most `size` items without materializing the whole iterable."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from app.db_setup import get_db
 from app.models import User
 from app.utils.auth import decode_access_token
+from app.utils.token_cache import TokenRevokedError, claims_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
@@ -13,9 +14,19 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    payload = decode_access_token(token)
-    username: str = payload.get("sub")
-    user = db.query(User).filter(User.username == username).first()
+
+    def load_user(payload):
+        user = db.query(User).filter(User.username == payload.get("sub")).first()
+        if user is not None:
+            # Cached past this request's session
+            db.expunge(user)
+        return user
+
+    try:
+        # The User row is only queried the first time a token is seen
+        user = claims_cache.authenticate(token, decode_access_token, load_user, scope="users")
+    except TokenRevokedError:
+        raise credentials_exception
     if user is None:
         raise credentials_exception
     return user
\ No newline at end of file
@@ -0,0 +1,196 @@
+# app/utils/list_digest.py
+"""
+Per-bucket digests of a list type's members, computed identically in Python, Lua and SQL.
+
+A member's bucket is the hex of the last SUFFIX_BYTES bytes of its UTF-8 encoding, so Redis can
+pick out a bucket's members server-side without hashing. Within a bucket the digest is
+(count, sum of h1, sum of h2), where h1/h2 are 31-bit slices of md5(value). Sums are order
+independent and can be updated one member at a time with HINCRBY.
+"""
+import hashlib
+
+from app.config import settings
+
+SUFFIX_BYTES = settings.RECONCILE_SUFFIX_BYTES
+
+# Added to the Redis digest hash by a full rebuild; without it the increments are not trusted
+VALID_FIELD = "valid"
+
+# SADD/SREM members and, for those that actually changed, adjust their bucket's digest.
+# ARGV holds (member, bucket, h1, h2) quadruples.
+ADD_SCRIPT = """
+local changed = 0
+for i = 1, #ARGV, 4 do
+    if redis.call('SADD', KEYS[1], ARGV[i]) == 1 then
+        redis.call('HINCRBY', KEYS[2], ARGV[i + 1] .. ':n', 1)
+        redis.call('HINCRBY', KEYS[2], ARGV[i + 1] .. ':a', ARGV[i + 2])
+        redis.call('HINCRBY', KEYS[2], ARGV[i + 1] .. ':b', ARGV[i + 3])
+        changed = changed + 1
+    end
+end
+return changed
+"""
+
+REMOVE_SCRIPT = """
+local changed = 0
+for i = 1, #ARGV, 4 do
+    if redis.call('SREM', KEYS[1], ARGV[i]) == 1 then
+        redis.call('HINCRBY', KEYS[2], ARGV[i + 1] .. ':n', -1)
+        redis.call('HINCRBY', KEYS[2], ARGV[i + 1] .. ':a', -ARGV[i + 2])
+        redis.call('HINCRBY', KEYS[2], ARGV[i + 1] .. ':b', -ARGV[i + 3])
+        changed = changed + 1
+    end
+end
+return changed
+"""
+
+# Atomic edit of one member: move ARGV[1] to ARGV[5] unless ARGV[5] is already a member. KEYS[3] is the
+# old member's tombstone (see DELETE_SCRIPT): a rename removes the old member for good, so it claims the
+# tombstone exactly like a delete. ARGV: old (member, bucket, h1, h2), new (member, bucket, h1, h2),
+# tombstone ttl. Returns 'renamed', 'exists', 'claimed' (old not cached; the caller must check Postgres
+# and then add the new member) or 'gone' (old was deleted or renamed by someone else moments ago).
+RENAME_SCRIPT = """
+if redis.call('SISMEMBER', KEYS[1], ARGV[5]) == 1 then
+    return 'exists'
+end
+if redis.call('SREM', KEYS[1], ARGV[1]) == 0 then
+    if redis.call('SET', KEYS[3], 1, 'NX', 'EX', ARGV[9]) then
+        return 'claimed'
+    end
+    return 'gone'
+end
+redis.call('HINCRBY', KEYS[2], ARGV[2] .. ':n', -1)
+redis.call('HINCRBY', KEYS[2], ARGV[2] .. ':a', -ARGV[3])
+redis.call('HINCRBY', KEYS[2], ARGV[2] .. ':b', -ARGV[4])
+redis.call('SET', KEYS[3], 1, 'EX', ARGV[9])
+redis.call('SADD', KEYS[1], ARGV[5])
+redis.call('HINCRBY', KEYS[2], ARGV[6] .. ':n', 1)
+redis.call('HINCRBY', KEYS[2], ARGV[6] .. ':a', ARGV[7])
+redis.call('HINCRBY', KEYS[2], ARGV[6] .. ':b', ARGV[8])
+return 'renamed'
+"""
+
+# Atomic delete of one member. KEYS[3] is the member's tombstone, left for ARGV[5] seconds so that
+# concurrent deletes of a member that was only in Postgres (not cached) cannot both claim it.
+# ARGV: member, bucket, h1, h2, tombstone ttl. Returns 'removed' (it was cached), 'claimed' (not
+# cached; the caller must check Postgres) or 'gone' (deleted by someone else moments ago).
+DELETE_SCRIPT = """
+if redis.call('SREM', KEYS[1], ARGV[1]) == 1 then
+    redis.call('HINCRBY', KEYS[2], ARGV[2] .. ':n', -1)
+    redis.call('HINCRBY', KEYS[2], ARGV[2] .. ':a', -ARGV[3])
+    redis.call('HINCRBY', KEYS[2], ARGV[2] .. ':b', -ARGV[4])
+    redis.call('SET', KEYS[3], 1, 'EX', ARGV[5])
+    return 'removed'
+end
+if redis.call('SET', KEYS[3], 1, 'NX', 'EX', ARGV[5]) then
+    return 'claimed'
+end
+return 'gone'
+"""
+
+# SADD members read back from Postgres, except those whose tombstone (KEYS[2 + n] for the n-th member)
+# is still set: their delete has not reached Postgres yet. ARGV holds (member, bucket, h1, h2)
+# quadruples. Returns 1 for each member now cached and 0 for each one skipped.
+RESTORE_SCRIPT = """
+local live = {}
+for i = 1, #ARGV, 4 do
+    local n = (i - 1) / 4 + 1
+    if redis.call('EXISTS', KEYS[2 + n]) == 1 then
+        live[n] = 0
+    else
+        if redis.call('SADD', KEYS[1], ARGV[i]) == 1 then
+            redis.call('HINCRBY', KEYS[2], ARGV[i + 1] .. ':n', 1)
+            redis.call('HINCRBY', KEYS[2], ARGV[i + 1] .. ':a', ARGV[i + 2])
+            redis.call('HINCRBY', KEYS[2], ARGV[i + 1] .. ':b', ARGV[i + 3])
+        end
+        live[n] = 1
+    end
+end
+return live
+"""
+
+# One SSCAN step that only returns members of the requested buckets.
+# ARGV: cursor, count, suffix bytes, bucket...
+SCAN_BUCKETS_SCRIPT = """
+local wanted = {}
+for i = 4, #ARGV do
+    wanted[ARGV[i]] = true
+end
+local suffix = tonumber(ARGV[3])
+local reply = redis.call('SSCAN', KEYS[1], ARGV[1], 'COUNT', ARGV[2])
+local found = {}
+for _, member in ipairs(reply[2]) do
+    local bucket = (string.gsub(string.sub(member, -suffix), '.', function(c)
+        return string.format('%02x', string.byte(c))
+    end))
+    if wanted[bucket] then
+        found[#found + 1] = member
+    end
+end
+return {reply[1], found}
+"""
+
+
+def digest_key(set_key):
+    """Redis hash holding the bucket digests of a list set."""
+    return f"{set_key}:digest"
+
+
+def member_hash(value, suffix_bytes=SUFFIX_BYTES):
+    """(bucket, h1, h2) for a member."""
+    data = value if isinstance(value, bytes) else value.encode()
+    digest = hashlib.md5(data).digest()
+    h1 = int.from_bytes(digest[:4], "big") & 0x7FFFFFFF
+    h2 = int.from_bytes(digest[4:8], "big") & 0x7FFFFFFF
+    return data[-suffix_bytes:].hex(), h1, h2
+
+
+def script_args(members, suffix_bytes=SUFFIX_BYTES):
+    """Flatten members into the ARGV layout of ADD_SCRIPT / REMOVE_SCRIPT."""
+    args = []
+    for member in members:
+        bucket, h1, h2 = member_hash(member, suffix_bytes)
+        args.extend((member, bucket, h1, h2))
+    return args
+
+
+def compute_digests(members, suffix_bytes=SUFFIX_BYTES):
+    """{bucket: (count, sum_h1, sum_h2)} for an iterable of members."""
+    digests = {}
+    for member in members:
+        bucket, h1, h2 = member_hash(member, suffix_bytes)
+        count, a, b = digests.get(bucket, (0, 0, 0))
+        digests[bucket] = (count + 1, a + h1, b + h2)
+    return digests
+
+
+def parse_digest_hash(raw):
+    """Decode an HGETALL of a digest hash into ({bucket: (count, sum_h1, sum_h2)}, valid)."""
+    digests, valid = {}, False
+    for field, value in raw.items():
+        field = field.decode() if isinstance(field, bytes) else field
+        if field == VALID_FIELD:
+            valid = True
+            continue
+        bucket, _, part = field.rpartition(":")
+        count, a, b = digests.get(bucket, (0, 0, 0))
+        value = int(value)
+        if part == "n":
+            count = value
+        elif part == "a":
+            a = value
+        elif part == "b":
+            b = value
+        digests[bucket] = (count, a, b)
+    # Buckets whose members were all removed decay to zeros and mean the same as absent ones
+    return {bucket: digest for bucket, digest in digests.items() if digest != (0, 0, 0)}, valid
+
+
+def digest_mapping(digests):
+    """Hash fields for {bucket: (count, sum_h1, sum_h2)}."""
+    mapping = {}
+    for bucket, (count, a, b) in digests.items():
+        mapping[f"{bucket}:n"] = count
+        mapping[f"{bucket}:a"] = a
+        mapping[f"{bucket}:b"] = b
+    return mapping
@@ -0,0 +1,138 @@
+# app/utils/list_metadata.py
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+from app.config import settings
+from app.utils.redis_cache import RedisCache
+
+logger = logging.getLogger(__name__)
+
+# Redis pub/sub channel telling other workers a list's metadata changed
+METADATA_CHANNEL = "list_metadata:invalidate"
+
+ListMetadata = namedtuple("ListMetadata", ["id", "name", "type"])
+
+
+class ListMetadataCache:
+    """
+    In-process map of list id -> (id, name, type), loaded eagerly at startup.
+
+    The mapping only changes through change_list_type, which drops the local entry and
+    broadcasts the id so every other worker drops its copy and reloads it on next use. Ids
+    missing from the map (lists created after the load) are filled on first use. Entries expire
+    after `ttl` seconds, which bounds how long a lost broadcast can leave a stale type around.
+    """
+
+    def __init__(self, redis_client=None, enabled=None, ttl=None):
+        self.enabled = settings.LIST_METADATA_CACHE_ENABLED if enabled is None else enabled
+        self.ttl = ttl or settings.LIST_METADATA_TTL
+        self._redis = redis_client
+        # list id -> (metadata, monotonic expiry)
+        self._lists = {}
+        self._lock = threading.Lock()
+        # Bumped by every invalidation, local or remote; see store()
+        self._generation = 0
+        self._listener = None
+        self.node_id = uuid.uuid4().hex
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = RedisCache().redis
+        return self._redis
+
+    def load(self, rows):
+        """Replace the whole map from (id, name, type) rows."""
+        expires = time.monotonic() + self.ttl
+        lists = {row[0]: (ListMetadata(*row), expires) for row in rows}
+        with self._lock:
+            self._lists = lists
+        return len(lists)
+
+    def lookup(self, list_id):
+        """Cached metadata for list_id, or None if the caller has to load it."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            metadata, expires = self._lists.get(list_id, (None, 0))
+            if metadata is None or expires <= time.monotonic():
+                self.misses += 1
+                return None
+            self.hits += 1
+            return metadata
+
+    @property
+    def generation(self):
+        """Take this before loading the row that will be passed to store()."""
+        return self._generation
+
+    def store(self, list_obj, generation=None):
+        """
+        Cache a List row (or anything with id, name and type) and return its metadata. With the
+        `generation` taken before the row was read, it is not cached if an invalidation was
+        processed since, as the row may predate it.
+        """
+        metadata = ListMetadata(list_obj.id, list_obj.name, list_obj.type)
+        if self.enabled:
+            with self._lock:
+                if generation is None or generation == self._generation:
+                    self._lists[metadata.id] = (metadata, time.monotonic() + self.ttl)
+        return metadata
+
+    def invalidate(self, list_ids, broadcast=True):
+        """Drop list ids locally and, unless told otherwise, on every other worker."""
+        list_ids = list(list_ids)
+        if not self.enabled or not list_ids:
+            return
+        self._drop(list_ids)
+        if broadcast:
+            try:
+                self.redis.publish(METADATA_CHANNEL, self.invalidation_message(list_ids))
+            except Exception as e:
+                # Other workers keep the old type until their entry expires; log loudly
+                logger.error(f"Failed to broadcast list metadata invalidation: {e}")
+
+    def invalidation_message(self, list_ids):
+        return json.dumps({"list_ids": list(list_ids), "origin": self.node_id})
+
+    def stats(self):
+        with self._lock:
+            return {"enabled": self.enabled, "size": len(self._lists), "hits": self.hits, "misses": self.misses}
+
+    def start_listener(self):
+        """Subscribe to invalidations from other workers on a background thread."""
+        if not self.enabled or self._listener is not None:
+            return
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{METADATA_CHANNEL: self._handle_message})
+        self._listener = pubsub.run_in_thread(sleep_time=1, daemon=True)
+
+    def stop_listener(self):
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    def _drop(self, list_ids):
+        with self._lock:
+            self._generation += 1
+            for list_id in list_ids:
+                self._lists.pop(list_id, None)
+
+    def _handle_message(self, message):
+        try:
+            payload = json.loads(message["data"])
+        except (TypeError, ValueError):
+            return
+        if payload.get("origin") == self.node_id:
+            return
+        self._drop(payload.get("list_ids", []))
+
+
+# Process-wide metadata cache shared by every list service in this worker
+list_metadata = ListMetadataCache()
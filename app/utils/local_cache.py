@@ -0,0 +1,203 @@
+# app/utils/local_cache.py
+import json
+import logging
+import threading
+import uuid
+
+from cachetools import TTLCache
+
+from app.config import settings
+from app.utils.redis_cache import RedisCache
+
+logger = logging.getLogger(__name__)
+
+# Redis pub/sub channel used to tell other workers to drop stale entries
+INVALIDATION_CHANNEL = "list_cache:invalidate"
+
+_MISSING = object()
+
+
+class _CountingTTLCache(TTLCache):
+    """TTLCache that counts capacity evictions and TTL expirations separately."""
+
+    def __init__(self, maxsize, ttl):
+        super().__init__(maxsize, ttl)
+        self.evictions = 0
+        self.expirations = 0
+        self._clearing = False
+
+    def popitem(self):
+        item = super().popitem()
+        if not self._clearing:
+            self.evictions += 1
+        return item
+
+    def clear(self):
+        # MutableMapping.clear empties the cache through popitem; those are not evictions
+        self._clearing = True
+        try:
+            super().clear()
+        finally:
+            self._clearing = False
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        self.expirations += len(expired)
+        return expired
+
+
+class LocalCache:
+    """
+    Bounded in-process cache (TTL + LRU) in front of RedisCache.
+    Local invalidations are broadcast over Redis pub/sub so every worker drops the same keys.
+    """
+
+    def __init__(self, maxsize=None, ttl=None, enabled=None, redis_client=None):
+        self.enabled = settings.LOCAL_CACHE_ENABLED if enabled is None else enabled
+        self._cache = _CountingTTLCache(
+            maxsize or settings.LOCAL_CACHE_MAX_SIZE,
+            ttl or settings.LOCAL_CACHE_TTL,
+        )
+        self._lock = threading.Lock()
+        self._redis = redis_client
+        self._listener = None
+        # Bumped by every invalidation, local or remote; see set()
+        self._generation = 0
+        self.node_id = uuid.uuid4().hex
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = RedisCache().redis
+        return self._redis
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default on a miss."""
+        if not self.enabled:
+            return default
+        with self._lock:
+            value = self._cache.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    @property
+    def generation(self):
+        """Take this before reading the value that will be passed to set()."""
+        return self._generation
+
+    def set(self, key, value, generation=None):
+        """
+        Cache value for key. With the `generation` taken before the value was read, the store is
+        skipped if an invalidation was processed since, as the value may predate it.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._cache[key] = value
+
+    def invalidate(self, keys, broadcast=True):
+        """Drop keys locally and, unless told otherwise, on every other worker."""
+        keys = list(keys)
+        if not self.enabled or not keys:
+            return
+        self._drop(keys)
+        if broadcast:
+            self._publish(self.invalidation_message(keys))
+
+    def clear(self, broadcast=True):
+        """Drop every entry locally and, unless told otherwise, on every other worker."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._generation += 1
+            self._cache.clear()
+        if broadcast:
+            self._publish(self.invalidation_message(clear=True))
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._cache),
+                "max_size": self._cache.maxsize,
+                "ttl": self._cache.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self._cache.evictions,
+                "expirations": self._cache.expirations,
+            }
+
+    def start_listener(self):
+        """Subscribe to invalidations from other workers on a background thread."""
+        if not self.enabled or self._listener is not None:
+            return
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{INVALIDATION_CHANNEL: self._handle_message})
+        self._listener = pubsub.run_in_thread(sleep_time=1, daemon=True)
+
+    def stop_listener(self):
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    def _drop(self, keys):
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._cache.pop(key, None)
+
+    def invalidation_message(self, keys=None, clear=False):
+        """Serialized pub/sub message for an invalidation originating from this worker."""
+        payload = {"clear": True} if clear else {"keys": list(keys or [])}
+        payload["origin"] = self.node_id
+        return json.dumps(payload)
+
+    def _publish(self, message):
+        try:
+            self.redis.publish(INVALIDATION_CHANNEL, message)
+        except Exception as e:
+            # Entries on other workers still expire after the TTL
+            logger.warning(f"Failed to broadcast cache invalidation: {e}")
+
+    def _handle_message(self, message):
+        try:
+            payload = json.loads(message["data"])
+        except (TypeError, ValueError):
+            return
+        if payload.get("origin") == self.node_id:
+            return
+        if payload.get("clear"):
+            with self._lock:
+                self._generation += 1
+                self._cache.clear()
+        else:
+            self._drop(payload.get("keys", []))
+
+
+def publish_invalidation(keys, redis_client=None, chunk_size=1000):
+    """Broadcast an invalidation from a process that does not keep an L1 cache (e.g. Celery workers)."""
+    keys = list(keys)
+    if not keys:
+        return
+    client = redis_client or RedisCache().redis
+    try:
+        with client.pipeline(transaction=False) as pipe:
+            for start in range(0, len(keys), chunk_size):
+                payload = {"keys": keys[start:start + chunk_size], "origin": None}
+                pipe.publish(INVALIDATION_CHANNEL, json.dumps(payload))
+            pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to broadcast cache invalidation: {e}")
+
+
+# Process-wide L1 cache shared by every ListManagementService in this worker
+local_cache = LocalCache()
@@ -1,29 +1,119 @@
+import atexit
+import datetime
+import json
 import logging
 import os
-from logging.handlers import TimedRotatingFileHandler
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+
+from app.config import settings
+
+# Attributes every LogRecord has; anything else was passed through `extra` and is emitted as a field
+_RECORD_ATTRIBUTES = set(logging.makeLogRecord({}).__dict__) | {"message", "asctime"}
+
+# Always logged whatever the sample rates say
+MUTATION_ACTIONS = frozenset({
+    "add_value", "bulk_add_values", "edit_value", "delete_value", "bulk_delete_values", "change_list_type",
+})
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message and any `extra` fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks the caller: when the writer falls behind and the queue is
+    full, records are dropped and counted. Messages are formatted by the writer thread, not here.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        if record.exc_info and not record.exc_text:
+            # Tracebacks must be rendered while the frames still exist
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class ActionSampler:
+    """Keeps a configurable fraction of high-volume actions; mutations are always kept."""
+
+    def __init__(self, rates=None):
+        self.rates = json.loads(settings.LOG_SAMPLE_RATES) if rates is None else rates
+
+    def rate(self, action):
+        if action in MUTATION_ACTIONS:
+            return 1.0
+        return float(self.rates.get(action, 1.0))
+
 
 class LoggingService:
-    def __init__(self, log_file_name="app.log", log_level=logging.INFO):
-        self.logger = logging.getLogger("list_management_service")
-        self.logger.setLevel(log_level)
+    """
+    The service logger. Callers only put records on a bounded queue; a QueueListener thread
+    formats them (JSON by default) and writes them to the console and a daily rotating file.
+    """
+
+    def __init__(self, log_file_name=None, log_level=None, log_format=None, queue_size=None, console=True,
+                 name="list_management_service"):
+        self.logger = logging.getLogger(name)
+        self.logger.setLevel(log_level or settings.LOG_LEVEL)
+        # Handled here only, not again by whatever the root logger has
+        self.logger.propagate = False
 
         # Define format for logs
-        log_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        if (log_format or settings.LOG_FORMAT) == "json":
+            formatter = JsonFormatter()
+        else:
+            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
+        handlers = []
         # Console handler
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(log_format)
-        self.logger.addHandler(console_handler)
+        if console:
+            handlers.append(logging.StreamHandler())
 
         # File handler (logs rotate daily)
+        log_file_name = settings.LOG_FILE if log_file_name is None else log_file_name
         if log_file_name:
             log_dir = os.path.join(os.getcwd(), 'logs')
             os.makedirs(log_dir, exist_ok=True)
             log_file_path = os.path.join(log_dir, log_file_name)
             file_handler = TimedRotatingFileHandler(log_file_path, when="midnight", interval=1)
-            file_handler.setFormatter(log_format)
             file_handler.suffix = "%Y%m%d"  # Filename suffix for rotating logs
-            self.logger.addHandler(file_handler)
+            handlers.append(file_handler)
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        self.queue_handler = DroppingQueueHandler(queue.Queue(queue_size or settings.LOG_QUEUE_SIZE))
+        self.logger.addHandler(self.queue_handler)
+        self.listener = QueueListener(self.queue_handler.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+        self.sampler = ActionSampler()
 
     def log_info(self, message):
         self.logger.info(message)
@@ -40,5 +130,26 @@ class LoggingService:
     def log_exception(self, message):
         self.logger.exception(message)
 
+    def log_action(self, action, user, **fields):
+        """
+        Structured record of a service action. High-volume actions are sampled (see
+        LOG_SAMPLE_RATES); each record carries its sample_rate so counts can be scaled back up.
+        """
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        rate = self.sampler.rate(action)
+        if rate < 1.0 and random.random() >= rate:
+            return
+        self.logger.info(action, extra={"action": action, "user": user, "sample_rate": rate, **fields})
+
+    def close(self):
+        """Write out everything still queued and stop the writer thread."""
+        if self.listener._thread is not None:
+            self.listener.stop()
+
+    def stats(self):
+        return {"queued": self.queue_handler.queue.qsize(), "dropped": self.queue_handler.dropped}
+
 # Initialize a global logger instance to use across the app
-logger = LoggingService()
\ No newline at end of file
+logger = LoggingService()
+atexit.register(logger.close)
@@ -0,0 +1,233 @@
+# app/utils/metrics.py
+"""
+In-process metrics rendered in the Prometheus text format.
+
+Counters and histograms are plain dicts behind a lock: recording is a dict lookup, a bisect
+over the bucket bounds and an add, cheap enough to leave on at full traffic (see
+benchmarks/metrics_overhead.py). Everything else the service already tracks in a stats()
+method is exported as gauges through register_stats().
+"""
+import functools
+import inspect
+import math
+import threading
+import time
+from bisect import bisect_left
+
+from fastapi import HTTPException
+from fastapi.routing import APIRoute
+
+from app.utils import request_profiler
+
+PREFIX = "lms_"
+
+# Seconds; from a local cache hit to a slow Postgres query
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Seconds; Celery tasks run from milliseconds to many minutes for bulk work
+TASK_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+
+_metrics = []
+_collectors = []
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, labels=()):
+        self.name = PREFIX + name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = PREFIX + name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self._values = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def snapshot(self, *labels):
+        """(cumulative bucket counts, sum, count) for one label set."""
+        with self._lock:
+            counts, total = self._values.get(labels, [[0] * (len(self.buckets) + 1), 0.0])
+            counts = list(counts)
+        cumulative, running = [], 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative, total, running
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            label_sets = list(self._values)
+        for labels in label_sets:
+            cumulative, total, count = self.snapshot(*labels)
+            for bound, value in zip(self.buckets + (math.inf,), cumulative):
+                bucket_labels = _labels(self.label_names + ("le",), labels + (_number(bound),))
+                lines.append(f"{self.name}_bucket{bucket_labels} {value}")
+            label_text = _labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {_number(total)}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+def register_collector(collect):
+    """Add a callable returning extra exposition lines, called on every scrape."""
+    _collectors.append(collect)
+
+
+def register_stats(component, stats):
+    """Export the numeric values of a stats() dict (nested dicts flattened) as lms_<component>_<key> gauges."""
+    def collect():
+        lines = []
+        for key, value in _flatten(stats()):
+            name = f"{PREFIX}{component}_{key}"
+            lines.extend((f"# TYPE {name} gauge", f"{name} {_number(value)}"))
+        return lines
+    register_collector(collect)
+
+
+def _flatten(stats, prefix=""):
+    for key, value in stats.items():
+        key = f"{prefix}{key}".replace("-", "_").replace(":", "_")
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{key}_")
+        elif isinstance(value, bool):
+            yield key, int(value)
+        elif isinstance(value, (int, float)):
+            yield key, value
+
+
+def render():
+    """The whole exposition text."""
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for collect in _collectors:
+        try:
+            lines.extend(collect())
+        except Exception as e:
+            lines.append(f"# collector {getattr(collect, '__qualname__', collect)} failed: {_escape(e)}")
+    return "\n".join(lines) + "\n"
+
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Gateway route latency until the response is returned.",
+    ("method", "route", "status"))
+CALL_DURATION = Histogram(
+    "call_duration_seconds", "Duration of Redis and Postgres client calls made by the services.",
+    ("component", "method"))
+CHECK_VALUE_LOOKUPS = Counter(
+    "check_value_lookups_total", "check_value answers by the layer that answered them.", ("source",))
+CELERY_ENQUEUED = Counter(
+    "celery_enqueued_total", "Celery tasks published by this process.", ("task",))
+
+
+class TimedRoute(APIRoute):
+    """APIRoute that records every request in HTTP_REQUEST_DURATION, labelled by the route's path template."""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        route = self.path
+
+        async def timed_handler(request):
+            started = time.perf_counter()
+            status = 500
+            try:
+                response = await handler(request)
+                status = response.status_code
+                return response
+            except HTTPException as e:
+                status = e.status_code
+                raise
+            finally:
+                HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, request.method, route, status)
+
+        return timed_handler
+
+
+def instrument(component, histogram=CALL_DURATION):
+    """Class decorator timing every public method into histogram{component, method}; generators are left alone."""
+    def decorate(cls):
+        for name, member in list(vars(cls).items()):
+            if name.startswith("_") or not inspect.isfunction(member):
+                continue
+            if inspect.isgeneratorfunction(member) or inspect.isasyncgenfunction(member):
+                continue
+            setattr(cls, name, _timed(member, histogram, component, name))
+        return cls
+    return decorate
+
+
+def _timed(function, histogram, component, name):
+    if inspect.iscoroutinefunction(function):
+        @functools.wraps(function)
+        async def timed_async(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                histogram.observe(elapsed, component, name)
+                if request_profiler.active:
+                    request_profiler.record_span(component, name, started, elapsed)
+        return timed_async
+
+    @functools.wraps(function)
+    def timed(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            histogram.observe(elapsed, component, name)
+            if request_profiler.active:
+                request_profiler.record_span(component, name, started, elapsed)
+    return timed
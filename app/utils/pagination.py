@@ -0,0 +1,50 @@
+# app/utils/pagination.py
+"""
+Opaque cursors for keyset pagination.
+
+A cursor is the sort key of the last row of a page plus a fingerprint of the query that
+produced it, as base64url JSON. The next page is read with `WHERE key > :after`, so it costs
+the same however deep it is, and rows inserted or deleted meanwhile never shift a page.
+A cursor presented with different parameters (another list, filter or search term) is
+rejected rather than silently resuming somewhere unrelated.
+"""
+import base64
+import hashlib
+import json
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def query_fingerprint(**params):
+    """Short digest of the parameters a cursor is only valid for."""
+    canonical = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(canonical.encode()).hexdigest()[:12]
+
+
+def encode_cursor(position, **params):
+    payload = json.dumps({"k": position, "q": query_fingerprint(**params)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor, **params):
+    """The position stored in `cursor`, or None to start from the beginning."""
+    if not cursor:
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        position, fingerprint = payload["k"], payload["q"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor("Malformed cursor.") from e
+    if fingerprint != query_fingerprint(**params):
+        raise InvalidCursor("Cursor does not belong to this query.")
+    return position
+
+
+def paginate(rows, limit, key, **params):
+    """Split rows fetched with LIMIT limit + 1 into (page, next cursor or None)."""
+    if len(rows) <= limit:
+        return list(rows), None
+    rows = list(rows[:limit])
+    return rows, encode_cursor(key(rows[-1]), **params)
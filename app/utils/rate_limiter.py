@@ -0,0 +1,254 @@
+# app/utils/rate_limiter.py
+import asyncio
+import json
+import logging
+import math
+import time
+import uuid
+from collections import namedtuple
+
+from fastapi import Depends, HTTPException
+
+from app.config import settings
+from app.utils.auth import authenticate_token
+from app.utils.redis_cache import AsyncRedisCache
+
+logger = logging.getLogger(__name__)
+
+# Requests counted for one limit and user in one fixed window, shared by every worker
+WINDOW_KEY = "ratelimit:{name}:{identity}:{window}"
+# Sorted set of live workers (scored by last sync), used to split the remaining budget
+WORKERS_KEY = "ratelimit:workers"
+
+Limit = namedtuple("Limit", ["times", "seconds"])
+
+# Per-route limits; RATE_LIMITS can override them per role ("admin") or user ("user:alice")
+DEFAULT_LIMITS = {
+    "add": "50/60",
+    "check": "100/60",
+    "check_batch": "100/60",
+    "bulk_add": "20/60",
+    "import": "5/60",
+    "export": "10/60",
+    "search": "60/60",
+    "page": "120/60",
+    "bulk_delete": "20/60",
+    "edit": "50/60",
+    "delete": "50/60",
+    "change_type": "20/60",
+}
+
+
+def parse_limit(spec):
+    """'100/60' -> Limit(times=100, seconds=60)."""
+    times, _, seconds = str(spec).partition("/")
+    return Limit(int(times), int(seconds or 60))
+
+
+def load_policies(overrides=None):
+    """
+    {name: {"default": Limit, <role>: Limit, "user:<name>": Limit}} from DEFAULT_LIMITS and
+    the RATE_LIMITS JSON, e.g. {"check": {"admin": "1000/60", "user:batch-bot": "5000/60"}}.
+    """
+    if overrides is None:
+        overrides = json.loads(settings.RATE_LIMITS) if settings.RATE_LIMITS else {}
+    policies = {name: {"default": parse_limit(spec)} for name, spec in DEFAULT_LIMITS.items()}
+    for name, override in overrides.items():
+        if not isinstance(override, dict):
+            override = {"default": override}
+        policies.setdefault(name, {}).update({who: parse_limit(spec) for who, spec in override.items()})
+    return policies
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, retry_after):
+        super().__init__("Too Many Requests")
+        self.retry_after = retry_after
+
+
+class _Bucket:
+    __slots__ = ("key", "limit", "window", "tokens", "pending", "used")
+
+    def __init__(self, key, limit, window, tokens):
+        self.key = key
+        self.limit = limit
+        self.window = window
+        self.tokens = tokens
+        self.pending = 0
+        self.used = 0
+
+
+class HybridRateLimiter:
+    """
+    Fixed-window limits per user, counted in Redis but enforced from in-process token buckets.
+
+    In "local" mode a request only takes a token from this worker's bucket, so it costs no
+    Redis round trip. Every sync_interval the worker adds what it admitted to the window's Redis
+    counter in one pipeline, reads back the total and refills its bucket with its share of what
+    is left: remaining / live workers. Each worker can therefore only spend the share it was
+    last given, which bounds the overshoot to the shares handed out from counts that were one
+    sync interval stale (in practice a few requests per worker). "redis" mode increments the
+    counter on every request and is exact; "off" disables limiting.
+    """
+
+    def __init__(self, policies=None, mode=None, sync_interval=None, redis_client=None):
+        self.policies = policies if policies is not None else load_policies()
+        self.mode = mode or settings.RATE_LIMIT_MODE
+        self.sync_interval = sync_interval or settings.RATE_LIMIT_SYNC_INTERVAL
+        self._redis = redis_client
+        self._buckets = {}
+        self._retired = []
+        self._task = None
+        self.node_id = uuid.uuid4().hex
+        self.workers = 1
+        self.allowed = 0
+        self.rejected = 0
+        self.syncs = 0
+        self.sync_errors = 0
+        self.last_sync_seconds = 0.0
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = AsyncRedisCache().redis
+        return self._redis
+
+    def limit_for(self, name, username=None, role=None):
+        policy = self.policies.get(name, {})
+        return policy.get(f"user:{username}") or policy.get(role) or policy.get("default")
+
+    async def hit(self, name, username=None, role=None):
+        """Count one request against the limit; raises RateLimitExceeded when it is used up."""
+        limit = self.limit_for(name, username, role)
+        if self.mode == "off" or limit is None:
+            return
+        now = time.time()
+        window = int(now // limit.seconds)
+        retry_after = (window + 1) * limit.seconds - now
+        identity = username or "anonymous"
+        if self.mode == "redis":
+            await self._hit_redis(WINDOW_KEY.format(name=name, identity=identity, window=window), limit, retry_after)
+        else:
+            self._hit_local((name, identity), limit, window, retry_after)
+
+    def _hit_local(self, bucket_key, limit, window, retry_after):
+        bucket = self._buckets.get(bucket_key)
+        if bucket is None or bucket.window != window or bucket.limit != limit:
+            if bucket is not None and bucket.pending:
+                self._retired.append(bucket)
+            name, identity = bucket_key
+            bucket = self._buckets[bucket_key] = _Bucket(
+                WINDOW_KEY.format(name=name, identity=identity, window=window), limit, window,
+                self._share(limit.times, 0))
+        if bucket.tokens < 1:
+            self.rejected += 1
+            raise RateLimitExceeded(retry_after)
+        bucket.tokens -= 1
+        bucket.pending += 1
+        self.allowed += 1
+
+    async def _hit_redis(self, key, limit, retry_after):
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.incr(key)
+            pipe.expire(key, limit.seconds + 1)
+            count, _ = await pipe.execute()
+        if count > limit.times:
+            self.rejected += 1
+            raise RateLimitExceeded(retry_after)
+        self.allowed += 1
+
+    def _share(self, times, used):
+        remaining = max(times - used, 0)
+        return math.ceil(remaining / self.workers) if remaining else 0
+
+    async def sync(self):
+        """Push admitted counts to Redis and refill every bucket with this worker's share of what is left."""
+        started = time.monotonic()
+        current = int(time.time())
+        buckets = [bucket for bucket in self._buckets.values()
+                   if bucket.window == current // bucket.limit.seconds or bucket.pending]
+        retired, self._retired = self._retired, []
+        flushed = {id(bucket): bucket.pending for bucket in buckets + retired}
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zadd(WORKERS_KEY, {self.node_id: current})
+            pipe.zremrangebyscore(WORKERS_KEY, "-inf", current - max(3 * self.sync_interval, 10))
+            pipe.zcard(WORKERS_KEY)
+            for bucket in buckets + retired:
+                pipe.incrby(bucket.key, flushed[id(bucket)])
+                pipe.expire(bucket.key, bucket.limit.seconds + 1)
+            try:
+                results = await pipe.execute()
+            except Exception:
+                self._retired = retired + self._retired
+                raise
+        self.workers = max(int(results[2]), 1)
+        totals = results[3::2]
+
+        for bucket, used in zip(buckets, totals):
+            # Requests admitted while the pipeline was in flight are flushed next time
+            bucket.pending -= flushed[id(bucket)]
+            bucket.used = int(used)
+            bucket.tokens = self._share(bucket.limit.times, bucket.used + bucket.pending)
+        for bucket_key in [key for key, bucket in self._buckets.items()
+                           if bucket.window < current // bucket.limit.seconds and not bucket.pending]:
+            del self._buckets[bucket_key]
+        self.syncs += 1
+        self.last_sync_seconds = time.monotonic() - started
+
+    def start(self):
+        """Run sync() every sync_interval on the current event loop (local mode only)."""
+        if self.mode != "local" or self._task is not None:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        try:
+            await self.sync()
+        except Exception as e:
+            logger.warning(f"Final rate limit sync failed: {e}")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+            except Exception as e:
+                # Buckets keep their last share until Redis is back
+                self.sync_errors += 1
+                logger.warning(f"Rate limit sync failed: {e}")
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "buckets": len(self._buckets),
+            "workers": self.workers,
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "syncs": self.syncs,
+            "sync_errors": self.sync_errors,
+            "last_sync_seconds": self.last_sync_seconds,
+        }
+
+
+# Process-wide limiter shared by every gateway route in this worker
+rate_limiter = HybridRateLimiter()
+
+
+def rate_limit(name, limiter=None):
+    """Route dependency enforcing the `name` limit for the authenticated user."""
+    async def dependency(user: dict = Depends(authenticate_token)):
+        try:
+            await (limiter or rate_limiter).hit(name, user.get("username"), user.get("role"))
+        except RateLimitExceeded as e:
+            raise HTTPException(status_code=429, detail="Too Many Requests",
+                                headers={"Retry-After": str(math.ceil(e.retry_after))})
+    return dependency
@@ -1,17 +1,190 @@
 # app/utils/redis_cache.py
 import redis
-import os
+import redis.asyncio as aioredis
 
+from app.utils.connection_pools import async_redis_pool, redis_pool
+from app.utils.metrics import instrument
+from app.utils.list_digest import (
+    ADD_SCRIPT, DELETE_SCRIPT, REMOVE_SCRIPT, RENAME_SCRIPT, RESTORE_SCRIPT, digest_key, script_args,
+)
+
+@instrument("redis")
 class RedisCache:
-    def __init__(self):
-        self.redis = redis.StrictRedis(
-            host=os.getenv('REDIS_HOST', 'localhost'),
-            port=int(os.getenv('REDIS_PORT', 6379)),
-            db=0
-        )
+    def __init__(self, client=None):
+        # Every instance shares the process-wide pool unless handed its own client
+        self.redis = client or redis.StrictRedis(connection_pool=redis_pool())
+        self._add_script = self.redis.register_script(ADD_SCRIPT)
+        self._remove_script = self.redis.register_script(REMOVE_SCRIPT)
+        self._rename_script = self.redis.register_script(RENAME_SCRIPT)
+        self._delete_script = self.redis.register_script(DELETE_SCRIPT)
+        self._restore_script = self.redis.register_script(RESTORE_SCRIPT)
 
     def get(self, key):
         return self.redis.get(key)
 
     def set(self, key, value, ex=None):
         self.redis.set(key, value, ex=ex)
+
+    def exists(self, key):
+        return self.redis.exists(key)
+
+    def delete(self, key):
+        self.redis.delete(key)
+
+    def sismember(self, key, member):
+        return self.redis.sismember(key, member)
+
+    def smismember(self, key, members):
+        """Membership of several members in a single round trip."""
+        if not members:
+            return []
+        return [bool(hit) for hit in self.redis.smismember(key, members)]
+
+    def add_members(self, key, members, chunk_size=5000):
+        """
+        SADD members in chunks over one pipeline, keeping the set's bucket digests in step;
+        returns how many were newly added.
+        """
+        return self._chunked(self._add_script, key, members, chunk_size)
+
+    def remove_members(self, key, members, chunk_size=5000):
+        """SREM members in chunks over one pipeline, keeping the digests in step; returns how many were removed."""
+        return self._chunked(self._remove_script, key, members, chunk_size)
+
+    def count_members(self, key):
+        return self.redis.scard(key)
+
+    def add_member(self, key, member):
+        """SADD one member unless present, digest included, in one round trip; True if it was added."""
+        return bool(self._add_script(keys=[key, digest_key(key)], args=script_args([member])))
+
+    def remove_member(self, key, member):
+        """SREM one member if present, digest included, in one round trip; True if it was removed."""
+        return bool(self._remove_script(keys=[key, digest_key(key)], args=script_args([member])))
+
+    def rename_member(self, key, tombstone, old, new, ttl):
+        """Replace old with new, claiming old's tombstone (see RENAME_SCRIPT); returns 'renamed', 'exists', 'claimed' or 'gone'."""
+        return _outcome(self._rename_script(keys=[key, digest_key(key), tombstone],
+                                            args=script_args([old, new]) + [ttl]))
+
+    def delete_member(self, key, tombstone, member, ttl):
+        """Delete-if-exists guarded by a tombstone (see DELETE_SCRIPT); returns 'removed', 'claimed' or 'gone'."""
+        return _outcome(self._delete_script(keys=[key, digest_key(key), tombstone],
+                                            args=script_args([member]) + [ttl]))
+
+    def restore_members(self, key, members, tombstones):
+        """SADD members found in Postgres unless their tombstone is set (see RESTORE_SCRIPT); True for each cached."""
+        if not members:
+            return []
+        return [bool(live) for live in self._restore_script(keys=[key, digest_key(key)] + list(tombstones),
+                                                             args=script_args(members))]
+
+    def set_tombstones(self, tombstones, ttl):
+        """Mark several values deleted for ttl seconds in one round trip."""
+        with self.redis.pipeline(transaction=False) as pipe:
+            for tombstone in tombstones:
+                pipe.set(tombstone, 1, ex=ttl)
+            pipe.execute()
+
+    def _chunked(self, script, key, members, chunk_size):
+        members = list(members)
+        if not members:
+            return 0
+        with self.redis.pipeline(transaction=False) as pipe:
+            for start in range(0, len(members), chunk_size):
+                script(keys=[key, digest_key(key)], args=script_args(members[start:start + chunk_size]), client=pipe)
+            return sum(pipe.execute())
+
+
+@instrument("redis_async")
+class AsyncRedisCache:
+    """RedisCache counterpart for the asyncio data path, built on redis.asyncio."""
+
+    def __init__(self, client=None):
+        self.redis = client or aioredis.Redis(connection_pool=async_redis_pool())
+        self._add_script = self.redis.register_script(ADD_SCRIPT)
+        self._remove_script = self.redis.register_script(REMOVE_SCRIPT)
+        self._rename_script = self.redis.register_script(RENAME_SCRIPT)
+        self._delete_script = self.redis.register_script(DELETE_SCRIPT)
+        self._restore_script = self.redis.register_script(RESTORE_SCRIPT)
+
+    async def sismember(self, key, member):
+        return await self.redis.sismember(key, member)
+
+    async def smismember(self, key, members):
+        """Membership of several members in a single round trip."""
+        if not members:
+            return []
+        return [bool(hit) for hit in await self.redis.smismember(key, members)]
+
+    async def add_members(self, key, members, chunk_size=5000):
+        """SADD members in chunks over one pipeline, keeping the digests in step; returns how many were newly added."""
+        return await self._chunked(self._add_script, key, members, chunk_size)
+
+    async def remove_members(self, key, members, chunk_size=5000):
+        """SREM members in chunks over one pipeline, keeping the digests in step; returns how many were removed."""
+        return await self._chunked(self._remove_script, key, members, chunk_size)
+
+    async def count_members(self, key):
+        return await self.redis.scard(key)
+
+    async def add_member(self, key, member):
+        """SADD one member unless present, digest included, in one round trip; True if it was added."""
+        return bool(await self._add_script(keys=[key, digest_key(key)], args=script_args([member])))
+
+    async def remove_member(self, key, member):
+        """SREM one member if present, digest included, in one round trip; True if it was removed."""
+        return bool(await self._remove_script(keys=[key, digest_key(key)], args=script_args([member])))
+
+    async def rename_member(self, key, tombstone, old, new, ttl):
+        """Replace old with new, claiming old's tombstone (see RENAME_SCRIPT); returns 'renamed', 'exists', 'claimed' or 'gone'."""
+        return _outcome(await self._rename_script(keys=[key, digest_key(key), tombstone],
+                                                  args=script_args([old, new]) + [ttl]))
+
+    async def delete_member(self, key, tombstone, member, ttl):
+        """Delete-if-exists guarded by a tombstone (see DELETE_SCRIPT); returns 'removed', 'claimed' or 'gone'."""
+        return _outcome(await self._delete_script(keys=[key, digest_key(key), tombstone],
+                                                  args=script_args([member]) + [ttl]))
+
+    async def restore_members(self, key, members, tombstones):
+        """SADD members found in Postgres unless their tombstone is set (see RESTORE_SCRIPT); True for each cached."""
+        if not members:
+            return []
+        return [bool(live) for live in await self._restore_script(keys=[key, digest_key(key)] + list(tombstones),
+                                                                   args=script_args(members))]
+
+    async def set_tombstones(self, tombstones, ttl):
+        """Mark several values deleted for ttl seconds in one round trip."""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for tombstone in tombstones:
+                pipe.set(tombstone, 1, ex=ttl)
+            await pipe.execute()
+
+    async def delete(self, key):
+        return await self.redis.delete(key)
+
+    async def publish(self, channel, message):
+        return await self.redis.publish(channel, message)
+
+    async def _chunked(self, script, key, members, chunk_size):
+        members = list(members)
+        if not members:
+            return 0
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for start in range(0, len(members), chunk_size):
+                await script(keys=[key, digest_key(key)], args=script_args(members[start:start + chunk_size]), client=pipe)
+            return sum(await pipe.execute())
+
+
+def list_set_key(list_type):
+    """Redis SET holding every cached member of a list type."""
+    return f"list_members:{list_type}"
+
+
+def tombstone_key(list_type, value):
+    """Short-lived marker of a value just deleted from a list type."""
+    return f"list_deleted:{list_type}:{value}"
+
+
+def _outcome(reply):
+    return reply.decode() if isinstance(reply, bytes) else reply
@@ -0,0 +1,198 @@
+# app/utils/request_profiler.py
+"""
+On-demand profiling of single gateway requests.
+
+A request is profiled when an operator (a user whose role is in PROFILING_ROLES) sends
+`X-Profile: 1`, or when PROFILING_SAMPLE_RATE picks it. Its profile has two parts:
+
+- spans: every Redis and Postgres client call (through @instrument), SQL statement, token
+  check, notification hand-off and Celery publish made while serving it, with offsets and
+  durations. Work pushed to asyncio.to_thread carries the request's context and is included.
+- a cProfile call profile of the request, when no other profile is running in the process.
+  Coroutines of other requests interleaving on the event loop show up in it too.
+
+The full profile is written to PROFILING_DIR as JSON, and the span totals are returned
+inline in a Server-Timing header with the profile id in X-Profile-Id.
+
+With PROFILING_ENABLED off the middleware and SQL hooks are not installed, and span() and
+record_span() return after reading one module global.
+"""
+import asyncio
+import contextvars
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from app.config import settings
+
+# Requests being profiled in this process; span hooks do nothing while it is 0
+active = 0
+
+_current = contextvars.ContextVar("request_profile", default=None)
+_call_profiler_lock = threading.Lock()
+
+
+class RequestProfile:
+    def __init__(self, method, path):
+        self.id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.spans = []
+        self.call_profile = None
+
+    def add(self, kind, name, started, duration):
+        self.spans.append((kind, name, started - self.started, duration))
+
+    def totals(self):
+        totals = {}
+        for kind, _, _, duration in self.spans:
+            count, total = totals.get(kind, (0, 0.0))
+            totals[kind] = (count + 1, total + duration)
+        return totals
+
+    def server_timing(self, duration):
+        parts = [f"{kind};desc=\"{count} calls\";dur={1000 * total:.3f}"
+                 for kind, (count, total) in sorted(self.totals().items())]
+        parts.append(f"total;dur={1000 * duration:.3f}")
+        return ", ".join(parts)
+
+    def to_dict(self, route, status, duration, top):
+        report = {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": route,
+            "status": status,
+            "duration_ms": round(1000 * duration, 3),
+            "span_totals": {kind: {"count": count, "ms": round(1000 * total, 3)}
+                            for kind, (count, total) in sorted(self.totals().items())},
+            "spans": [{"kind": kind, "name": name, "start_ms": round(1000 * offset, 3),
+                       "duration_ms": round(1000 * span_duration, 3)}
+                      for kind, name, offset, span_duration in self.spans],
+        }
+        if self.call_profile is not None:
+            out = io.StringIO()
+            pstats.Stats(self.call_profile, stream=out).sort_stats("cumulative").print_stats(top)
+            report["call_profile"] = out.getvalue()
+        return report
+
+
+def record_span(kind, name, started, duration):
+    """Add a finished call to the profile of the current request, if it is being profiled."""
+    if not active:
+        return
+    profile = _current.get()
+    if profile is not None:
+        profile.add(kind, name, started, duration)
+
+
+@contextmanager
+def span(kind, name):
+    if not active or _current.get() is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(kind, name, started, time.perf_counter() - started)
+
+
+def install_sql_hooks(engine):
+    """Record every statement run on engine (a sync Engine, or an AsyncEngine's sync_engine) as a span."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if active and _current.get() is not None:
+            conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get("profile_started")
+        if started:
+            begun = started.pop()
+            record_span("sql", " ".join(statement.split())[:200], begun, time.perf_counter() - begun)
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware starting a RequestProfile for requests that ask for one (or are sampled)."""
+
+    def __init__(self, app, sample_rate=None, roles=None, directory=None, top=None):
+        self.app = app
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.roles = {role.strip() for role in (roles or settings.PROFILING_ROLES).split(",") if role.strip()}
+        self.directory = directory or settings.PROFILING_DIR
+        self.top = top or settings.PROFILING_TOP
+
+    async def _requested_by_operator(self, headers):
+        if headers.get(b"x-profile", b"").lower() not in (b"1", b"true"):
+            return False
+        scheme, _, token = headers.get(b"authorization", b"").decode("latin-1").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return False
+        from app.utils.auth import decode_access_token, lookup_user
+        from app.utils.token_cache import claims_cache
+        try:
+            user = await claims_cache.authenticate_async(token, decode_access_token, lookup_user, scope="gateway")
+        except Exception:
+            return False
+        return user is not None and user.get("role") in self.roles
+
+    async def __call__(self, scope, receive, send):
+        global active
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        if not sampled and not await self._requested_by_operator(dict(scope["headers"])):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"])
+        status = 500
+
+        async def profiled_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                duration = time.perf_counter() - profile.started
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", profile.server_timing(duration).encode("latin-1")),
+                    (b"x-profile-id", profile.id.encode("latin-1")),
+                ]
+            await send(message)
+
+        token = _current.set(profile)
+        active += 1
+        call_profiler = cProfile.Profile() if _call_profiler_lock.acquire(blocking=False) else None
+        try:
+            if call_profiler is not None:
+                call_profiler.enable()
+            try:
+                await self.app(scope, receive, profiled_send)
+            finally:
+                if call_profiler is not None:
+                    call_profiler.disable()
+                    profile.call_profile = call_profiler
+        finally:
+            if call_profiler is not None:
+                _call_profiler_lock.release()
+            active -= 1
+            _current.reset(token)
+            duration = time.perf_counter() - profile.started
+            route = getattr(scope.get("route"), "path", None)
+            await asyncio.to_thread(self._write, profile.to_dict(route, status, duration, self.top))
+
+    def _write(self, report):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, f"{report['id']}.json"), "w") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,49 @@
+# app/utils/task_metrics.py
+"""
+Celery task duration histograms, kept in Redis because tasks run in worker processes while
+/metrics is served by the API. Each task has one hash: per-bucket counts, sum, count and failures.
+"""
+import math
+from bisect import bisect_left
+
+from app.utils.metrics import PREFIX, TASK_BUCKETS, _number
+
+TASK_METRICS_KEY = "metrics:celery:{task}"
+
+# Tasks whose durations are recorded (short Celery task names)
+TIMED_TASKS = ("sync_to_postgres", "bulk_add_task", "bulk_delete_task")
+
+_NAME = PREFIX + "celery_task_duration_seconds"
+
+
+def record_task_duration(client, task, seconds, failed=False):
+    index = bisect_left(TASK_BUCKETS, seconds)
+    key = TASK_METRICS_KEY.format(task=task)
+    with client.pipeline(transaction=False) as pipe:
+        pipe.hincrby(key, f"b{index}", 1)
+        pipe.hincrby(key, "count", 1)
+        pipe.hincrbyfloat(key, "sum", seconds)
+        if failed:
+            pipe.hincrby(key, "failures", 1)
+        pipe.execute()
+
+
+def render_task_durations(client, tasks=TIMED_TASKS):
+    """Exposition lines for the recorded tasks: one histogram plus a failure counter."""
+    with client.pipeline(transaction=False) as pipe:
+        for task in tasks:
+            pipe.hgetall(TASK_METRICS_KEY.format(task=task))
+        hashes = pipe.execute()
+
+    lines = [f"# HELP {_NAME} Celery task run time, recorded by the workers.", f"# TYPE {_NAME} histogram"]
+    failures = [f"# TYPE {PREFIX}celery_task_failures_total counter"]
+    for task, raw in zip(tasks, hashes):
+        fields = {(k.decode() if isinstance(k, bytes) else k): v for k, v in raw.items()}
+        running = 0
+        for index, bound in enumerate(TASK_BUCKETS + (math.inf,)):
+            running += int(fields.get(f"b{index}", 0))
+            lines.append(f'{_NAME}_bucket{{task="{task}",le="{_number(bound)}"}} {running}')
+        lines.append(f'{_NAME}_sum{{task="{task}"}} {float(fields.get("sum", 0))}')
+        lines.append(f'{_NAME}_count{{task="{task}"}} {int(fields.get("count", 0))}')
+        failures.append(f'{PREFIX}celery_task_failures_total{{task="{task}"}} {int(fields.get("failures", 0))}')
+    return lines + failures
@@ -0,0 +1,205 @@
+# app/utils/token_cache.py
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+from cachetools import TLRUCache
+
+from app.config import settings
+from app.utils.redis_cache import AsyncRedisCache, RedisCache
+
+logger = logging.getLogger(__name__)
+
+# Redis pub/sub channel telling other workers to drop revoked tokens
+REVOCATION_CHANNEL = "auth:revoke"
+# Present while a token id is revoked; expires with the token itself
+REVOKED_TOKEN_KEY = "auth:revoked:{jti}"
+# Timestamp before which every token of the user is revoked
+REVOKED_USER_KEY = "auth:revoked_user:{username}"
+
+_Entry = namedtuple("_Entry", ["claims", "user", "expires_at"])
+
+
+class TokenRevokedError(Exception):
+    pass
+
+
+class ClaimsCache:
+    """
+    Bearer token -> (verified claims, user) cache, so an authenticated request costs one dict
+    lookup instead of a signature check and a user lookup.
+
+    Entries live until the token expires, but at most `ttl` seconds, which bounds how long a
+    worker that missed a revocation broadcast keeps accepting the token. Misses check Redis
+    for revocations before the token is cached. Entries are keyed by (scope, token) because
+    different dependencies resolve the same token to different user objects.
+    """
+
+    def __init__(self, maxsize=None, ttl=None, enabled=None, redis_client=None, async_redis_client=None):
+        self.enabled = settings.AUTH_CACHE_ENABLED if enabled is None else enabled
+        self.ttl = ttl or settings.AUTH_CACHE_TTL
+        self._cache = TLRUCache(maxsize or settings.AUTH_CACHE_MAX_SIZE, ttu=self._expires_at, timer=time.time)
+        self._lock = threading.Lock()
+        self._redis = redis_client
+        self._async_redis = async_redis_client
+        self._listener = None
+        self.node_id = uuid.uuid4().hex
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = RedisCache().redis
+        return self._redis
+
+    @property
+    def async_redis(self):
+        if self._async_redis is None:
+            self._async_redis = AsyncRedisCache().redis
+        return self._async_redis
+
+    def _expires_at(self, key, entry, now):
+        return min(entry.expires_at, now + self.ttl)
+
+    def authenticate(self, token, decode, load_user, scope="default"):
+        """
+        The user for `token`, or None if load_user finds none. `decode` verifies the token and
+        returns its claims (raising on an invalid one); `load_user` maps claims to a user.
+        Raises TokenRevokedError for revoked tokens.
+        """
+        entry = self._lookup(scope, token)
+        if entry is not None:
+            return entry.user
+        claims = decode(token)
+        self._raise_if_revoked(claims, self._fetch_revocations(claims))
+        return self._store(scope, token, claims, load_user(claims))
+
+    async def authenticate_async(self, token, decode, load_user, scope="default"):
+        """authenticate() for the event loop; revocations are read through redis.asyncio."""
+        entry = self._lookup(scope, token)
+        if entry is not None:
+            return entry.user
+        claims = decode(token)
+        self._raise_if_revoked(claims, await self._fetch_revocations_async(claims))
+        return self._store(scope, token, claims, load_user(claims))
+
+    def revoke_token(self, claims):
+        """Revoke one token everywhere until it expires."""
+        jti = claims.get("jti")
+        if jti is None:
+            raise ValueError("Token has no id; revoke its user instead")
+        remaining = max(int(claims.get("exp", 0) - time.time()), 1)
+        self.redis.set(REVOKED_TOKEN_KEY.format(jti=jti), 1, ex=remaining)
+        self._drop(lambda claims: claims.get("jti") == jti)
+        self._publish({"jti": jti})
+
+    def revoke_user(self, username):
+        """Revoke every token issued to username so far, e.g. after a role change."""
+        cutoff = time.time()
+        self.redis.set(REVOKED_USER_KEY.format(username=username), cutoff, ex=settings.AUTH_REVOKE_USER_TTL)
+        self._drop(_issued_before(username, cutoff))
+        self._publish({"username": username, "before": cutoff})
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._cache),
+                "max_size": self._cache.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "rejected": self.rejected,
+            }
+
+    def start_listener(self):
+        """Subscribe to revocations from other workers on a background thread."""
+        if not self.enabled or self._listener is not None:
+            return
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{REVOCATION_CHANNEL: self._handle_message})
+        self._listener = pubsub.run_in_thread(sleep_time=1, daemon=True)
+
+    def stop_listener(self):
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    def _lookup(self, scope, token):
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._cache.get((scope, token))
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def _store(self, scope, token, claims, user):
+        if self.enabled and user is not None:
+            with self._lock:
+                self._cache[(scope, token)] = _Entry(claims, user, claims.get("exp", 0))
+        return user
+
+    def _fetch_revocations(self, claims):
+        with self.redis.pipeline(transaction=False) as pipe:
+            self._queue_revocation_reads(pipe, claims)
+            return pipe.execute()
+
+    async def _fetch_revocations_async(self, claims):
+        async with self.async_redis.pipeline(transaction=False) as pipe:
+            self._queue_revocation_reads(pipe, claims)
+            return await pipe.execute()
+
+    @staticmethod
+    def _queue_revocation_reads(pipe, claims):
+        pipe.exists(REVOKED_TOKEN_KEY.format(jti=claims.get("jti")))
+        pipe.get(REVOKED_USER_KEY.format(username=claims.get("sub")))
+
+    def _raise_if_revoked(self, claims, revocations):
+        token_revoked, user_cutoff = revocations
+        if (claims.get("jti") is not None and token_revoked) or (
+                user_cutoff is not None and claims.get("iat", 0) <= float(user_cutoff)):
+            with self._lock:
+                self.rejected += 1
+            raise TokenRevokedError("Token has been revoked")
+
+    def _drop(self, predicate):
+        with self._lock:
+            for key in [key for key, entry in self._cache.items() if predicate(entry.claims)]:
+                self._cache.pop(key, None)
+
+    def _publish(self, payload):
+        payload["origin"] = self.node_id
+        try:
+            self.redis.publish(REVOCATION_CHANNEL, json.dumps(payload))
+        except Exception as e:
+            # Other workers still drop the token within the cache TTL
+            logger.warning(f"Failed to broadcast token revocation: {e}")
+
+    def _handle_message(self, message):
+        try:
+            payload = json.loads(message["data"])
+        except (TypeError, ValueError):
+            return
+        if payload.get("origin") == self.node_id:
+            return
+        if payload.get("jti") is not None:
+            self._drop(lambda claims: claims.get("jti") == payload["jti"])
+        elif payload.get("username") is not None:
+            self._drop(_issued_before(payload["username"], payload.get("before", time.time())))
+
+
+def _issued_before(username, cutoff):
+    return lambda claims: claims.get("sub") == username and claims.get("iat", 0) <= cutoff
+
+
+# Process-wide claims cache shared by every auth dependency in this worker
+claims_cache = ClaimsCache()
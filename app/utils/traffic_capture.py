@@ -0,0 +1,181 @@
+# app/utils/traffic_capture.py
+"""
+Sampled capture of gateway traffic to NDJSON, replayed by benchmarks/traffic_replay.py.
+
+One line per captured request: arrival time, method, path, query, matched route template,
+the headers that change how a request is served, the body, status and duration. Credentials
+are never written: Authorization is not recorded and TRAFFIC_CAPTURE_EXCLUDE keeps out the
+routes whose bodies carry passwords or tokens.
+"""
+import atexit
+import base64
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Request headers kept with each record
+CAPTURED_HEADERS = (b"content-type", b"content-encoding", b"accept", b"accept-encoding")
+
+_STOP = object()
+
+
+def _prefixes(value):
+    return tuple(prefix.strip() for prefix in value.split(",") if prefix.strip())
+
+
+class TrafficRecorder:
+    """
+    Decides which requests are captured and writes their records from a background thread.
+    Request handlers only put a dict on a bounded queue; when the writer falls behind, records
+    are dropped and counted.
+    """
+
+    def __init__(self, path=None, sample_rate=None, max_body=None, queue_size=None, paths=None, exclude=None,
+                 enabled=None):
+        self.enabled = settings.TRAFFIC_CAPTURE_ENABLED if enabled is None else enabled
+        self.path = path or settings.TRAFFIC_CAPTURE_FILE
+        self.sample_rate = settings.TRAFFIC_CAPTURE_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.max_body = settings.TRAFFIC_CAPTURE_MAX_BODY if max_body is None else max_body
+        self.paths = _prefixes(settings.TRAFFIC_CAPTURE_PATHS if paths is None else paths)
+        self.exclude = _prefixes(settings.TRAFFIC_CAPTURE_EXCLUDE if exclude is None else exclude)
+        self._queue = queue.Queue(queue_size or settings.TRAFFIC_CAPTURE_QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._thread = None
+
+        self.captured = 0
+        self.written = 0
+        self.dropped = 0
+
+    def should_capture(self, path):
+        if not self.enabled or not path.startswith(self.paths) or path.startswith(self.exclude):
+            return False
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def record(self, entry):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(entry)
+            self.captured += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="traffic-capture", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                entry = self._queue.get()
+                if entry is _STOP:
+                    break
+                try:
+                    f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+                    self.written += 1
+                except Exception as e:
+                    logger.warning(f"Could not write captured request: {e}")
+                if self._queue.empty():
+                    f.flush()
+
+    def close(self, timeout=10):
+        """Write out every queued record and stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "captured": self.captured,
+            "written": self.written,
+            "dropped": self.dropped,
+            "queued": self._queue.qsize(),
+        }
+
+
+def _body_fields(body, truncated):
+    if truncated:
+        return {"body_truncated": True}
+    if not body:
+        return {}
+    try:
+        return {"body": body.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"body_b64": base64.b64encode(bytes(body)).decode("ascii")}
+
+
+class TrafficCaptureMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware task per request) recording sampled requests.
+    Requests that are not sampled pass straight through.
+    """
+
+    def __init__(self, app, recorder: TrafficRecorder = None):
+        self.app = app
+        self.recorder = recorder or traffic_recorder
+
+    async def __call__(self, scope, receive, send):
+        recorder = self.recorder
+        if scope["type"] != "http" or not recorder.should_capture(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        body, truncated, status = bytearray(), False, 500
+
+        async def capture_receive():
+            nonlocal truncated
+            message = await receive()
+            if message["type"] == "http.request" and not truncated:
+                chunk = message.get("body", b"")
+                if len(body) + len(chunk) > recorder.max_body:
+                    truncated = True
+                    body.clear()
+                else:
+                    body.extend(chunk)
+            return message
+
+        async def capture_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        arrived, started = time.time(), time.perf_counter()
+        try:
+            await self.app(scope, capture_receive, capture_send)
+        finally:
+            route = scope.get("route")
+            recorder.record({
+                "ts": arrived,
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope["query_string"].decode("latin-1"),
+                "route": getattr(route, "path", None),
+                "headers": {name.decode("latin-1"): value.decode("latin-1")
+                            for name, value in scope["headers"] if name in CAPTURED_HEADERS},
+                **_body_fields(body, truncated),
+                "status": status,
+                "duration_ms": round(1000 * (time.perf_counter() - started), 3),
+            })
+
+
+# Process-wide recorder shared by every request in this worker
+traffic_recorder = TrafficRecorder()
+atexit.register(traffic_recorder.close)
@@ -0,0 +1,94 @@
+# benchmarks/auth_throughput.py
+"""
+Authenticated requests per second on one core: per-request bcrypt vs cached bearer tokens.
+
+A minimal FastAPI app exposes the same trivial route behind each dependency:
+
+    /password  Depends(authenticate_user)    username/password checked with bcrypt every call
+    /token     Depends(authenticate_token)   bearer JWT, verified once then served from the claims cache
+
+Requests are driven straight through the ASGI interface in a single process, so the numbers
+are per core and exclude network and server overhead. The first /token request of each token
+also reads the revocation keys from the Redis configured in .env.
+
+    python -m benchmarks.auth_throughput --seconds 5 --tokens 100
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi import Depends, FastAPI
+
+from app.utils.auth import authenticate_token, authenticate_user, create_access_token
+from app.utils.token_cache import claims_cache
+
+app = FastAPI()
+
+
+@app.get("/password")
+def password_route(user=Depends(authenticate_user)):
+    return {"ok": bool(user)}
+
+
+@app.get("/token")
+async def token_route(user: dict = Depends(authenticate_token)):
+    return {"ok": True}
+
+
+async def call(app, path, query=b"", headers=()):
+    """One GET through the ASGI interface; exits unless it answers 200."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query,
+        "root_path": "", "headers": list(headers), "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    status = None
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    if status != 200:
+        raise SystemExit(f"{path} answered {status}")
+
+
+async def measure(seconds, request):
+    count, started = 0, time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        await request(count)
+        count += 1
+    elapsed = time.perf_counter() - started
+    return {"requests": count, "requests_per_second": round(count / elapsed, 1)}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--tokens", type=int, default=100, help="distinct tokens cycled through")
+    args = parser.parse_args()
+
+    password_query = b"username=test_user&password=password123"
+    tokens = [create_access_token({"sub": "test_user"}).encode() for _ in range(args.tokens)]
+
+    def bearer(count):
+        return [(b"authorization", b"Bearer " + tokens[count % len(tokens)])]
+
+    report = {"password": await measure(args.seconds, lambda count: call(app, "/password", password_query))}
+    claims_cache.enabled = False
+    report["token_uncached"] = await measure(args.seconds, lambda count: call(app, "/token", headers=bearer(count)))
+    claims_cache.enabled = True
+    report["token_cached"] = await measure(args.seconds, lambda count: call(app, "/token", headers=bearer(count)))
+    report["cache"] = claims_cache.stats()
+    report["speedup_vs_password"] = round(
+        report["token_cached"]["requests_per_second"] / report["password"]["requests_per_second"], 1)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
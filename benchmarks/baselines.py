@@ -0,0 +1,69 @@
+# benchmarks/baselines.py
+"""
+Summaries of benchmark runs and their comparison with the stored baselines.
+
+A result is {"calls", "ops_per_second", "p50_ms", "p99_ms"}. A case regresses when its
+throughput drops, or its p50/p99 latency grows, by more than the tolerance for that figure.
+Cases missing from the baselines file are reported but never fail the run.
+"""
+import json
+import os
+
+BASELINES_FILE = os.path.join(os.path.dirname(__file__), "baselines.json")
+
+# Allowed relative change before a figure counts as a regression; p99 is the noisiest
+DEFAULT_TOLERANCE = {"ops_per_second": 0.2, "p50_ms": 0.25, "p99_ms": 0.5}
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(latencies, elapsed):
+    """Result for one case from per-call latencies (seconds) and the wall time of the whole run."""
+    ms = [latency * 1000 for latency in latencies]
+    return {
+        "calls": len(ms),
+        "ops_per_second": round(len(ms) / elapsed, 1),
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+    }
+
+
+def load(path=BASELINES_FILE):
+    if not os.path.exists(path):
+        return {"tolerance": dict(DEFAULT_TOLERANCE), "cases": {}}
+    with open(path) as f:
+        baselines = json.load(f)
+    baselines["tolerance"] = {**DEFAULT_TOLERANCE, **baselines.get("tolerance", {})}
+    baselines.setdefault("cases", {})
+    return baselines
+
+
+def save(results, baselines, path=BASELINES_FILE):
+    """Record results as the new baselines, keeping cases that were not run this time."""
+    cases = {**baselines.get("cases", {}), **results}
+    with open(path, "w") as f:
+        json.dump({"tolerance": baselines["tolerance"], "cases": dict(sorted(cases.items()))}, f, indent=2)
+        f.write("\n")
+
+
+def compare(results, baselines):
+    """Regression messages for every figure that moved past its tolerance in the wrong direction."""
+    tolerance = baselines["tolerance"]
+    regressions = []
+    for name, result in results.items():
+        baseline = baselines["cases"].get(name)
+        if baseline is None:
+            continue
+        floor = baseline["ops_per_second"] * (1 - tolerance["ops_per_second"])
+        if result["ops_per_second"] < floor:
+            regressions.append(f"{name}: {result['ops_per_second']} ops/s is below {floor:.1f} "
+                               f"(baseline {baseline['ops_per_second']})")
+        for figure in ("p50_ms", "p99_ms"):
+            ceiling = baseline[figure] * (1 + tolerance[figure])
+            if result[figure] > ceiling:
+                regressions.append(f"{name}: {figure} {result[figure]} is above {ceiling:.3f} "
+                                   f"(baseline {baseline[figure]})")
+    return regressions
@@ -0,0 +1,100 @@
+# benchmarks/batch_check_throughput.py
+"""
+Values checked per second: check_value called once per value against one check_values call
+per --batch values, on the same workload.
+
+--hit-ratio of the values are members of the list's Redis set; the rest are absent, so with
+the L1 cache and Bloom filter disabled each of them reaches Postgres. The loop pays one
+SISMEMBER per value plus one query per miss; the batch pays one SMISMEMBER and one IN query.
+Both runs must return the same answers, or the benchmark exits with an error.
+
+Runs against the Redis and Postgres configured in .env, on a fresh list type whose set is
+deleted when done (the values are never written to Postgres, so every miss is a real absent
+lookup). With --fake, Redis is an in-memory fakeredis server and Postgres a stand-in that
+sleeps --db-rtt-ms per query; neither charges a Redis round trip, so --fake understates the
+gap a networked Redis adds to the loop.
+
+    python -m benchmarks.batch_check_throughput --values 20000 --batch 500 --hit-ratio 0.8
+    python -m benchmarks.batch_check_throughput --fake --db-rtt-ms 0.3
+"""
+import argparse
+import json
+import random
+import time
+import uuid
+
+
+class RoundTripDatabase:
+    """Postgres stand-in that knows no values and charges one round trip per query."""
+
+    def __init__(self, rtt):
+        self.rtt = rtt
+
+    def check_value_in_list(self, list_type, value):
+        time.sleep(self.rtt)
+        return False
+
+    def check_values_in_list(self, list_type, values):
+        time.sleep(self.rtt)
+        return set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--values", type=int, default=20000, help="values checked by each run")
+    parser.add_argument("--batch", type=int, default=500, help="values per check_values call")
+    parser.add_argument("--hit-ratio", type=float, default=0.8)
+    parser.add_argument("--fake", action="store_true", help="Use fakeredis and a Postgres stand-in.")
+    parser.add_argument("--db-rtt-ms", type=float, default=0.3, help="stand-in query latency with --fake")
+    args = parser.parse_args()
+
+    if args.fake:
+        from benchmarks.standins import install_redis
+        install_redis()
+    from app.database import Database
+    from app.services.list_management_service import ListManagementService
+    from app.utils.bloom_filter import BloomFilter
+    from app.utils.list_digest import digest_key
+    from app.utils.local_cache import LocalCache
+    from app.utils.redis_cache import RedisCache, list_set_key
+
+    cache = RedisCache()
+    db = RoundTripDatabase(args.db_rtt_ms / 1000) if args.fake else Database()
+    service = ListManagementService(db=db, redis_client=cache, local_cache=LocalCache(enabled=False),
+                                    bloom_filter=BloomFilter(enabled=False))
+    list_type = "bench" + uuid.uuid4().hex[:8]
+    key = list_set_key(list_type)
+
+    hits = [f"hit{index}" for index in range(int(args.values * args.hit_ratio))]
+    workload = hits + [f"miss{index}" for index in range(args.values - len(hits))]
+    random.shuffle(workload)
+    cache.add_members(key, hits)
+
+    try:
+        started = time.perf_counter()
+        looped = [service.check_value(list_type, value, "viewer") for value in workload]
+        loop_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        batched = []
+        for start in range(0, len(workload), args.batch):
+            batched.extend(result["exists"] for result in
+                           service.check_values(list_type, workload[start:start + args.batch], "viewer"))
+        batch_seconds = time.perf_counter() - started
+
+        if looped != batched:
+            raise SystemExit("check_value and check_values disagree")
+        report = {
+            "values": args.values, "batch": args.batch, "hit_ratio": args.hit_ratio, "fake": args.fake,
+            "loop_values_per_second": round(args.values / loop_seconds, 1),
+            "batch_values_per_second": round(args.values / batch_seconds, 1),
+            "speedup": round(loop_seconds / batch_seconds, 1),
+        }
+        print(json.dumps(report, indent=2))
+    finally:
+        for leftover in (key, digest_key(key)):
+            cache.delete(leftover)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/keyset_explain.py
+"""
+EXPLAIN ANALYZE of paging through a list's items: OFFSET against keyset, and COUNT(*)
+against the planner estimate used for `estimated_total`.
+
+Builds a scratch list_items with --lists lists of --rows items in total (10% soft-deleted)
+and the (list_id, id) index from migration 0004, then fetches a page of list 1
+at several depths, once with OFFSET and once with `id > :after` as list_items_page_query
+does. The report gives each query's execution time by depth, the exact count's time, and
+how far the estimate was off.
+
+Runs against the Postgres configured in .env; the scratch schema is dropped afterwards
+unless --keep is given.
+
+    python -m benchmarks.keyset_explain --rows 10000000 --lists 10 --limit 100
+"""
+import argparse
+import json
+import time
+
+from sqlalchemy import text
+
+from app.database import plan_rows
+from app.db_setup import engine
+from benchmarks.list_items_explain import explain
+
+SCHEMA = "bench_keyset"
+
+SETUP = [
+    f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE",
+    f"CREATE SCHEMA {SCHEMA}",
+    f"""CREATE TABLE {SCHEMA}.list_items (
+        id serial PRIMARY KEY, list_id integer, list_type varchar, value varchar,
+        is_deleted integer DEFAULT 0, created_by varchar, comment varchar)""",
+]
+
+FILL_ITEMS = f"""
+INSERT INTO {SCHEMA}.list_items (list_id, list_type, value, is_deleted, created_by)
+SELECT 1 + n % :lists, 'bench', md5(n::text), CASE WHEN n % 10 = 0 THEN 1 ELSE 0 END, 'bench'
+FROM generate_series(:start, :stop - 1) AS n
+"""
+
+INDEX = f"CREATE INDEX ON {SCHEMA}.list_items (list_id, id)"
+
+SELECT = f"""SELECT id, value, comment, created_by, is_deleted FROM {SCHEMA}.list_items
+    WHERE list_id = 1 AND is_deleted = 0"""
+
+QUERIES = {
+    "offset": f"{SELECT} ORDER BY id LIMIT :limit OFFSET :offset",
+    "keyset": f"{SELECT} AND id > :after ORDER BY id LIMIT :limit",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--lists", type=int, default=10)
+    parser.add_argument("--limit", type=int, default=100, help="page size")
+    parser.add_argument("--depths", default="0,0.01,0.1,0.5,0.99", help="page positions as fractions of the list")
+    parser.add_argument("--fill-batch", type=int, default=1_000_000)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch schema")
+    args = parser.parse_args()
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        try:
+            started = time.monotonic()
+            for statement in SETUP:
+                connection.execute(text(statement))
+            for start in range(0, args.rows, args.fill_batch):
+                connection.execute(text(FILL_ITEMS), {"start": start, "stop": min(start + args.fill_batch, args.rows),
+                                                      "lists": args.lists})
+            connection.execute(text(INDEX))
+            connection.execute(text(f"ANALYZE {SCHEMA}.list_items"))
+            print(f"Loaded {args.rows} rows in {time.monotonic() - started:.1f}s")
+
+            count_ms, _ = explain(connection, f"SELECT count(*) FROM ({SELECT}) matches", {})
+            total = connection.execute(text(f"SELECT count(*) FROM ({SELECT}) matches")).scalar()
+            estimate = plan_rows(connection.execute(text(f"EXPLAIN (FORMAT JSON) {SELECT}")).scalar())
+            report = {"total": total, "count_ms": round(count_ms, 3), "estimate": estimate,
+                      "estimate_error": round(abs(estimate - total) / total, 4) if total else 0.0, "pages": {}}
+
+            for depth in (float(part) for part in args.depths.split(",")):
+                offset = int(depth * max(total - args.limit, 0))
+                after = connection.execute(text(f"{SELECT} ORDER BY id LIMIT 1 OFFSET :offset"),
+                                           {"offset": max(offset - 1, 0)}).scalar() if offset else 0
+                params = {"limit": args.limit, "offset": offset, "after": after}
+                report["pages"][f"{depth:g}"] = {
+                    name: round(explain(connection, sql, {key: params[key] for key in params if f":{key}" in sql})[0], 3)
+                    for name, sql in QUERIES.items()
+                }
+            print(json.dumps(report, indent=2))
+        finally:
+            if not args.keep:
+                connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+
+
+if __name__ == "__main__":
+    main()
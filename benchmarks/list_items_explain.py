@@ -0,0 +1,166 @@
+# benchmarks/list_items_explain.py
+"""
+EXPLAIN ANALYZE of the list_items lookups before and after migration 0002.
+
+Builds a synthetic copy of lists/list_items in a scratch schema (10M items by default,
+10% soft-deleted), then times the hot queries twice: first in the pre-0002 shape (type
+resolved by joining lists, no index on value), then against list_items.list_type with the
+two partial indexes from 0002. Each query is run for a sample of hit and miss values and
+the plan is checked: after the migration no query may sequentially scan list_items.
+
+Runs against the Postgres configured in .env; the scratch schema is dropped afterwards
+unless --keep is given.
+
+    python -m benchmarks.list_items_explain --rows 10000000 --lists 200 --types 4
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+from sqlalchemy import bindparam, text
+
+from app.db_setup import engine
+
+SCHEMA = "bench_list_items"
+
+SETUP = [
+    f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE",
+    f"CREATE SCHEMA {SCHEMA}",
+    f"CREATE TABLE {SCHEMA}.lists (id serial PRIMARY KEY, name varchar, type varchar, is_deleted integer DEFAULT 0)",
+    f"""CREATE TABLE {SCHEMA}.list_items (
+        id serial PRIMARY KEY, list_id integer REFERENCES {SCHEMA}.lists (id), list_type varchar,
+        value varchar, is_deleted integer DEFAULT 0, created_by varchar, comment varchar)""",
+    f"CREATE INDEX ON {SCHEMA}.lists (type)",
+]
+
+FILL_LISTS = f"""
+INSERT INTO {SCHEMA}.lists (name, type)
+SELECT 'list' || n, 'type' || (n % :types) FROM generate_series(1, :lists) AS n
+"""
+
+FILL_ITEMS = f"""
+INSERT INTO {SCHEMA}.list_items (list_id, list_type, value, is_deleted, created_by)
+SELECT l.id, l.type, md5(n::text), CASE WHEN n % 10 = 0 THEN 1 ELSE 0 END, 'bench'
+FROM generate_series(:start, :stop - 1) AS n
+JOIN {SCHEMA}.lists l ON l.id = 1 + n % :lists
+"""
+
+MIGRATION_INDEXES = [
+    f"CREATE UNIQUE INDEX uq_bench_active_list_value ON {SCHEMA}.list_items (list_id, value) WHERE is_deleted = 0",
+    f"CREATE INDEX ix_bench_active_type_value ON {SCHEMA}.list_items (list_type, value) WHERE is_deleted = 0",
+]
+
+QUERIES = {
+    "before": {
+        "check_value": f"""
+            SELECT DISTINCT li.value FROM {SCHEMA}.list_items li JOIN {SCHEMA}.lists l ON li.list_id = l.id
+            WHERE l.type = :list_type AND l.is_deleted = 0 AND li.is_deleted = 0 AND li.value IN :values""",
+        "duplicate_check": f"""
+            SELECT 1 FROM {SCHEMA}.list_items
+            WHERE list_id = :list_id AND value = :value AND is_deleted = 0""",
+    },
+    "after": {
+        "check_value": f"""
+            SELECT DISTINCT value FROM {SCHEMA}.list_items
+            WHERE list_type = :list_type AND is_deleted = 0 AND value IN :values""",
+        "duplicate_check": f"""
+            SELECT 1 FROM {SCHEMA}.list_items
+            WHERE list_id = :list_id AND value = :value AND is_deleted = 0""",
+    },
+}
+
+
+def plan_nodes(plan):
+    """Flatten an EXPLAIN (FORMAT JSON) plan into (node type, relation, index) tuples."""
+    nodes = [(plan["Node Type"], plan.get("Relation Name"), plan.get("Index Name"))]
+    for child in plan.get("Plans", []):
+        nodes.extend(plan_nodes(child))
+    return nodes
+
+
+def explain(connection, sql, params):
+    statement = text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}")
+    if "values" in params:
+        statement = statement.bindparams(bindparam("values", expanding=True))
+    raw = connection.execute(statement, params).scalar()
+    result = (json.loads(raw) if isinstance(raw, str) else raw)[0]
+    return result["Execution Time"], plan_nodes(result["Plan"])
+
+
+def sample_params(connection, args):
+    hits = connection.execute(text(
+        f"SELECT list_id, list_type, value FROM {SCHEMA}.list_items WHERE is_deleted = 0 "
+        f"ORDER BY random() LIMIT :n"), {"n": args.samples}).all()
+    params = []
+    for index, (list_id, list_type, value) in enumerate(hits):
+        if index % 2:
+            value = f"miss{random.getrandbits(64):x}"
+        params.append({"list_id": list_id, "list_type": list_type, "value": value,
+                       "values": [value] + [f"miss{random.getrandbits(64):x}" for _ in range(args.batch - 1)]})
+    return params
+
+
+def run_phase(connection, phase, params):
+    report = {}
+    for name, sql in QUERIES[phase].items():
+        timings, scans = [], set()
+        for sample in params:
+            sample = {key: sample[key] for key in sample if f":{key}" in sql}
+            elapsed, nodes = explain(connection, sql, sample)
+            timings.append(elapsed)
+            scans.update((node, index) for node, relation, index in nodes if relation == "list_items")
+        report[name] = {
+            "median_ms": round(statistics.median(timings), 3),
+            "p95_ms": round(sorted(timings)[int(0.95 * (len(timings) - 1))], 3),
+            "list_items_scans": sorted(f"{node} ({index})" if index else node for node, index in scans),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--lists", type=int, default=200)
+    parser.add_argument("--types", type=int, default=4)
+    parser.add_argument("--samples", type=int, default=50, help="queries per measurement")
+    parser.add_argument("--batch", type=int, default=100, help="values per check_values IN list")
+    parser.add_argument("--fill-batch", type=int, default=1_000_000)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch schema")
+    args = parser.parse_args()
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        try:
+            started = time.monotonic()
+            for statement in SETUP:
+                connection.execute(text(statement))
+            connection.execute(text(FILL_LISTS), {"lists": args.lists, "types": args.types})
+            for start in range(0, args.rows, args.fill_batch):
+                stop = min(start + args.fill_batch, args.rows)
+                connection.execute(text(FILL_ITEMS), {"start": start, "stop": stop, "lists": args.lists})
+            connection.execute(text(f"ANALYZE {SCHEMA}.list_items"))
+            print(f"Loaded {args.rows} rows in {time.monotonic() - started:.1f}s")
+
+            params = sample_params(connection, args)
+            before = run_phase(connection, "before", params)
+
+            started = time.monotonic()
+            for statement in MIGRATION_INDEXES:
+                connection.execute(text(statement))
+            connection.execute(text(f"ANALYZE {SCHEMA}.list_items"))
+            print(f"Built 0002 indexes in {time.monotonic() - started:.1f}s")
+            after = run_phase(connection, "after", params)
+
+            print(json.dumps({"before": before, "after": after}, indent=2))
+            seq_scans = [name for name, report in after.items()
+                         if any(scan.startswith("Seq Scan") for scan in report["list_items_scans"])]
+            if seq_scans:
+                raise SystemExit(f"Sequential scan of list_items after migration in: {', '.join(seq_scans)}")
+        finally:
+            if not args.keep:
+                connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/logging_overhead.py
+"""
+Per-request cost of the service's action logging, before and after the queued JSON logger.
+
+"before" rebuilds the old setup: log_action formats an f-string with a timestamp on every call
+and the logger writes synchronously to a console handler and a TimedRotatingFileHandler.
+"after" is LoggingService.log_action: sampling for check_value, a structured record put on
+a queue, and formatting and file I/O on the listener thread.
+
+Both write to a temporary directory; console output goes to /dev/null. The figure that
+matters is microseconds per call on the request thread; "drain_seconds" is how long the
+writer thread then needed to catch up.
+
+    python -m benchmarks.logging_overhead --calls 100000 --check-sample-rate 0.01
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime
+from logging.handlers import TimedRotatingFileHandler
+
+from app.utils.logging_service import ActionSampler, LoggingService
+
+
+def old_logger(log_dir, stream):
+    logger = logging.getLogger("bench_before")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    log_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    for handler in (logging.StreamHandler(stream), TimedRotatingFileHandler(os.path.join(log_dir, "before.log"),
+                                                                           when="midnight", interval=1)):
+        handler.setFormatter(log_format)
+        logger.addHandler(handler)
+    return logger
+
+
+def old_log_action(logger, action, user, details):
+    timestamp = datetime.utcnow().isoformat()
+    logger.info(f"{timestamp} - User: {user}, Action: {action}, Details: {details}")
+
+
+def timed(calls, function):
+    started = time.perf_counter()
+    for index in range(calls):
+        function(index)
+    return round(1e6 * (time.perf_counter() - started) / calls, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=100000)
+    parser.add_argument("--check-sample-rate", type=float, default=0.01)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as log_dir, open(os.devnull, "w") as devnull, \
+            contextlib.redirect_stderr(devnull):
+        before = old_logger(log_dir, devnull)
+        cwd = os.getcwd()
+        os.chdir(log_dir)  # LoggingService writes under ./logs
+        try:
+            after = LoggingService(log_file_name="after.log", log_format="json", queue_size=args.calls * 2,
+                                   name="bench_after")
+        finally:
+            os.chdir(cwd)
+        after.sampler = ActionSampler({"check_value": args.check_sample_rate})
+
+        report = {"before_us_per_call": {}, "after_us_per_call": {}}
+        report["before_us_per_call"]["check_value"] = timed(args.calls, lambda i: old_log_action(
+            before, "check_value", "system", f"Checked value 'value{i}' in list 'blacklist'"))
+        report["before_us_per_call"]["add_value"] = timed(args.calls, lambda i: old_log_action(
+            before, "add_value", "alice", f"Added value 'value{i}' to list '1'"))
+
+        report["after_us_per_call"]["check_value"] = timed(args.calls, lambda i: after.log_action(
+            "check_value", "system", list_type="blacklist", value=f"value{i}"))
+        report["after_us_per_call"]["add_value"] = timed(args.calls, lambda i: after.log_action(
+            "add_value", "alice", list_id=1, value=f"value{i}"))
+
+        started = time.perf_counter()
+        after.close()
+        report["after_drain_seconds"] = round(time.perf_counter() - started, 3)
+        report["after_dropped"] = after.stats()["dropped"]
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
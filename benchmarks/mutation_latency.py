@@ -0,0 +1,128 @@
+# benchmarks/mutation_latency.py
+"""
+Latency of single-value mutations on the Redis list sets.
+
+"check_then_act" is the sequence the services used before: SISMEMBER, then the bulk add or
+remove script (an edit checked both values, then removed and added). "script" is the single
+call now made: add_member, rename_member or delete_member. Each operation is timed over
+--ops calls on one thread and reported as p50/p99 microseconds with its round trips.
+
+"race" then has --threads threads mutate the same value at once, --rounds times, and counts
+the rounds in which more than one of them reported success. Only the check-then-act sequence
+can do that.
+
+Runs against the Redis configured in .env, or an in-memory fakeredis server with --fake.
+The benchmark works on a fresh set key and deletes it when done.
+
+    python -m benchmarks.mutation_latency --ops 5000 --threads 8 --rounds 200
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+
+from benchmarks.baselines import percentile
+
+
+def timed(ops, call):
+    samples = []
+    for index in range(ops):
+        started = time.perf_counter()
+        call(index)
+        samples.append(1e6 * (time.perf_counter() - started))
+    return {"p50_us": round(percentile(samples, 50), 1), "p99_us": round(percentile(samples, 99), 1)}
+
+
+def race(threads, rounds, call):
+    """Rounds in which more than one of `threads` concurrent calls on one value succeeded."""
+    double = 0
+    for round_index in range(rounds):
+        barrier = threading.Barrier(threads)
+        wins = []
+
+        def run():
+            barrier.wait()
+            if call(round_index):
+                wins.append(1)
+
+        workers = [threading.Thread(target=run) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        double += len(wins) > 1
+    return double
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ops", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--fake", action="store_true", help="Use an in-memory fakeredis server.")
+    args = parser.parse_args()
+
+    if args.fake:
+        from benchmarks.standins import install_redis
+        install_redis()
+    from app.utils.list_digest import digest_key
+    from app.utils.redis_cache import RedisCache, list_set_key
+
+    cache = RedisCache()
+    list_type = "bench" + uuid.uuid4().hex[:8]
+    key, tombstone = list_set_key(list_type), f"list_deleted:{list_type}:"
+
+    def check_then_add(value):
+        if cache.sismember(key, value):
+            return False
+        cache.add_members(key, [value])
+        return True
+
+    def check_then_delete(value):
+        if not cache.sismember(key, value):
+            return False
+        cache.remove_members(key, [value])
+        return True
+
+    def check_then_rename(old, new):
+        if cache.sismember(key, new) or not cache.sismember(key, old):
+            return False
+        cache.remove_members(key, [old])
+        cache.add_members(key, [new])
+        return True
+
+    def script_delete(value):
+        return cache.delete_member(key, tombstone + value, value, 30) == "removed"
+
+    try:
+        ops = args.ops
+        report = {
+            "check_then_act": {
+                "add": {**timed(ops, lambda i: check_then_add(f"a{i}")), "round_trips": 2},
+                "rename": {**timed(ops, lambda i: check_then_rename(f"a{i}", f"b{i}")), "round_trips": 4},
+                "delete": {**timed(ops, lambda i: check_then_delete(f"b{i}")), "round_trips": 2},
+            },
+            "script": {
+                "add": {**timed(ops, lambda i: cache.add_member(key, f"c{i}")), "round_trips": 1},
+                "rename": {**timed(ops, lambda i: cache.rename_member(key, tombstone + f"c{i}", f"c{i}", f"d{i}", 30)
+                                   == "renamed"), "round_trips": 1},
+                "delete": {**timed(ops, lambda i: script_delete(f"d{i}")), "round_trips": 1},
+            },
+        }
+
+        threads, rounds = args.threads, args.rounds
+        report["race"] = {"threads": threads, "rounds": rounds, "rounds_with_several_winners": {
+            "check_then_act_add": race(threads, rounds, lambda r: check_then_add(f"e{r}")),
+            "script_add": race(threads, rounds, lambda r: cache.add_member(key, f"f{r}")),
+            "check_then_act_delete": race(threads, rounds, lambda r: check_then_delete(f"e{r}")),
+            "script_delete": race(threads, rounds, lambda r: script_delete(f"f{r}")),
+        }}
+        print(json.dumps(report, indent=2))
+    finally:
+        for leftover in [key, digest_key(key)] + list(cache.redis.scan_iter(match=f"{tombstone}*")):
+            cache.delete(leftover)
+
+
+if __name__ == "__main__":
+    main()
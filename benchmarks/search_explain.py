@@ -0,0 +1,169 @@
+# benchmarks/search_explain.py
+"""
+EXPLAIN ANALYZE of value search without search indexes, with those of migration 0003, and
+with the list-scoped trigram index of 0005.
+
+Builds a scratch copy of list_items holding 10M values by default (random 16-character hex
+strings, 10% soft-deleted) spread over --lists lists, with the 0002 indexes, then times the
+queries of Database.search_list_items on list 1: a prefix search, a prefix search resuming
+from a cursor deep inside the matches, and the same two for a substring search. Each phase
+reports how many rows the list_items nodes read and then discarded (Rows Removed by Filter
+or by Index Recheck), which is where the matches of other lists show up when the trigram
+index does not cover list_id. After 0005 no query may sequentially scan list_items and the
+substring searches must use the list-scoped index.
+
+Runs against the Postgres configured in .env (pg_trgm must be available); the scratch schema
+is dropped afterwards unless --keep is given.
+
+    python -m benchmarks.search_explain --rows 10000000 --lists 10 --prefix-length 4 --limit 100
+"""
+import argparse
+import json
+import statistics
+import time
+
+from sqlalchemy import text
+
+from app.db_setup import engine
+from benchmarks.list_items_explain import plan_nodes
+
+SCHEMA = "bench_search"
+
+SETUP = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS btree_gin",
+    f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE",
+    f"CREATE SCHEMA {SCHEMA}",
+    f"""CREATE TABLE {SCHEMA}.list_items (
+        id serial PRIMARY KEY, list_id integer, list_type varchar, value varchar,
+        is_deleted integer DEFAULT 0, created_by varchar, comment varchar)""",
+]
+
+FILL_ITEMS = f"""
+INSERT INTO {SCHEMA}.list_items (list_id, list_type, value, is_deleted, created_by)
+SELECT 1 + n % :lists, 'bench', upper(substr(md5(n::text), 1, 16)), CASE WHEN n % 10 = 0 THEN 1 ELSE 0 END, 'bench'
+FROM generate_series(:start, :stop - 1) AS n
+"""
+
+LOOKUP_INDEXES = [
+    f"CREATE UNIQUE INDEX ON {SCHEMA}.list_items (list_id, value) WHERE is_deleted = 0",
+    f"CREATE INDEX ON {SCHEMA}.list_items (list_type, value) WHERE is_deleted = 0",
+]
+
+LIST_TRIGRAM_INDEX = "bench_list_value_trgm"
+
+# Indexes added by each migration, applied in order
+SEARCH_INDEXES = {
+    "0003": [
+        f'CREATE INDEX ON {SCHEMA}.list_items (list_id, value COLLATE "C") WHERE is_deleted = 0',
+        f"CREATE INDEX bench_value_trgm ON {SCHEMA}.list_items USING gin (value gin_trgm_ops) WHERE is_deleted = 0",
+    ],
+    "0005": [
+        f"""CREATE INDEX {LIST_TRIGRAM_INDEX} ON {SCHEMA}.list_items
+            USING gin (list_id, value gin_trgm_ops) WHERE is_deleted = 0""",
+        f"DROP INDEX {SCHEMA}.bench_value_trgm",
+    ],
+}
+
+SELECT = f"SELECT id, value, comment, created_by FROM {SCHEMA}.list_items WHERE list_id = 1 AND is_deleted = 0"
+
+QUERIES = {
+    "prefix": f"""{SELECT} AND value COLLATE "C" LIKE :pattern
+        ORDER BY value COLLATE "C" LIMIT :limit""",
+    "prefix_next_page": f"""{SELECT} AND value COLLATE "C" LIKE :pattern AND value COLLATE "C" > :after
+        ORDER BY value COLLATE "C" LIMIT :limit""",
+    "contains": f"{SELECT} AND value LIKE :fragment ORDER BY id LIMIT :limit",
+    "contains_next_page": f"{SELECT} AND value LIKE :fragment AND id > :after_id ORDER BY id LIMIT :limit",
+}
+
+
+def sample_params(connection, args):
+    rows = connection.execute(text(
+        f"SELECT id, value FROM {SCHEMA}.list_items WHERE list_id = 1 AND is_deleted = 0 ORDER BY random() LIMIT :n"),
+        {"n": args.samples}).all()
+    return [{"pattern": value[:args.prefix_length] + "%", "after": value,
+             "fragment": f"%{value[5:5 + args.fragment_length]}%", "after_id": row_id, "limit": args.limit + 1}
+            for row_id, value in rows]
+
+
+def rows_removed(plan):
+    """Rows list_items nodes of an EXPLAIN ANALYZE plan read and then threw away."""
+    removed = 0
+    if plan.get("Relation Name") == "list_items":
+        removed += plan.get("Rows Removed by Filter", 0) + plan.get("Rows Removed by Index Recheck", 0)
+    return removed + sum(rows_removed(child) for child in plan.get("Plans", []))
+
+
+def run_phase(connection, params):
+    report = {}
+    for name, sql in QUERIES.items():
+        timings, scans, removed = [], set(), []
+        for sample in params:
+            raw = connection.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"),
+                                     {key: sample[key] for key in sample if f":{key}" in sql}).scalar()
+            result = (json.loads(raw) if isinstance(raw, str) else raw)[0]
+            timings.append(result["Execution Time"])
+            scans.update((node, index) for node, relation, index in plan_nodes(result["Plan"])
+                         if relation == "list_items")
+            removed.append(rows_removed(result["Plan"]))
+        report[name] = {
+            "median_ms": round(statistics.median(timings), 3),
+            "p95_ms": round(sorted(timings)[int(0.95 * (len(timings) - 1))], 3),
+            "median_rows_removed": statistics.median(removed),
+            "list_items_scans": sorted(f"{node} ({index})" if index else node for node, index in scans),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--lists", type=int, default=10, help="lists the rows are spread over")
+    parser.add_argument("--samples", type=int, default=50, help="queries per measurement")
+    parser.add_argument("--limit", type=int, default=100, help="page size")
+    parser.add_argument("--prefix-length", type=int, default=4)
+    parser.add_argument("--fragment-length", type=int, default=4)
+    parser.add_argument("--fill-batch", type=int, default=1_000_000)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch schema")
+    args = parser.parse_args()
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        try:
+            started = time.monotonic()
+            for statement in SETUP:
+                connection.execute(text(statement))
+            for start in range(0, args.rows, args.fill_batch):
+                connection.execute(text(FILL_ITEMS), {"start": start, "stop": min(start + args.fill_batch, args.rows),
+                                                      "lists": args.lists})
+            for statement in LOOKUP_INDEXES:
+                connection.execute(text(statement))
+            connection.execute(text(f"ANALYZE {SCHEMA}.list_items"))
+            print(f"Loaded {args.rows} rows in {time.monotonic() - started:.1f}s")
+
+            params = sample_params(connection, args)
+            phases = {"none": run_phase(connection, params)}
+            for migration, statements in SEARCH_INDEXES.items():
+                started = time.monotonic()
+                for statement in statements:
+                    connection.execute(text(statement))
+                connection.execute(text(f"ANALYZE {SCHEMA}.list_items"))
+                print(f"Built {migration} indexes in {time.monotonic() - started:.1f}s")
+                phases[migration] = run_phase(connection, params)
+
+            print(json.dumps(phases, indent=2))
+            after = phases["0005"]
+            seq_scans = [name for name, report in after.items()
+                         if any(scan.startswith("Seq Scan") for scan in report["list_items_scans"])]
+            if seq_scans:
+                raise SystemExit(f"Sequential scan of list_items after migration in: {', '.join(seq_scans)}")
+            unscoped = [name for name in ("contains", "contains_next_page")
+                        if not any(LIST_TRIGRAM_INDEX in scan for scan in after[name]["list_items_scans"])]
+            if unscoped:
+                raise SystemExit(f"Substring search not served by {LIST_TRIGRAM_INDEX} in: {', '.join(unscoped)}")
+        finally:
+            if not args.keep:
+                connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+# benchmarks/service_suite.py
+"""
+Service-layer benchmark suite with regression thresholds.
+
+Runs each case sequentially on one thread against local stand-ins (see benchmarks/standins.py:
+in-memory Redis, a local Postgres, Celery on an in-memory broker) and reports throughput and
+p50/p99 latency per call:
+
+    service.check_value.local_hit   answered by the in-process cache
+    service.check_value.redis_hit   L1 disabled, answered by the Redis set
+    service.check_value.miss        absent value, turned away by the Bloom filter
+    service.check_value.miss_db     absent value, Bloom filter disabled so Postgres answers
+    service.add_value               new value: duplicate checks, cache writes, write-behind submit
+    service.bulk_add_values         --batch new values per call
+    service.bulk_delete_values      --batch existing values per call
+    task.bulk_add_task              the task body run in-process, --task-batch new values per call
+    gateway.*                       the same paths through TestClient, with bearer auth
+
+Results are compared with benchmarks/baselines.json and the run exits 1 when a case regresses
+past its tolerance. Baselines are machine-specific: record them on the machine that will run
+the comparison, after checking the numbers are sane.
+
+    python -m benchmarks.service_suite
+    python -m benchmarks.service_suite --only service.check_value --scale 0.2
+    python -m benchmarks.service_suite --update-baselines
+
+Rate limiting and notifications are turned off and LOG_LEVEL defaults to WARNING, unless set
+in the environment.
+"""
+import argparse
+import os
+import time
+
+# Read by app.config, so set before anything from app is imported
+os.environ.setdefault("RATE_LIMIT_MODE", "off")
+os.environ.setdefault("NOTIFY_ENABLED", "False")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("LOG_FILE", "")
+
+from benchmarks import baselines, standins
+
+standins.install_redis()  # before any app module builds a Redis client
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api_gateway import router
+from app.container import container
+from app.services.list_management_service import ListManagementService
+from app.services.write_behind import write_behind
+from app.tasks.celery_tasks import bulk_add_task
+from app.utils.auth import create_access_token
+from app.utils.bloom_filter import BloomFilter, bloom_filter
+from app.utils.local_cache import LocalCache
+
+
+class Case:
+    def __init__(self, name, call, calls):
+        self.name = name
+        self.call = call
+        self.calls = calls
+
+
+def run_case(case, warmup):
+    for _ in range(warmup):
+        case.call()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(case.calls):
+        call_started = time.perf_counter()
+        case.call()
+        latencies.append(time.perf_counter() - call_started)
+    return baselines.summarize(latencies, time.perf_counter() - started)
+
+
+def expect(result, check):
+    """Fail the run on a wrong answer: a fast error path is not a benchmark result."""
+    if not check(result):
+        raise SystemExit(f"Unexpected result: {result}")
+    return result
+
+
+def cycle(values):
+    while True:
+        yield from values
+
+
+def build_cases(data, client, token, args):
+    def calls(count):
+        return max(1, int(count * args.scale))
+
+    db, redis_cache, role = container.database, container.redis_cache, "admin"
+    reads = cycle(data.seeded[:len(data.seeded) // 2])
+    # Deleted values come from the second half, which nothing else reads
+    deletes = iter(data.seeded[len(data.seeded) // 2:])
+    hot = cycle(data.seeded[:100])
+
+    local = ListManagementService(db=db, redis_client=redis_cache, local_cache=LocalCache())
+    no_l1 = ListManagementService(db=db, redis_client=redis_cache, local_cache=LocalCache(enabled=False))
+    no_bloom = ListManagementService(db=db, redis_client=redis_cache, local_cache=LocalCache(enabled=False),
+                                     bloom_filter=BloomFilter(enabled=False))
+    headers = {"Authorization": f"Bearer {token}"}
+    list_type, list_id = data.list_type, data.list_id
+
+    def ok(response):
+        return expect(response, lambda r: r.status_code == 200)
+
+    return [
+        Case("service.check_value.local_hit",
+             lambda: expect(local.check_value(list_type, next(hot), "viewer"), lambda r: r is True), calls(20000)),
+        Case("service.check_value.redis_hit",
+             lambda: expect(no_l1.check_value(list_type, next(reads), "viewer"), lambda r: r is True), calls(5000)),
+        Case("service.check_value.miss",
+             lambda: expect(no_l1.check_value(list_type, data.new_values()[0], "viewer"), lambda r: r is False),
+             calls(5000)),
+        Case("service.check_value.miss_db",
+             lambda: expect(no_bloom.check_value(list_type, data.new_values()[0], "viewer"), lambda r: r is False),
+             calls(2000)),
+        Case("service.add_value",
+             lambda: expect(no_l1.add_value(list_id, data.new_values()[0], "benchmark", "benchmark", role),
+                            lambda r: "error" not in r), calls(2000)),
+        Case("service.bulk_add_values",
+             lambda: expect(no_l1.bulk_add_values(list_id, data.new_values(args.batch), "benchmark", "benchmark",
+                                                  role), lambda r: "errors" not in r), calls(200)),
+        Case("service.bulk_delete_values",
+             lambda: expect(no_l1.bulk_delete_values(list_id, [next(deletes) for _ in range(args.batch)], role),
+                            lambda r: "errors" not in r), calls(100)),
+        Case("task.bulk_add_task",
+             lambda: expect(bulk_add_task(list_id, data.new_values(args.task_batch), "benchmark", "benchmark", role),
+                            lambda r: r["status"] == "completed"), calls(20)),
+        Case("gateway.check_value",
+             lambda: ok(client.request("GET", f"/api/check/{list_type}", json=next(reads), headers=headers)),
+             calls(2000)),
+        Case("gateway.check_values",
+             lambda: ok(client.post(f"/api/check/{list_type}/batch",
+                                    json={"values": [next(reads) for _ in range(args.batch)]}, headers=headers)),
+             calls(500)),
+        Case("gateway.add_value",
+             lambda: ok(client.post("/api/add", json={"list_id": list_id, "value": data.new_values()[0]},
+                                    headers=headers)), calls(1000)),
+        Case("gateway.bulk_add",
+             lambda: ok(client.post("/api/bulk-add", json={"list_id": list_id, "values": data.new_values(args.batch)},
+                                    headers=headers)), calls(500)),
+    ]
+
+
+def report(name, result, baseline):
+    line = (f"{name:<32} calls={result['calls']:<6} {result['ops_per_second']:>10.1f} ops/s  "
+            f"p50={result['p50_ms']:8.3f}ms  p99={result['p99_ms']:8.3f}ms")
+    if baseline:
+        line += f"  (baseline {baseline['ops_per_second']:.1f} ops/s, p99 {baseline['p99_ms']:.3f}ms)"
+    print(line, flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", action="append", default=[], help="Run cases whose name starts with this.")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplies the number of calls of every case.")
+    parser.add_argument("--warmup", type=float, default=0.1, help="Warm-up calls, as a fraction of the calls.")
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--task-batch", type=int, default=1000)
+    parser.add_argument("--seed-size", type=int, default=50000)
+    parser.add_argument("--baselines", default=baselines.BASELINES_FILE)
+    parser.add_argument("--update-baselines", action="store_true")
+    args = parser.parse_args()
+
+    standins.use_memory_broker()
+    stored = baselines.load(args.baselines)
+    data = standins.BenchmarkList(container.database, container.redis_cache, args.seed_size).create()
+    results = {}
+    try:
+        bloom_filter.rebuild(data.list_type, data.seeded)
+        app = FastAPI()
+        app.include_router(router, prefix="/api")
+        with TestClient(app) as client:
+            token = create_access_token({"sub": "test_user"})
+            for case in build_cases(data, client, token, args):
+                if args.only and not any(case.name.startswith(prefix) for prefix in args.only):
+                    continue
+                results[case.name] = run_case(case, int(case.calls * args.warmup))
+                report(case.name, results[case.name], stored["cases"].get(case.name))
+    finally:
+        # Pending write-behind rows must land before their list is deleted
+        write_behind.close()
+        data.drop()
+
+    if args.update_baselines:
+        baselines.save(results, stored, args.baselines)
+        print(f"Baselines written to {args.baselines}")
+        return
+    regressions = baselines.compare(results, stored)
+    missing = [name for name in results if name not in stored["cases"]]
+    if missing:
+        print(f"No baseline for: {', '.join(missing)}")
+    if regressions:
+        print("Regressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/standins.py
+"""
+Local stand-ins for the benchmark suite.
+
+Redis is replaced by fakeredis (with Lua, for the list digest scripts): one in-memory server
+behind the process-wide sync and asyncio pools, so every RedisCache, Bloom filter and limiter
+in the process uses it. install_redis() must run before any app module builds a Redis client.
+
+Postgres stays real, because the write paths rely on COPY, ON CONFLICT and partial indexes;
+point DB_* at a local throwaway database, e.g. `docker compose up -d db`. The suite creates
+its own list under a fresh list type and deletes it, and every row it wrote, when done.
+
+Celery publishes to kombu's in-memory transport, so enqueueing costs what it costs in
+production minus the broker round trip, and nothing is consumed.
+"""
+import uuid
+
+import fakeredis
+import fakeredis.aioredis
+
+from app.config import settings
+from app.utils.connection_pools import (
+    AsyncTimedBlockingConnectionPool, TimedBlockingConnectionPool, use_redis_pools,
+)
+
+
+def install_redis():
+    """Back the process-wide Redis pools with one in-memory server and return it."""
+    server = fakeredis.FakeServer()
+    options = {"server": server, "max_connections": settings.REDIS_MAX_CONNECTIONS,
+               "timeout": settings.REDIS_POOL_TIMEOUT}
+    use_redis_pools(TimedBlockingConnectionPool(connection_class=fakeredis.FakeConnection, **options),
+                    AsyncTimedBlockingConnectionPool(connection_class=fakeredis.aioredis.FakeConnection, **options))
+    return server
+
+
+def use_memory_broker():
+    from app.tasks.celery_tasks import celery
+    celery.conf.broker_url = "memory://"
+    celery.conf.result_backend = None
+    celery.conf.task_ignore_result = True
+
+
+class BenchmarkList:
+    """A list of a fresh type, seeded into Postgres and the Redis set, removed again by drop()."""
+
+    def __init__(self, db, redis_cache, seed_size):
+        self.db = db
+        self.redis_cache = redis_cache
+        self.list_type = "bench" + uuid.uuid4().hex[:8]
+        self.seeded = [f"seed{index}" for index in range(seed_size)]
+        self.list_id = None
+        self._counter = 0
+
+    def create(self, chunk_size=10000):
+        from app.database import session_scope
+        from app.models import List
+        from app.utils.redis_cache import list_set_key
+
+        self.db.create_tables()
+        with session_scope() as session:
+            list_obj = List(name=f"benchmark {self.list_type}", type=self.list_type, is_deleted=0)
+            session.add(list_obj)
+            session.flush()
+            self.list_id = list_obj.id
+        for start in range(0, len(self.seeded), chunk_size):
+            chunk = self.seeded[start:start + chunk_size]
+            self.db.bulk_insert_values(self.list_id, chunk, "benchmark seed", "benchmark")
+            self.redis_cache.add_members(list_set_key(self.list_type), chunk)
+        return self
+
+    def new_values(self, count=1):
+        """Values never used before in this run."""
+        values = [f"new{self._counter + index}" for index in range(count)]
+        self._counter += count
+        return values
+
+    def drop(self):
+        from sqlalchemy import delete
+        from app.database import session_scope
+        from app.models import List, ListItem
+
+        if self.list_id is None:
+            return
+        with session_scope() as session:
+            session.execute(delete(ListItem).where(ListItem.list_id == self.list_id))
+            session.execute(delete(List).where(List.id == self.list_id))
+        self.list_id = None
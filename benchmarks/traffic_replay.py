@@ -0,0 +1,194 @@
+# benchmarks/traffic_replay.py
+"""
+Replay captured gateway traffic (see app/utils/traffic_capture.py) against a running app.
+
+Requests are sent open-loop at their captured arrival times, compressed by --speed: 2.0 sends
+the same sequence at twice the original rate. --copies sends every request that many times,
+spread evenly over the gap to the next one, which multiplies concurrency while keeping the
+shape of the load; with a 1% capture, --copies 100 approximates the full original volume.
+
+Latency is measured from each request's scheduled time, so time spent waiting behind
+--max-in-flight or a slow server counts. "lag" is how late requests left the generator; when
+its p99 grows, the generator itself could not keep up. Requests whose bodies were too large
+to capture are skipped. Each route is reported with its captured p50/p99 for comparison.
+
+    uvicorn app.app:app --port 8000 &
+    python -m benchmarks.traffic_replay logs/traffic.ndjson --speed 2 --copies 10
+    python -m benchmarks.traffic_replay logs/traffic.ndjson --route /api/check --json report.json
+"""
+import argparse
+import asyncio
+import base64
+import json
+import time
+from datetime import timedelta
+
+import httpx
+
+from benchmarks.baselines import percentile
+
+
+def load_records(paths, routes, limit):
+    records, skipped = [], 0
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if record.get("body_truncated"):
+                    skipped += 1
+                    continue
+                if routes and not (record.get("route") or record["path"]).startswith(tuple(routes)):
+                    continue
+                records.append(record)
+    records.sort(key=lambda record: record["ts"])
+    return records[:limit] if limit else records, skipped
+
+
+def schedule(records, speed, copies):
+    """(seconds from start, record) for every request to send, in order."""
+    if not records:
+        return []
+    first = records[0]["ts"]
+    times = [(record["ts"] - first) / speed for record in records]
+    plan = []
+    for index, (at, record) in enumerate(zip(times, records)):
+        gap = times[index + 1] - at if index + 1 < len(times) else 0.0
+        plan.extend((at + copy * gap / copies, record) for copy in range(copies))
+    plan.sort(key=lambda item: item[0])
+    return plan
+
+
+def build_request(record, auth_headers):
+    url = record["path"] + (f"?{record['query']}" if record.get("query") else "")
+    headers = {**record.get("headers", {}), **auth_headers}
+    if "body" in record:
+        content = record["body"].encode("utf-8")
+    elif "body_b64" in record:
+        content = base64.b64decode(record["body_b64"])
+    else:
+        content = None
+    return record["method"], url, headers, content
+
+
+class RouteStats:
+    def __init__(self):
+        self.latencies = []
+        self.lags = []
+        self.captured = []
+        self.statuses = {}
+        self.failures = 0
+
+    def summary(self, elapsed):
+        sent = len(self.latencies) + self.failures
+        errors = self.failures + sum(count for status, count in self.statuses.items() if status >= 400)
+        summary = {"requests": sent, "rate": round(sent / elapsed, 1) if elapsed else 0.0,
+                   "error_rate": round(errors / sent, 4) if sent else 0.0, "failures": self.failures,
+                   "statuses": dict(sorted(self.statuses.items()))}
+        for name, samples in (("latency_ms", self.latencies), ("lag_ms", self.lags),
+                              ("captured_ms", self.captured)):
+            if samples:
+                summary[name] = {f"p{pct}": round(percentile(samples, pct), 3) for pct in (50, 90, 99)}
+                summary[name]["max"] = round(max(samples), 3)
+        return summary
+
+
+async def replay(client, plan, auth_headers, max_in_flight):
+    stats = {}
+    slots = asyncio.Semaphore(max_in_flight)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+
+    async def one(record, scheduled):
+        route = stats.setdefault(record.get("route") or record["path"], RouteStats())
+        method, url, headers, content = build_request(record, auth_headers)
+        async with slots:
+            sent = loop.time()
+            try:
+                response = await client.request(method, url, headers=headers, content=content)
+            except httpx.HTTPError:
+                route.failures += 1
+                return
+        done = loop.time()
+        route.latencies.append(1000 * (done - scheduled))
+        route.lags.append(1000 * (sent - scheduled))
+        if "duration_ms" in record:
+            route.captured.append(record["duration_ms"])
+        route.statuses[response.status_code] = route.statuses.get(response.status_code, 0) + 1
+
+    tasks = []
+    for at, record in plan:
+        delay = started + at - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(record, started + at)))
+    await asyncio.gather(*tasks)
+    return stats, loop.time() - started
+
+
+def bearer(args):
+    if args.token:
+        return {"Authorization": f"Bearer {args.token}"}
+    if not args.user:
+        return {}
+    from app.utils.auth import create_access_token
+    return {"Authorization": f"Bearer {create_access_token({'sub': args.user}, expires_delta=timedelta(hours=12))}"}
+
+
+def print_report(report):
+    for name, summary in report["routes"].items():
+        latency = summary.get("latency_ms", {})
+        captured = summary.get("captured_ms", {})
+        print(f"{name:<32} n={summary['requests']:<7} {summary['rate']:>9.1f}/s  "
+              f"p50={latency.get('p50', 0):8.2f}ms  p99={latency.get('p99', 0):8.2f}ms  "
+              f"errors={100 * summary['error_rate']:5.2f}%  "
+              f"(captured p50={captured.get('p50', 0):.2f}ms p99={captured.get('p99', 0):.2f}ms)")
+    overall = report["overall"]
+    print(f"{'overall':<32} n={overall['requests']:<7} {overall['rate']:>9.1f}/s  "
+          f"errors={100 * overall['error_rate']:5.2f}%  lag p99={overall.get('lag_ms', {}).get('p99', 0):.2f}ms  "
+          f"skipped={report['skipped']}")
+
+
+async def main(args):
+    records, skipped = load_records(args.capture, args.route, args.limit)
+    plan = schedule(records, args.speed, args.copies)
+    if not plan:
+        raise SystemExit("Nothing to replay")
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    async with httpx.AsyncClient(base_url=args.target, limits=limits, timeout=args.timeout) as client:
+        stats, elapsed = await replay(client, plan, bearer(args), args.max_in_flight)
+
+    overall = RouteStats()
+    for route in stats.values():
+        overall.latencies += route.latencies
+        overall.lags += route.lags
+        overall.captured += route.captured
+        overall.failures += route.failures
+        for status, count in route.statuses.items():
+            overall.statuses[status] = overall.statuses.get(status, 0) + count
+    report = {
+        "speed": args.speed, "copies": args.copies, "elapsed_seconds": round(elapsed, 3), "skipped": skipped,
+        "overall": overall.summary(elapsed),
+        "routes": {name: route.summary(elapsed) for name, route in sorted(stats.items())},
+    }
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("capture", nargs="+", help="NDJSON capture files written by TrafficCaptureMiddleware.")
+    parser.add_argument("--target", default="http://localhost:8000")
+    parser.add_argument("--speed", type=float, default=1.0, help="Multiple of the captured request rate.")
+    parser.add_argument("--copies", type=int, default=1, help="Times each captured request is sent.")
+    parser.add_argument("--max-in-flight", type=int, default=500)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--route", action="append", default=[], help="Only replay routes starting with this.")
+    parser.add_argument("--limit", type=int, default=0, help="Replay only the first N captured requests.")
+    parser.add_argument("--user", default="test_user", help="Sign a token for this user (needs the app's SECRET_KEY).")
+    parser.add_argument("--token", help="Bearer token to send instead of signing one.")
+    parser.add_argument("--json", help="Also write the report to this file.")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,58 @@
+"""Baseline schema as created by Database.create_tables
+
+Databases created before migrations were introduced already have these tables;
+mark them with `alembic stamp 0001` instead of running this revision.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("username", sa.String()),
+        sa.Column("email", sa.String()),
+        sa.Column("hashed_password", sa.String()),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "lists",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String()),
+        sa.Column("type", sa.String()),
+        sa.Column("is_deleted", sa.Integer()),
+    )
+    op.create_index("ix_lists_id", "lists", ["id"])
+    op.create_index("ix_lists_name", "lists", ["name"])
+    op.create_index("ix_lists_type", "lists", ["type"])
+
+    op.create_table(
+        "list_items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("list_id", sa.Integer(), sa.ForeignKey("lists.id")),
+        sa.Column("value", sa.String()),
+        sa.Column("is_deleted", sa.Integer()),
+        sa.Column("created_by", sa.String()),
+        sa.Column("comment", sa.String()),
+    )
+    op.create_index("ix_list_items_id", "list_items", ["id"])
+
+
+def downgrade():
+    op.drop_table("list_items")
+    op.drop_table("lists")
+    op.drop_table("users")
@@ -0,0 +1,72 @@
+"""Denormalized list_type on list_items and partial indexes over active rows
+
+- list_items.list_type copies lists.type so type lookups no longer join lists.
+- uq_list_items_active_list_value: at most one active row per (list_id, value);
+  this is the conflict target for inserts.
+- ix_list_items_active_type_value: (list_type, value) for check_value(s).
+
+Both indexes only cover is_deleted = 0, so soft-deleted rows never enter a scan.
+The backfill runs in id-range batches and the indexes are built CONCURRENTLY, so
+the table stays writable; duplicates that would violate the unique index are
+soft-deleted first, keeping the oldest row.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH = 100000
+
+
+def upgrade():
+    op.add_column("list_items", sa.Column("list_type", sa.String(), nullable=True))
+
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        low, high = bind.execute(sa.text("SELECT min(id), max(id) FROM list_items")).one()
+        for start in range(low or 0, (high or 0) + 1, BACKFILL_BATCH):
+            bind.execute(
+                sa.text(
+                    "UPDATE list_items li SET list_type = l.type FROM lists l "
+                    "WHERE li.list_id = l.id AND li.id >= :start AND li.id < :stop"
+                ),
+                {"start": start, "stop": start + BACKFILL_BATCH},
+            )
+
+        bind.execute(sa.text(
+            """
+            UPDATE list_items SET is_deleted = 1
+            WHERE id IN (
+                SELECT id FROM (
+                    SELECT id, row_number() OVER (PARTITION BY list_id, value ORDER BY id) AS position
+                    FROM list_items WHERE is_deleted = 0
+                ) ranked
+                WHERE position > 1
+            )
+            """
+        ))
+
+        op.create_index(
+            "uq_list_items_active_list_value", "list_items", ["list_id", "value"], unique=True,
+            postgresql_where=sa.text("is_deleted = 0"), postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_list_items_active_type_value", "list_items", ["list_type", "value"],
+            postgresql_where=sa.text("is_deleted = 0"), postgresql_concurrently=True,
+        )
+        bind.execute(sa.text("ANALYZE list_items"))
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_list_items_active_type_value", table_name="list_items", postgresql_concurrently=True)
+        op.drop_index("uq_list_items_active_list_value", table_name="list_items", postgresql_concurrently=True)
+    op.drop_column("list_items", "list_type")
@@ -0,0 +1,41 @@
+"""Indexes for prefix and substring search over active list values
+
+- ix_list_items_active_list_value_c: (list_id, value COLLATE "C"); serves
+  value LIKE 'abc%' within a list and keyset paging in byte order of value.
+- ix_list_items_active_value_trgm: GIN trigram index on value (pg_trgm);
+  serves value LIKE '%abc%' for fragments of three characters or more.
+
+Both cover only is_deleted = 0 and are built CONCURRENTLY.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_list_items_active_list_value_c", "list_items", ["list_id", sa.text('value COLLATE "C"')],
+            postgresql_where=sa.text("is_deleted = 0"), postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_list_items_active_value_trgm", "list_items", ["value"], postgresql_using="gin",
+            postgresql_ops={"value": "gin_trgm_ops"},
+            postgresql_where=sa.text("is_deleted = 0"), postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_list_items_active_value_trgm", table_name="list_items", postgresql_concurrently=True)
+        op.drop_index("ix_list_items_active_list_value_c", table_name="list_items", postgresql_concurrently=True)
@@ -0,0 +1,33 @@
+"""Index for keyset pagination of a list's items
+
+- ix_list_items_list_id_id: (list_id, id); serves `WHERE list_id = :id AND
+  id > :after ORDER BY id LIMIT n` for any is_deleted filter, so every page of
+  a list costs the same, and the export stream reads in the same order. It is
+  also the first index on the list_items.list_id foreign key.
+
+Built CONCURRENTLY.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_list_items_list_id_id", "list_items", ["list_id", "id"], postgresql_concurrently=True,
+        )
+        op.execute("ANALYZE list_items")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_list_items_list_id_id", table_name="list_items", postgresql_concurrently=True)
@@ -0,0 +1,44 @@
+"""List-scoped trigram index for substring search
+
+- ix_list_items_active_list_value_trgm: GIN (list_id, value gin_trgm_ops) using
+  btree_gin for the integer column; serves `list_id = :id AND value LIKE
+  '%abc%'` from the index alone, so a search no longer collects the matches of
+  every list and rechecks them against list_id.
+- Replaces ix_list_items_active_value_trgm from 0003, which indexed value only.
+
+Both cover only is_deleted = 0 and are built/dropped CONCURRENTLY.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_list_items_active_list_value_trgm", "list_items", ["list_id", "value"], postgresql_using="gin",
+            postgresql_ops={"value": "gin_trgm_ops"},
+            postgresql_where=sa.text("is_deleted = 0"), postgresql_concurrently=True,
+        )
+        op.drop_index("ix_list_items_active_value_trgm", table_name="list_items", postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_list_items_active_value_trgm", "list_items", ["value"], postgresql_using="gin",
+            postgresql_ops={"value": "gin_trgm_ops"},
+            postgresql_where=sa.text("is_deleted = 0"), postgresql_concurrently=True,
+        )
+        op.drop_index("ix_list_items_active_list_value_trgm", table_name="list_items",
+                      postgresql_concurrently=True)
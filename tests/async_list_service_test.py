@@ -0,0 +1,112 @@
+import asyncio
+from collections import namedtuple
+
+import fakeredis
+import fakeredis.aioredis
+import pytest
+
+from app.services.async_list_management_service import AsyncListManagementService
+from app.services.notification_dispatcher import NotificationDispatcher
+from app.services.write_behind import AsyncWriteBehindBuffer, WriteBehindBuffer
+from app.utils.bloom_filter import AsyncBloomFilter
+from app.utils.cache_rehydration import RehydrationGuard
+from app.utils.list_metadata import ListMetadataCache
+from app.utils.local_cache import LocalCache
+from app.utils.pagination import InvalidCursor, encode_cursor
+from app.utils.redis_cache import AsyncRedisCache, list_set_key
+
+Row = namedtuple("Row", ["id", "name", "type"])
+
+
+class FakeAsyncDatabase:
+    """Postgres holding `rows` for the blacklist; every awaited lookup is counted."""
+
+    def __init__(self, rows=()):
+        self.rows = set(rows)
+        self.lookups = 0
+
+    async def get_list_by_id(self, list_id):
+        return Row(list_id, "cards", "blacklist")
+
+    async def check_value_in_list(self, list_type, value):
+        self.lookups += 1
+        return value in self.rows
+
+
+class FakePublisher:
+    def publish(self, channel, message):
+        pass
+
+
+def make_service(db):
+    server = fakeredis.FakeServer()
+    metadata = ListMetadataCache(redis_client=FakePublisher(), enabled=True)
+    metadata.load([(1, "cards", "blacklist")])
+    flusher = WriteBehindBuffer(db=db, redis_client=fakeredis.FakeStrictRedis(server=server),
+                                flush_interval=60, enabled=True)
+    client = fakeredis.aioredis.FakeRedis(server=server)
+    service = AsyncListManagementService(
+        db=db, redis_client=AsyncRedisCache(client=client), notifications=NotificationDispatcher(enabled=False),
+        local_cache=LocalCache(enabled=True, redis_client=FakePublisher()),
+        bloom_filter=AsyncBloomFilter(enabled=False),
+        write_behind=AsyncWriteBehindBuffer(flusher, redis_client=client),
+        rehydration=RehydrationGuard(redis_client=fakeredis.FakeStrictRedis(server=server)), list_metadata=metadata)
+    return service, fakeredis.FakeStrictRedis(server=server)
+
+
+def test_async_add_caches_the_value_and_queues_it():
+    service, client = make_service(FakeAsyncDatabase())
+
+    async def add_twice():
+        return [await service.add_value(1, "acme", "", "alice", "editor") for _ in range(2)]
+
+    first, second = asyncio.run(add_twice())
+    assert first["outcome"] == "added" and second["outcome"] == "duplicate"
+    assert client.sismember(list_set_key("blacklist"), "acme")
+    assert asyncio.run(service.write_behind.pending_action(1, "acme")) == "add"
+
+
+def test_async_delete_of_a_value_only_postgres_has():
+    db = FakeAsyncDatabase(rows={"acme"})
+    service, client = make_service(db)
+
+    async def delete_twice():
+        return [await service.delete_value(1, "acme", "admin") for _ in range(2)]
+
+    first, second = asyncio.run(delete_twice())
+    assert first["outcome"] == "deleted" and second["outcome"] == "not_found"
+    assert asyncio.run(service.write_behind.pending_action(1, "acme")) == "delete"
+
+
+def test_async_check_falls_through_to_postgres_then_caches():
+    db = FakeAsyncDatabase(rows={"acme"})
+    service, client = make_service(db)
+
+    async def check():
+        return [await service.check_value("blacklist", value, "viewer") for value in ("acme", "acme", "other")]
+
+    assert asyncio.run(check()) == [True, True, False]
+    # The first hit is cached in Redis and in process, so only the two misses reached Postgres
+    assert db.lookups == 2
+    assert client.sismember(list_set_key("blacklist"), "acme")
+
+
+def test_streamed_search_is_validated_through_the_public_method():
+    service, _ = make_service(FakeAsyncDatabase())
+    cursor = encode_cursor("ACME7", scope="search", list_id=1, prefix="ACME", contains=None)
+
+    assert asyncio.run(service.prepare_search(1, "viewer", prefix="ACME", cursor=cursor)) == ("ACME", None, "ACME7")
+    with pytest.raises(InvalidCursor):
+        asyncio.run(service.prepare_search(1, "viewer", prefix="OTHER", cursor=cursor))
+
+
+def test_failed_postgres_check_undoes_the_add_and_propagates():
+    class FailingDatabase(FakeAsyncDatabase):
+        async def check_value_in_list(self, list_type, value):
+            raise RuntimeError("connection reset")
+
+    service, client = make_service(FailingDatabase())
+    with pytest.raises(RuntimeError):
+        asyncio.run(service.add_value(1, "acme", "", "alice", "editor"))
+    # The value claimed in Redis before the check is released again
+    assert not client.sismember(list_set_key("blacklist"), "acme")
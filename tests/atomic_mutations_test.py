@@ -0,0 +1,178 @@
+import threading
+from collections import namedtuple
+
+import fakeredis
+from sqlalchemy.exc import IntegrityError
+
+from app.services.list_management_service import ListManagementService
+from app.services.notification_dispatcher import NotificationDispatcher
+from app.services.write_behind import WriteBehindBuffer
+from app.utils.bloom_filter import BloomFilter
+from app.utils.cache_rehydration import RehydrationGuard
+from app.utils.list_digest import compute_digests, digest_key, parse_digest_hash
+from app.utils.list_metadata import ListMetadataCache
+from app.utils.local_cache import LocalCache
+from app.utils.redis_cache import RedisCache, list_set_key
+
+Row = namedtuple("Row", ["id", "name", "type"])
+
+
+class FakeDatabase:
+    """Postgres holding `rows` for the blacklist; flushed mutations are recorded and applied to them."""
+
+    def __init__(self, rows=()):
+        self.rows = set(rows)
+        self.applied = []
+
+    def get_list_by_id(self, list_id):
+        return Row(list_id, "cards", "blacklist")
+
+    def check_value_in_list(self, list_type, value):
+        return value in self.rows
+
+    def check_values_in_list(self, list_type, values):
+        return self.rows.intersection(values)
+
+    def apply_mutations(self, mutations, before_commit=None):
+        if before_commit is not None:
+            before_commit()
+        self.applied.extend(mutations)
+        for mutation in mutations:
+            if mutation["action"] == "add":
+                self.rows.add(mutation["value"])
+            else:
+                self.rows.discard(mutation["value"])
+
+
+class FakePublisher:
+    def publish(self, channel, message):
+        pass
+
+
+def make_service(db=None, client=None):
+    """A service with its own write-behind buffer; services sharing `client` behave like separate workers."""
+    db = db or FakeDatabase()
+    client = client or fakeredis.FakeStrictRedis()
+    metadata = ListMetadataCache(redis_client=FakePublisher(), enabled=True)
+    metadata.load([(1, "cards", "blacklist")])
+    service = ListManagementService(
+        db=db, redis_client=RedisCache(client=client), notifications=NotificationDispatcher(enabled=False),
+        local_cache=LocalCache(enabled=False), bloom_filter=BloomFilter(enabled=False),
+        # Nothing is flushed during the test, so pending mutations stay visible
+        write_behind=WriteBehindBuffer(db=db, redis_client=client, flush_interval=60, enabled=True),
+        rehydration=RehydrationGuard(redis_client=client), list_metadata=metadata)
+    return service, client
+
+
+def race(count, call):
+    barrier = threading.Barrier(count)
+    outcomes = [None] * count
+
+    def run(index):
+        barrier.wait()
+        outcomes[index] = call(index).get("outcome")
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sorted(outcomes)
+
+
+def assert_digest_matches(client):
+    key = list_set_key("blacklist")
+    members = [member.decode() for member in client.smembers(key)]
+    digests, _ = parse_digest_hash(client.hgetall(digest_key(key)))
+    assert digests == compute_digests(members)
+
+
+def test_concurrent_adds_of_one_value_succeed_once():
+    service, client = make_service()
+    outcomes = race(16, lambda index: service.add_value(1, "abc123", "", "alice", "admin"))
+    assert outcomes == ["added"] + ["duplicate"] * 15
+    assert client.sismember(list_set_key("blacklist"), "abc123")
+    assert service.write_behind.stats()["submitted"] == 1
+    assert_digest_matches(client)
+
+
+def test_concurrent_deletes_of_one_value_succeed_once():
+    service, client = make_service(FakeDatabase(rows={"abc123"}))
+    service.redis_client.add_members(list_set_key("blacklist"), ["abc123"])
+    outcomes = race(8, lambda index: service.delete_value(1, "abc123", "admin"))
+    assert outcomes == ["deleted"] + ["not_found"] * 7
+    assert_digest_matches(client)
+
+
+def test_concurrent_edits_to_one_new_value_succeed_once():
+    service, client = make_service()
+    service.redis_client.add_members(list_set_key("blacklist"), ["old0", "old1", "old2", "old3"])
+    outcomes = race(4, lambda index: service.edit_value(1, f"old{index}", "new", "", "alice", "admin"))
+    assert outcomes == ["new_value_exists"] * 3 + ["renamed"]
+    assert client.scard(list_set_key("blacklist")) == 4
+    assert_digest_matches(client)
+
+
+def test_values_only_in_postgres_are_still_found():
+    service, _ = make_service(FakeDatabase(rows={"legacy1"}))
+    assert service.add_value(1, "legacy1", "", "alice", "admin")["outcome"] == "duplicate"
+    assert service.edit_value(1, "legacy1", "fresh1", "", "alice", "admin")["outcome"] == "renamed"
+    assert service.edit_value(1, "ghost1", "fresh2", "", "alice", "admin")["outcome"] == "not_found"
+
+
+def test_concurrent_edits_of_one_uncached_value_succeed_once():
+    service, client = make_service(FakeDatabase(rows={"legacy1"}))
+    outcomes = race(8, lambda index: service.edit_value(1, "legacy1", f"new{index}", "", "alice", "admin"))
+    assert outcomes == ["not_found"] * 7 + ["renamed"]
+    assert client.scard(list_set_key("blacklist")) == 1
+    assert_digest_matches(client)
+
+
+def test_edit_of_a_value_another_worker_just_deleted_is_not_found():
+    db = FakeDatabase(rows={"legacy1"})
+    first, client = make_service(db)
+    second, _ = make_service(db, client)
+    assert first.delete_value(1, "legacy1", "admin")["outcome"] == "deleted"
+    # Postgres still has the row until the first worker flushes; the tombstone rules it out
+    assert second.edit_value(1, "legacy1", "fresh1", "", "alice", "admin")["outcome"] == "not_found"
+    assert not client.sismember(list_set_key("blacklist"), "fresh1")
+
+
+def test_failed_postgres_check_rolls_back_the_cached_add():
+    class FailingDatabase(FakeDatabase):
+        def check_value_in_list(self, list_type, value):
+            raise IntegrityError("SELECT", {}, Exception("connection reset"))
+
+    service, client = make_service(FailingDatabase())
+    assert "error" in service.add_value(1, "abc123", "", "alice", "admin")
+    assert not client.sismember(list_set_key("blacklist"), "abc123")
+    assert_digest_matches(client)
+
+
+def test_reads_before_the_flush_do_not_bring_a_deleted_value_back():
+    db = FakeDatabase(rows={"abc123", "abc456"})
+    service, client = make_service(db)
+    assert service.delete_value(1, "abc123", "admin")["outcome"] == "deleted"
+    assert service.bulk_delete_values(1, ["abc456"], "admin")["status"] == "All values deleted successfully"
+
+    # Postgres still has both rows until the flush; the tombstones keep them out of answers and the cache
+    assert service.check_value("blacklist", "abc123", "viewer") is False
+    assert service.check_values("blacklist", ["abc123", "abc456"], "viewer") == [
+        {"value": "abc123", "exists": False}, {"value": "abc456", "exists": False}]
+    assert client.scard(list_set_key("blacklist")) == 0
+
+    service.write_behind.close()
+    assert db.rows == set()
+    assert service.add_value(1, "abc123", "", "alice", "admin")["outcome"] == "added"
+    assert_digest_matches(client)
+
+
+def test_bulk_add_after_a_delete_follows_the_pending_mutation():
+    db = FakeDatabase(rows={"abc123"})
+    service, client = make_service(db)
+    assert service.delete_value(1, "abc123", "admin")["outcome"] == "deleted"
+
+    assert service.bulk_add_values(1, ["abc123"], "", "alice", "admin")["added_values"] == ["abc123"]
+    service.write_behind.close()
+    assert db.rows == {"abc123"}
+    assert client.sismember(list_set_key("blacklist"), "abc123")
@@ -0,0 +1,93 @@
+import fakeredis
+
+from app.config import settings
+from app.services.list_management_service import ListManagementService
+from app.services.notification_dispatcher import NotificationDispatcher
+from app.utils.bloom_filter import BloomFilter
+from app.utils.cache_rehydration import RehydrationGuard
+from app.utils.local_cache import LocalCache
+from app.utils.redis_cache import RedisCache, list_set_key
+
+
+class CountingRedis(fakeredis.FakeStrictRedis):
+    """fakeredis that counts the commands it is sent."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.commands = []
+
+    def execute_command(self, *args, **options):
+        self.commands.append(args[0])
+        return super().execute_command(*args, **options)
+
+
+class FakeDatabase:
+    """Postgres holding `rows` for the blacklist; every IN query is recorded."""
+
+    def __init__(self, rows=()):
+        self.rows = set(rows)
+        self.queries = []
+
+    def check_values_in_list(self, list_type, values):
+        self.queries.append(list(values))
+        return self.rows.intersection(values)
+
+
+def make_service(db, client, local_cache=None):
+    return ListManagementService(
+        db=db, redis_client=RedisCache(client=client), notifications=NotificationDispatcher(enabled=False),
+        local_cache=local_cache or LocalCache(enabled=False), bloom_filter=BloomFilter(enabled=False),
+        rehydration=RehydrationGuard(redis_client=client))
+
+
+def test_results_come_back_in_request_order_with_per_value_errors():
+    client = CountingRedis()
+    client.sadd(list_set_key("blacklist"), "cached")
+    service = make_service(FakeDatabase(rows={"stored"}), client)
+
+    results = service.check_values("blacklist", ["stored", "bad value", "absent", "cached", "stored"], "viewer")
+
+    assert results == [
+        {"value": "stored", "exists": True},
+        {"value": "bad value", "error": "Value contains invalid characters. Only alphanumeric characters are allowed."},
+        {"value": "absent", "exists": False},
+        {"value": "cached", "exists": True},
+        {"value": "stored", "exists": True},
+    ]
+
+
+def test_hits_take_one_redis_round_trip_and_misses_one_query():
+    client = CountingRedis()
+    client.sadd(list_set_key("blacklist"), *[f"hit{index}" for index in range(50)])
+    db = FakeDatabase(rows={"stored"})
+    service = make_service(db, client)
+    values = [f"hit{index}" for index in range(50)] + ["stored"] + [f"miss{index}" for index in range(49)]
+
+    client.commands.clear()
+    results = service.check_values("blacklist", values, "viewer")
+
+    assert sum(result["exists"] for result in results) == 51
+    assert client.commands.count("SMISMEMBER") == 1 and "SISMEMBER" not in client.commands
+    assert db.queries == [["stored"] + [f"miss{index}" for index in range(49)]]
+    # Values only Postgres had are cached for the next check
+    assert client.sismember(list_set_key("blacklist"), "stored")
+
+
+def test_local_hits_skip_redis_and_postgres():
+    client = CountingRedis()
+    db = FakeDatabase(rows={"stored"})
+    local = LocalCache(maxsize=10, ttl=60, enabled=True, redis_client=client)
+    service = make_service(db, client, local)
+    service.check_values("blacklist", ["stored", "absent"], "viewer")
+
+    client.commands.clear()
+    assert service.check_values("blacklist", ["absent", "stored"], "viewer") == [
+        {"value": "absent", "exists": False}, {"value": "stored", "exists": True}]
+    assert "SMISMEMBER" not in client.commands and len(db.queries) == 1
+
+
+def test_oversized_batches_and_missing_permissions_are_rejected():
+    service = make_service(FakeDatabase(), CountingRedis())
+    too_many = ["v"] * (settings.MAX_BATCH_CHECK_SIZE + 1)
+    assert "error" in service.check_values("blacklist", too_many, "viewer")
+    assert "error" in service.check_values("blacklist", ["v"], "nobody")
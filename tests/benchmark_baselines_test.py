@@ -0,0 +1,30 @@
+from benchmarks.baselines import DEFAULT_TOLERANCE, compare, load, save, summarize
+
+
+def test_summarize_reports_throughput_and_percentiles():
+    result = summarize([0.001] * 98 + [0.010, 0.020], elapsed=0.2)
+    assert result == {"calls": 100, "ops_per_second": 500.0, "p50_ms": 1.0, "p99_ms": 10.0}
+
+
+def test_compare_flags_only_figures_past_their_tolerance():
+    stored = {"tolerance": dict(DEFAULT_TOLERANCE),
+              "cases": {"check": {"ops_per_second": 1000.0, "p50_ms": 1.0, "p99_ms": 4.0}}}
+    within = {"check": {"calls": 10, "ops_per_second": 850.0, "p50_ms": 1.2, "p99_ms": 5.9}}
+    assert compare(within, stored) == []
+
+    slower = {"check": {"calls": 10, "ops_per_second": 700.0, "p50_ms": 1.3, "p99_ms": 5.0}}
+    regressions = compare(slower, stored)
+    assert len(regressions) == 2
+    assert regressions[0].startswith("check: 700.0 ops/s")
+    assert "p50_ms" in regressions[1]
+
+    # Cases without a baseline never fail the run
+    assert compare({"new_case": slower["check"]}, stored) == []
+
+
+def test_save_keeps_cases_that_were_not_run(tmp_path):
+    path = str(tmp_path / "baselines.json")
+    stored = load(path)
+    save({"a": {"calls": 1, "ops_per_second": 1.0, "p50_ms": 1.0, "p99_ms": 1.0}}, stored, path)
+    save({"b": {"calls": 1, "ops_per_second": 2.0, "p50_ms": 1.0, "p99_ms": 1.0}}, load(path), path)
+    assert sorted(load(path)["cases"]) == ["a", "b"]
@@ -0,0 +1,87 @@
+import fakeredis
+
+from app.services.list_management_service import ListManagementService
+from app.services.notification_dispatcher import NotificationDispatcher
+from app.utils.bloom_filter import BloomFilter, optimal_parameters
+from app.utils.cache_rehydration import RehydrationGuard
+from app.utils.local_cache import LocalCache
+from app.utils.redis_cache import RedisCache
+
+MEMBERS = [f"member{index}" for index in range(1000)]
+
+
+class CountingDatabase:
+    """Postgres holding `rows` for every list type; counts the lookups that reach it."""
+
+    def __init__(self, rows=()):
+        self.rows = set(rows)
+        self.lookups = 0
+
+    def check_value_in_list(self, list_type, value):
+        self.lookups += 1
+        return value in self.rows
+
+
+def make_filter(client=None, capacity=1000):
+    return BloomFilter(redis_client=client or fakeredis.FakeStrictRedis(), capacity=capacity,
+                       error_rate=0.01, enabled=True)
+
+
+def test_optimal_parameters_match_textbook_values():
+    bits, hash_count = optimal_parameters(1000000, 0.01)
+    assert 9500000 < bits < 9700000
+    assert hash_count == 7
+
+
+def test_filter_answers_only_once_rebuilt_and_stays_near_its_error_rate():
+    bloom = make_filter()
+    assert bloom.might_contain("blacklist", "member1") is None
+
+    assert bloom.rebuild("blacklist", MEMBERS, batch_size=100)["items"] == 1000
+    assert all(bloom.might_contain_many("blacklist", MEMBERS))
+    absent = bloom.might_contain_many("blacklist", [f"absent{index}" for index in range(5000)])
+    assert absent.count(True) / len(absent) < 0.03
+
+    bloom.invalidate("blacklist")
+    assert bloom.might_contain("blacklist", "member1") is None
+
+
+def test_filter_built_with_other_parameters_is_not_trusted():
+    client = fakeredis.FakeStrictRedis()
+    make_filter(client).rebuild("blacklist", MEMBERS)
+    assert make_filter(client, capacity=5000).might_contain("blacklist", "member1") is None
+
+
+def test_values_added_during_a_rebuild_survive_the_swap():
+    client = fakeredis.FakeStrictRedis()
+    bloom = make_filter(client)
+    bloom.rebuild("blacklist", MEMBERS[:10])
+
+    def stream():
+        yield from MEMBERS[10:20]
+        # Added by a request while the rebuild is still reading Postgres
+        bloom.add("blacklist", ["late"])
+
+    bloom.rebuild("blacklist", stream())
+    assert bloom.might_contain("blacklist", "late") is True
+
+
+def test_check_value_answers_definitely_absent_without_postgres():
+    client = fakeredis.FakeStrictRedis()
+    bloom = make_filter(client)
+    bloom.rebuild("blacklist", MEMBERS)
+    db = CountingDatabase(rows=MEMBERS)
+    service = ListManagementService(
+        db=db, redis_client=RedisCache(client=client), notifications=NotificationDispatcher(enabled=False),
+        local_cache=LocalCache(enabled=False), bloom_filter=bloom, rehydration=RehydrationGuard(redis_client=client))
+
+    absent = [f"absent{index}" for index in range(500)]
+    assert not any(service.check_value("blacklist", value, "viewer") for value in absent)
+    assert service.check_value("blacklist", "member7", "viewer") is True
+
+    stats = bloom.stats("blacklist")
+    # Only the member and the filter's false positives reached Postgres
+    assert db.lookups == 1 + stats["false_positives"]
+    assert stats["negatives"] == 500 - stats["false_positives"]
+    assert stats["observed_false_positive_rate"] < 0.05
+    assert stats["ready"] and 0 < stats["fill_ratio"] < 1
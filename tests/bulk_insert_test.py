@@ -0,0 +1,80 @@
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import StaticPool
+
+from app.database import Database, Session
+from app.db_setup import Base, engine
+from app.models import List
+from app.tasks.celery_tasks import bulk_add_batches
+
+
+class FakeCursor:
+    """DBAPI cursor recording the staging COPY and the INSERT ... SELECT."""
+
+    def __init__(self, returned):
+        self.returned = returned
+        self.statements = []
+        self.copied = None
+
+    def execute(self, sql, params=None):
+        self.statements.append((sql, params))
+
+    def copy_expert(self, sql, stream):
+        self.copied = (sql, stream.read())
+
+    def fetchall(self):
+        return [(value,) for value in self.returned]
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self.connection = self
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+
+@pytest.fixture
+def sqlite_db():
+    """Database on an in-memory SQLite, which takes the multi-row INSERT path."""
+    sqlite = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    event.listen(sqlite, "connect", lambda connection, record: connection.create_collation(
+        "C", lambda a, b: (a > b) - (a < b)))
+    Base.metadata.create_all(sqlite)
+    Session.remove()
+    Session.configure(bind=sqlite)
+    with Session() as session:
+        session.add(List(id=1, name="cards", type="blacklist", is_deleted=0))
+        session.commit()
+    yield Database()
+    Session.remove()
+    Session.configure(bind=engine)
+
+
+def test_insert_fallback_skips_values_already_active(sqlite_db):
+    assert sqlite_db.bulk_insert_values(1, ["a", "b", "a"], "note", "alice") == ["a", "b"]
+    assert sqlite_db.bulk_insert_values(1, ["b", "c"], "note", "alice") == ["c"]
+    assert sorted(sqlite_db.iter_list_item_values(1)) == ["a", "b", "c"]
+
+
+def test_copy_path_escapes_values_and_returns_the_inserted_ones():
+    cursor = FakeCursor(returned=["a\tb"])
+    inserted = Database()._copy_insert(FakeConnection(cursor), 1, "blacklist", ["a\tb", "c\\d\n"], "note", "alice")
+
+    assert inserted == ["a\tb"]
+    sql, payload = cursor.copied
+    assert sql.startswith("COPY list_items_staging")
+    assert payload == "a\\tb\nc\\\\d\\n"
+    insert_sql, params = cursor.statements[-1]
+    assert "ON CONFLICT (list_id, value) WHERE is_deleted = 0 DO NOTHING" in insert_sql
+    assert params == {"list_id": 1, "list_type": "blacklist", "comment": "note", "author": "alice"}
+
+
+def test_bulk_add_is_split_into_one_message_per_batch():
+    batches = bulk_add_batches(1, [f"v{index}" for index in range(5)], "note", "alice", "editor", batch_size=2)
+    assert [batch.args[1] for batch in batches] == [["v0", "v1"], ["v2", "v3"], ["v4"]]
+    assert all(batch.task == "app.tasks.celery_tasks.bulk_add_task" for batch in batches)
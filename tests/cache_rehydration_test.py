@@ -0,0 +1,101 @@
+import threading
+
+import pytest
+
+from app.utils.cache_rehydration import CacheWarmingError, RehydrationGuard
+
+
+class FakePipeline:
+    def __init__(self, state):
+        self.state = state
+        self.replies = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def hgetall(self, key):
+        self.replies.append(self.state.get("status", {}))
+
+    def exists(self, key):
+        self.replies.append(int(key in self.state["keys"]))
+
+    def execute(self):
+        return self.replies
+
+
+class FakeRedis:
+    def __init__(self, keys=(), status=None):
+        self.state = {"keys": set(keys), "status": status or {}}
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self.state)
+
+
+def test_cold_cache_triggers_rehydration_once_and_limits_database_fallthrough():
+    triggered = []
+    guard = RehydrationGuard(redis_client=FakeRedis(), db_concurrency=1, wait=0.01, auto=True)
+    guard._on_cold = lambda: triggered.append(True)
+    guard.poll()
+    guard.poll()
+    assert guard.active and triggered == [True]
+
+    holding, release = threading.Event(), threading.Event()
+
+    def hold_slot():
+        with guard.db_slot():
+            holding.set()
+            release.wait(1)
+
+    worker = threading.Thread(target=hold_slot)
+    worker.start()
+    holding.wait(1)
+    with pytest.raises(CacheWarmingError):
+        with guard.db_slot():
+            pass
+    release.set()
+    worker.join()
+    assert guard.stats()["rejected"] == 1
+
+
+def test_warm_cache_is_not_limited():
+    guard = RehydrationGuard(redis_client=FakeRedis(keys={"cache:warm"}), db_concurrency=1, wait=0, auto=True)
+    guard.poll()
+    assert not guard.active
+    with guard.db_slot():
+        with guard.db_slot():
+            pass
+
+
+def test_stale_running_status_without_lock_is_not_treated_as_running():
+    guard = RehydrationGuard(redis_client=FakeRedis(keys={"cache:warm"}, status={b"status": b"running"}), auto=True)
+    guard.poll()
+    assert not guard.active
+
+
+def test_throttled_checks_are_reported_as_retryable():
+    import fakeredis
+
+    from app.api_gateway import service_error
+    from app.services.list_management_service import ListManagementService
+    from app.services.notification_dispatcher import NotificationDispatcher
+    from app.utils.bloom_filter import BloomFilter
+    from app.utils.local_cache import LocalCache
+    from app.utils.redis_cache import RedisCache
+
+    guard = RehydrationGuard(redis_client=FakeRedis(), db_concurrency=1, wait=0.01, auto=True)
+    guard.poll()
+    # Another request holds the only Postgres slot while the cache warms
+    guard._slots.acquire()
+    service = ListManagementService(
+        db=object(), redis_client=RedisCache(client=fakeredis.FakeStrictRedis()),
+        notifications=NotificationDispatcher(enabled=False), local_cache=LocalCache(enabled=False),
+        bloom_filter=BloomFilter(enabled=False), rehydration=guard)
+
+    for result in (service.check_value("blacklist", "abc123", "viewer"),
+                   service.check_values("blacklist", ["abc123"], "viewer")):
+        assert result["outcome"] == "cache_warming"
+        error = service_error(result)
+        assert error.status_code == 503 and int(error.headers["Retry-After"]) > 0
@@ -0,0 +1,23 @@
+import sqlite3
+
+import pytest
+from sqlalchemy.exc import TimeoutError
+
+from app.utils.connection_pools import TimedQueuePool
+
+
+def test_checkouts_waits_and_timeouts_are_counted():
+    pool = TimedQueuePool(lambda: sqlite3.connect(":memory:"), pool_size=1, max_overflow=0, timeout=0.05)
+    connection = pool.connect()
+    assert pool.stats()["utilization"] == 1.0
+
+    with pytest.raises(TimeoutError):
+        pool.connect()
+    stats = pool.stats()
+    assert (stats["acquired"], stats["failed"]) == (1, 1)
+    assert stats["wait_max_ms"] >= 50
+
+    connection.close()
+    pool.connect().close()
+    stats = pool.stats()
+    assert (stats["acquired"], stats["checked_out"], stats["peak_in_use"]) == (2, 0, 1)
@@ -0,0 +1,27 @@
+import gzip
+import json
+
+from app.utils.export_stream import accepts_gzip, export_body
+
+
+ROWS = [("abc", "first, with comma", "alice"), ("def", None, "bob")]
+
+
+def test_ndjson_export_round_trips_through_gzip():
+    body = b"".join(export_body(iter(ROWS), "ndjson", gzip=True, block_size=16))
+    records = [json.loads(line) for line in gzip.decompress(body).decode().splitlines()]
+    assert records == [
+        {"value": "abc", "comment": "first, with comma", "created_by": "alice"},
+        {"value": "def", "comment": None, "created_by": "bob"},
+    ]
+
+
+def test_csv_export_has_header_and_quotes_fields():
+    body = b"".join(export_body(iter(ROWS), "csv")).decode()
+    assert body == 'value,comment,created_by\nabc,"first, with comma",alice\ndef,,bob\n'
+
+
+def test_accepts_gzip_honours_q_values():
+    assert accepts_gzip("br, gzip;q=0.8")
+    assert not accepts_gzip("gzip;q=0")
+    assert not accepts_gzip(None)
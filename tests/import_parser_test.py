@@ -0,0 +1,35 @@
+import asyncio
+
+import pytest
+
+from app.utils.import_parser import ImportFormatError, aiter_lines, aiter_values
+
+
+async def _chunks(*parts):
+    for part in parts:
+        yield part
+
+
+def _parse(fmt, *parts, max_line_length=65536):
+    async def run():
+        lines = aiter_lines(_chunks(*parts), max_line_length)
+        return [record async for record in aiter_values(lines, fmt)]
+    return asyncio.run(run())
+
+
+def test_csv_lines_split_across_chunks_and_header_skipped():
+    # "é" is split between chunks to exercise the incremental decoder
+    records = _parse("csv", b"value\r\nabc", b"1,ignored\n\n\"x\xc3", b"\xa9\"\nlast")
+    assert records == [(2, "abc1", None), (4, "xé", None), (5, "last", None)]
+
+
+def test_ndjson_accepts_strings_and_objects_and_reports_bad_lines():
+    records = _parse("ndjson", b'"a1"\n{"value": "b2"}\n{"other": 1}\nnot json\n')
+    assert records[:2] == [(1, "a1", None), (2, "b2", None)]
+    assert [(line, value) for line, value, _ in records[2:]] == [(3, None), (4, None)]
+    assert all(error for _, _, error in records[2:])
+
+
+def test_overlong_line_is_rejected():
+    with pytest.raises(ImportFormatError):
+        _parse("csv", b"a" * 50, b"b" * 50, max_line_length=64)
@@ -0,0 +1,23 @@
+import fakeredis
+
+from app.utils.import_progress import ImportProgress
+
+
+def test_an_existing_import_id_cannot_be_restarted():
+    client = fakeredis.FakeStrictRedis()
+    first = ImportProgress("nightly", redis_client=client)
+    assert first.start(1, "csv", "alice")
+    first.record(lines=10, accepted=10, batches_queued=1)
+
+    assert not ImportProgress("nightly", redis_client=client).start(2, "csv", "mallory")
+    progress = first.get()
+    assert progress["author"] == "alice" and progress["list_id"] == "1" and progress["accepted"] == 10
+
+
+def test_progress_is_only_visible_to_the_author():
+    client = fakeredis.FakeStrictRedis()
+    ImportProgress("nightly", redis_client=client).start(1, "csv", "alice")
+
+    assert ImportProgress("nightly", redis_client=client).get("alice")["status"] == "receiving"
+    assert ImportProgress("nightly", redis_client=client).get("mallory") is None
+    assert ImportProgress("unknown", redis_client=client).get("alice") is None
@@ -0,0 +1,24 @@
+from app.utils.list_digest import compute_digests, digest_mapping, member_hash, parse_digest_hash
+
+
+def test_digest_is_order_independent_and_bucketed_by_suffix():
+    values = ["abc12", "zz12", "abc13", "q"]
+    digests = compute_digests(values, suffix_bytes=2)
+    assert digests == compute_digests(reversed(values), suffix_bytes=2)
+    assert set(digests) == {b"12".hex(), b"13".hex(), b"q".hex()}
+    assert digests[b"12".hex()][0] == 2
+
+
+def test_incremental_updates_match_a_full_recompute():
+    # What the Lua scripts do: add the hashes of added members, subtract those of removed ones
+    fields = {}
+    for value, sign in (("a1", 1), ("b1", 1), ("c2", 1), ("b1", -1)):
+        bucket, h1, h2 = member_hash(value, suffix_bytes=1)
+        for part, amount in (("n", 1), ("a", h1), ("b", h2)):
+            fields[f"{bucket}:{part}"] = fields.get(f"{bucket}:{part}", 0) + sign * amount
+    fields["valid"] = 1
+
+    digests, valid = parse_digest_hash({key.encode(): str(value).encode() for key, value in fields.items()})
+    assert valid
+    assert digests == compute_digests(["a1", "c2"], suffix_bytes=1)
+    assert parse_digest_hash(digest_mapping(digests))[0] == digests
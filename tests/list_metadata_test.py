@@ -0,0 +1,62 @@
+import time
+from collections import namedtuple
+
+from app.utils.list_metadata import ListMetadataCache
+
+Row = namedtuple("Row", ["id", "name", "type"])
+
+
+class FakePublisher:
+    def __init__(self):
+        self.messages = []
+
+    def publish(self, channel, message):
+        self.messages.append((channel, message))
+
+
+def test_loaded_lists_are_served_without_loading_and_misses_are_reported():
+    cache = ListMetadataCache(redis_client=FakePublisher(), enabled=True)
+    cache.load([(1, "cards", "blacklist")])
+    assert cache.lookup(1).type == "blacklist"
+    assert cache.lookup(2) is None
+    cache.store(Row(2, "emails", "whitelist"))
+    assert cache.lookup(2).type == "whitelist"
+    assert cache.stats()["misses"] == 1
+
+
+def test_type_change_is_broadcast_and_dropped_by_other_workers():
+    publisher = FakePublisher()
+    cache = ListMetadataCache(redis_client=publisher, enabled=True)
+    other = ListMetadataCache(redis_client=FakePublisher(), enabled=True)
+    for worker in (cache, other):
+        worker.load([(1, "cards", "blacklist")])
+
+    cache.invalidate([1])
+    assert cache.lookup(1) is None
+    other._handle_message({"data": publisher.messages[0][1]})
+    assert other.lookup(1) is None
+
+    # A worker ignores its own broadcasts
+    cache.store(Row(1, "cards", "whitelist"))
+    cache._handle_message({"data": publisher.messages[0][1]})
+    assert cache.lookup(1).type == "whitelist"
+
+
+def test_a_type_read_before_an_invalidation_is_not_cached():
+    cache = ListMetadataCache(redis_client=FakePublisher(), enabled=True)
+    generation = cache.generation
+    # Another worker's type change is processed between this worker's read and its store
+    cache._handle_message({"data": '{"list_ids": [1], "origin": null}'})
+    assert cache.store(Row(1, "cards", "blacklist"), generation).type == "blacklist"
+    assert cache.lookup(1) is None
+
+    cache.store(Row(1, "cards", "whitelist"), cache.generation)
+    assert cache.lookup(1).type == "whitelist"
+
+
+def test_entries_expire_after_the_ttl():
+    cache = ListMetadataCache(redis_client=FakePublisher(), enabled=True, ttl=0.01)
+    cache.load([(1, "cards", "blacklist")])
+    assert cache.lookup(1).type == "blacklist"
+    time.sleep(0.02)
+    assert cache.lookup(1) is None
@@ -0,0 +1,58 @@
+from app.utils.local_cache import LocalCache
+
+
+class FakePublisher:
+    def __init__(self):
+        self.messages = []
+
+    def publish(self, channel, message):
+        self.messages.append((channel, message))
+
+
+def test_lru_eviction_and_counters():
+    cache = LocalCache(maxsize=2, ttl=60, enabled=True, redis_client=FakePublisher())
+    cache.set("blacklist:a", True)
+    cache.set("blacklist:b", False)
+    assert cache.get("blacklist:a") is True  # touch 'a' so 'b' is least recently used
+    cache.set("blacklist:c", True)
+
+    assert cache.get("blacklist:b") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+
+
+def test_invalidate_broadcasts_and_remote_messages_drop_keys():
+    publisher = FakePublisher()
+    cache = LocalCache(maxsize=10, ttl=60, enabled=True, redis_client=publisher)
+    cache.set("blacklist:a", True)
+    cache.invalidate(["blacklist:a"])
+    assert cache.get("blacklist:a") is None
+    assert len(publisher.messages) == 1
+
+    other = LocalCache(maxsize=10, ttl=60, enabled=True, redis_client=FakePublisher())
+    other.set("blacklist:a", True)
+    other._handle_message({"data": publisher.messages[0][1]})
+    assert other.get("blacklist:a") is None
+
+
+def test_clear_is_not_counted_as_evictions():
+    cache = LocalCache(maxsize=10, ttl=60, enabled=True, redis_client=FakePublisher())
+    for index in range(5):
+        cache.set(f"blacklist:{index}", True)
+    cache.clear(broadcast=False)
+    cache._handle_message({"data": '{"clear": true, "origin": null}'})
+    assert cache.stats()["evictions"] == 0
+
+
+def test_store_read_before_an_invalidation_is_skipped():
+    cache = LocalCache(maxsize=10, ttl=60, enabled=True, redis_client=FakePublisher())
+    generation = cache.generation
+    # Another worker's add is processed between this worker's read and its store
+    cache._handle_message({"data": '{"keys": ["blacklist:a"], "origin": null}'})
+    cache.set("blacklist:a", False, generation)
+    assert cache.get("blacklist:a") is None
+
+    cache.set("blacklist:a", False, cache.generation)
+    assert cache.get("blacklist:a") is False
@@ -0,0 +1,28 @@
+import json
+import logging
+import queue
+
+from app.utils.logging_service import ActionSampler, DroppingQueueHandler, JsonFormatter
+
+
+def test_records_are_rendered_as_json_with_extra_fields():
+    record = logging.makeLogRecord({"name": "list_management_service", "levelname": "INFO", "msg": "check_value",
+                                    "action": "check_value", "list_type": "blacklist", "sample_rate": 0.01})
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "check_value"
+    assert (entry["action"], entry["list_type"], entry["sample_rate"]) == ("check_value", "blacklist", 0.01)
+
+
+def test_mutations_are_never_sampled_out():
+    sampler = ActionSampler({"check_value": 0.0, "add_value": 0.0})
+    assert sampler.rate("check_value") == 0.0
+    assert sampler.rate("add_value") == 1.0
+    assert sampler.rate("check_values") == 1.0
+
+
+def test_full_queue_drops_records_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(1))
+    for index in range(3):
+        handler.emit(logging.makeLogRecord({"msg": f"record {index}"}))
+    assert handler.dropped == 2
+    assert handler.queue.get_nowait().getMessage() == "record 0"
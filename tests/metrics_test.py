@@ -0,0 +1,58 @@
+import asyncio
+
+from app.utils.metrics import Counter, Histogram, instrument, register_stats, render
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_latency_seconds", "Test latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "/check")
+
+    lines = histogram.render()
+    assert 'lms_test_latency_seconds_bucket{route="/check",le="0.1"} 2' in lines
+    assert 'lms_test_latency_seconds_bucket{route="/check",le="1.0"} 3' in lines
+    assert 'lms_test_latency_seconds_bucket{route="/check",le="+Inf"} 4' in lines
+    assert 'lms_test_latency_seconds_count{route="/check"} 4' in lines
+
+
+def test_instrument_times_sync_and_async_methods_but_not_generators():
+    histogram = Histogram("test_call_seconds", "Test calls.", ("component", "method"))
+
+    @instrument("store", histogram)
+    class Store:
+        def get(self, key):
+            return key
+
+        async def aget(self, key):
+            return key
+
+        def scan(self):
+            yield 1
+
+        def _private(self):
+            return None
+
+    store = Store()
+    assert store.get("a") == "a"
+    assert asyncio.run(store.aget("b")) == "b"
+    assert list(store.scan()) == [1]
+    store._private()
+
+    assert histogram.snapshot("store", "get")[2] == 1
+    assert histogram.snapshot("store", "aget")[2] == 1
+    assert histogram.snapshot("store", "scan")[2] == 0
+    assert histogram.snapshot("store", "_private")[2] == 0
+
+
+def test_render_exports_counters_and_stats_gauges():
+    counter = Counter("test_lookups_total", "Test lookups.", ("source",))
+    counter.inc("redis")
+    counter.inc("redis", amount=2)
+    register_stats("test_component", lambda: {"enabled": True, "hits": 5, "mode": "local", "pool": {"size": 3}})
+
+    body = render()
+    assert 'lms_test_lookups_total{source="redis"} 3' in body
+    assert "lms_test_component_enabled 1" in body
+    assert "lms_test_component_hits 5" in body
+    assert "lms_test_component_pool_size 3" in body
+    assert "lms_test_component_mode" not in body
@@ -0,0 +1,66 @@
+import fakeredis
+import pytest
+
+from app.container import container
+from app.tasks.celery_tasks import move_cached_list
+from app.utils.list_digest import compute_digests, digest_key, parse_digest_hash
+from app.utils.redis_cache import RedisCache, list_set_key
+
+
+class FakeDatabase:
+    """Active items by list id, with each list's type; list 1 has already been retyped."""
+
+    def __init__(self, items, types):
+        self.items = items
+        self.types = types
+
+    def count_lists_of_type(self, list_type):
+        return sum(1 for list_type_ in self.types.values() if list_type_ == list_type)
+
+    def iter_list_item_values(self, list_id, batch_size=10000):
+        return iter(self.items[list_id])
+
+    def check_values_in_list(self, list_type, values):
+        return {value for list_id, items in self.items.items() if self.types[list_id] == list_type
+                for value in items if value in values}
+
+
+@pytest.fixture
+def cache():
+    cache = RedisCache(client=fakeredis.FakeStrictRedis())
+    instances = dict(container._instances)
+    container._instances["redis_cache"] = cache
+    yield cache
+    container._instances.clear()
+    container._instances.update(instances)
+
+
+def members(cache, list_type):
+    return {member.decode() for member in cache.redis.smembers(list_set_key(list_type))}
+
+
+def test_moving_a_list_off_a_shared_type_releases_only_its_own_values(cache):
+    container._instances["database"] = FakeDatabase(
+        items={1: ["a", "b", "c"], 2: ["b", "d"]}, types={1: "whitelist", 2: "blacklist"})
+    cache.add_members(list_set_key("blacklist"), ["a", "b", "c", "d"])
+
+    report = move_cached_list(1, "blacklist", "whitelist", batch_size=2)
+
+    assert report == {"list_id": 1, "moved": 3, "released": 2, "dropped_old_set": False}
+    assert members(cache, "blacklist") == {"b", "d"}
+    assert members(cache, "whitelist") == {"a", "b", "c"}
+    key = list_set_key("blacklist")
+    assert parse_digest_hash(cache.redis.hgetall(digest_key(key)))[0] == compute_digests(["b", "d"])
+
+
+def test_moving_the_only_list_of_a_type_hands_over_the_whole_set(cache):
+    container._instances["database"] = FakeDatabase(items={1: ["a"]}, types={1: "whitelist"})
+    # "e" is cached but not flushed to Postgres yet; it moves too
+    cache.add_members(list_set_key("blacklist"), ["a", "e"])
+    cache.add_members(list_set_key("whitelist"), ["z"])
+
+    report = move_cached_list(1, "blacklist", "whitelist")
+
+    assert report["dropped_old_set"] is True
+    assert not cache.redis.exists(list_set_key("blacklist"))
+    assert members(cache, "whitelist") == {"a", "e", "z"}
@@ -0,0 +1,84 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.services.notification_dispatcher import NotificationDispatcher
+from app.services.notification_service import NotificationService, build_session
+
+
+class StandIn:
+    """Local HTTP server standing in for the Slack/email/SMS endpoints; fails the first `fail` requests."""
+
+    def __init__(self, fail=0):
+        self.requests = []
+        self.fail = fail
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stand_in.requests.append((self.path, body))
+                status = 503 if len(stand_in.requests) <= stand_in.fail else 200
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server.server_port}{path}"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def service_for(stand_in):
+    service = NotificationService(session=build_session(retries=3, backoff=0), timeout=(1, 1))
+    service.webhook_url = stand_in.url("/slack")
+    service.sms_service_url = stand_in.url("/sms")
+    return service
+
+
+def test_failed_posts_are_retried_over_the_pooled_session():
+    stand_in = StandIn(fail=2)
+    try:
+        assert service_for(stand_in).send_slack_notification("hello") == {
+            "status": "Slack notification sent successfully"}
+        assert [body for _, body in stand_in.requests] == [{"text": "hello"}] * 3
+    finally:
+        stand_in.close()
+
+
+def test_bursts_are_collapsed_into_one_digest():
+    stand_in = StandIn()
+    dispatcher = NotificationDispatcher(service=service_for(stand_in), max_queue=10, workers=1,
+                                        digest_interval=60, enabled=True)
+    try:
+        for value in range(500):
+            dispatcher.digest("slack", "duplicate attempts on blacklist", f"Duplicate value attempt: {value}")
+        dispatcher.send("sms", phone_number="+15550100", message="list changed")
+        dispatcher.close()
+
+        texts = sorted(body.get("text", body.get("message")) for _, body in stand_in.requests)
+        assert texts[0].startswith("499 more duplicate attempts on blacklist in the last ")
+        assert texts[1:] == ["Duplicate value attempt: 0", "list changed"]
+        stats = dispatcher.stats()
+        assert (stats["sent"], stats["digested"], stats["dropped"]) == (3, 499, 0)
+    finally:
+        stand_in.close()
+
+
+def test_full_queue_drops_instead_of_blocking():
+    dispatcher = NotificationDispatcher(service=NotificationService(), max_queue=1, workers=1, enabled=True)
+    dispatcher._threads = [threading.current_thread()]  # keep workers from draining the queue
+    started = time.monotonic()
+    results = [dispatcher.send("slack", message=str(index)) for index in range(5)]
+    assert results == [True, False, False, False, False]
+    assert time.monotonic() - started < 1
+    assert dispatcher.stats()["dropped"] == 4
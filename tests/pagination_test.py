@@ -0,0 +1,71 @@
+from collections import namedtuple
+
+import pytest
+from sqlalchemy.dialects.postgresql import asyncpg, psycopg2
+
+from app.database import estimate_statement, list_items_page_query, lists_page_query, plan_rows, search_items_query
+from app.utils.pagination import InvalidCursor, decode_cursor, encode_cursor, paginate
+
+Row = namedtuple("Row", ["id", "value"])
+
+
+def render(query):
+    # asyncpg's numeric paramstyle leaves literal % alone, unlike psycopg2's pyformat
+    return str(query.compile(dialect=asyncpg.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def test_cursor_round_trips_only_for_its_own_query():
+    cursor = encode_cursor("ACME0042", list_id=1, prefix="ACME")
+    assert decode_cursor(cursor, list_id=1, prefix="ACME") == "ACME0042"
+    assert decode_cursor(None, list_id=1, prefix="ACME") is None
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, list_id=2, prefix="ACME")
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not a cursor!", list_id=1, prefix="ACME")
+
+
+def test_paginate_returns_a_cursor_only_when_more_rows_exist():
+    rows = [Row(index, f"v{index}") for index in range(4)]
+    page, cursor = paginate(rows, 3, lambda row: row.id, list_id=1)
+    assert page == rows[:3]
+    assert decode_cursor(cursor, list_id=1) == 2
+    assert paginate(rows[:3], 3, lambda row: row.id, list_id=1) == (rows[:3], None)
+
+
+def test_prefix_search_pages_in_byte_order_and_escapes_wildcards():
+    sql = render(search_items_query(7, prefix="50%_off", after="50%_offA"))
+    assert "'50/%/_off'" in sql and "ESCAPE '/'" in sql
+    assert "> '50%_offA'" in sql
+    assert 'COLLATE "C"' in sql.partition("ORDER BY")[2]
+
+
+def test_substring_search_pages_by_id():
+    sql = render(search_items_query(7, contains="cme", after=120))
+    assert "list_items.id > 120" in sql
+    assert sql.rstrip().endswith("ORDER BY list_items.id")
+
+
+def test_list_items_pages_resume_after_the_last_id_with_deleted_filter():
+    sql = render(list_items_page_query(7, deleted="only", after=50))
+    assert "list_items.list_id = 7" in sql and "list_items.is_deleted != 0" in sql
+    assert "list_items.id > 50" in sql
+    assert sql.rstrip().endswith("ORDER BY list_items.id")
+
+
+def test_estimates_come_from_the_plan_instead_of_a_count():
+    statement = str(estimate_statement(list_items_page_query(7)))
+    assert statement.startswith("EXPLAIN (FORMAT JSON) SELECT")
+    assert "ORDER BY" not in statement and "count(" not in statement
+    plan = [{"Plan": {"Node Type": "Index Scan", "Plan Rows": 9871234}}]
+    assert plan_rows(plan) == 9871234
+    assert plan_rows('[{"Plan": {"Plan Rows": 12}}]') == 12
+
+
+def test_estimates_bind_values_instead_of_inlining_them():
+    # "%" and ":y" inlined into the SQL would be rewritten by the driver or taken for a bind parameter
+    statement = estimate_statement(lists_page_query("50% :y"))
+    for dialect in (asyncpg.dialect(), psycopg2.dialect()):
+        compiled = statement.compile(dialect=dialect)
+        assert str(compiled).startswith("EXPLAIN (FORMAT JSON) SELECT")
+        assert "50%" not in str(compiled) and ":y" not in str(compiled)
+        assert "50% :y" in compiled.params.values()
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from app.utils.rate_limiter import HybridRateLimiter, RateLimitExceeded, load_policies, parse_limit
+
+
+class FakeAsyncRedis:
+    """Just enough of a redis.asyncio pipeline for HybridRateLimiter.sync()."""
+
+    def __init__(self, workers=1):
+        self.counters = {}
+        self.workers = workers
+        self.queued = []
+
+    def pipeline(self, transaction=False):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def zadd(self, key, mapping):
+        self.queued.append(1)
+
+    def zremrangebyscore(self, key, low, high):
+        self.queued.append(0)
+
+    def zcard(self, key):
+        self.queued.append(self.workers)
+
+    def incrby(self, key, amount):
+        self.counters[key] = self.counters.get(key, 0) + amount
+        self.queued.append(self.counters[key])
+
+    def expire(self, key, seconds):
+        self.queued.append(True)
+
+    async def execute(self):
+        results, self.queued = self.queued, []
+        return results
+
+
+def test_role_and_user_overrides_take_precedence():
+    policies = load_policies({"check": {"admin": "1000/60", "user:bot": "5/10"}})
+    limiter = HybridRateLimiter(policies=policies, mode="local", redis_client=FakeAsyncRedis())
+    assert limiter.limit_for("check", "alice", "viewer") == parse_limit("100/60")
+    assert limiter.limit_for("check", "alice", "admin") == parse_limit("1000/60")
+    assert limiter.limit_for("check", "bot", "admin") == parse_limit("5/10")
+
+
+def test_local_buckets_only_spend_their_share_of_the_shared_counter():
+    redis = FakeAsyncRedis(workers=2)
+    limiter = HybridRateLimiter(policies={"check": {"default": parse_limit("10/3600")}}, mode="local",
+                                redis_client=redis)
+
+    async def admitted(requests):
+        count = 0
+        for _ in range(requests):
+            try:
+                await limiter.hit("check", "alice")
+                count += 1
+            except RateLimitExceeded:
+                pass
+        return count
+
+    async def scenario():
+        assert await admitted(20) == 10  # no sync yet: one worker assumed
+        await limiter.sync()
+        # Another worker admitted 4 in the same window
+        key = next(iter(redis.counters))
+        redis.counters[key] += 4
+        await limiter.sync()
+        return await admitted(20)
+
+    # 14 of 10 used; nothing left to share between the two workers
+    assert asyncio.run(scenario()) == 0
+    assert limiter.stats()["workers"] == 2
+
+
+def test_shares_are_split_between_live_workers():
+    redis = FakeAsyncRedis(workers=4)
+    limiter = HybridRateLimiter(policies={"check": {"default": parse_limit("100/3600")}}, mode="local",
+                                redis_client=redis)
+
+    async def scenario():
+        await limiter.hit("check", "alice")
+        await limiter.sync()
+        bucket = next(iter(limiter._buckets.values()))
+        return bucket.tokens
+
+    assert asyncio.run(scenario()) == 25  # ceil(99 / 4)
+    with pytest.raises(ValueError):
+        parse_limit("many/60")
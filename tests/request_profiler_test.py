@@ -0,0 +1,54 @@
+import asyncio
+import json
+import time
+
+from app.utils import request_profiler
+from app.utils.request_profiler import ProfilingMiddleware, span
+
+
+def lookup():
+    with span("redis", "sismember"):
+        time.sleep(0.001)
+
+
+async def traced_app(scope, receive, send):
+    with span("auth", "bearer token"):
+        pass
+    await asyncio.to_thread(lookup)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+def call(middleware, headers=()):
+    sent = []
+    scope = {"type": "http", "method": "POST", "path": "/api/add", "headers": list(headers)}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(middleware(scope, receive, send))
+    return dict(sent[0]["headers"])
+
+
+def test_sampled_request_gets_spans_inline_and_on_disk(tmp_path):
+    middleware = ProfilingMiddleware(traced_app, sample_rate=1.0, directory=str(tmp_path))
+    headers = call(middleware)
+
+    assert b"redis;desc=\"1 calls\"" in headers[b"server-timing"]
+    profile_id = headers[b"x-profile-id"].decode()
+    with open(tmp_path / f"{profile_id}.json") as f:
+        report = json.load(f)
+    assert report["status"] == 200
+    assert [(s["kind"], s["name"]) for s in report["spans"]] == [("auth", "bearer token"), ("redis", "sismember")]
+    assert "call_profile" in report
+    assert request_profiler.active == 0
+
+
+def test_requests_without_the_header_are_not_profiled(tmp_path):
+    middleware = ProfilingMiddleware(traced_app, sample_rate=0, directory=str(tmp_path))
+    headers = call(middleware)
+    assert b"x-profile-id" not in headers
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,96 @@
+import time
+
+import pytest
+
+from app.utils.auth import create_access_token, decode_access_token
+from app.utils.token_cache import ClaimsCache, TokenRevokedError
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.messages = []
+        self.queued = []
+
+    def set(self, key, value, ex=None):
+        self.values[key] = str(value).encode()
+
+    def get(self, key):
+        self.queued.append(self.values.get(key))
+
+    def exists(self, key):
+        self.queued.append(int(key in self.values))
+
+    def publish(self, channel, message):
+        self.messages.append((channel, message))
+
+    def pipeline(self, transaction=False):
+        return self
+
+    def execute(self):
+        results, self.queued = self.queued, []
+        return results
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class Decoder:
+    def __init__(self, claims):
+        self.claims = claims
+        self.calls = 0
+
+    def __call__(self, token):
+        self.calls += 1
+        return dict(self.claims[token])
+
+
+def claims(jti, sub="alice"):
+    now = time.time()
+    return {"sub": sub, "jti": jti, "iat": int(now) - 10, "exp": now + 600}
+
+
+def test_tokens_are_verified_once_and_cached_until_revoked():
+    redis = FakeRedis()
+    cache = ClaimsCache(maxsize=10, ttl=60, enabled=True, redis_client=redis)
+    decode = Decoder({"t1": claims("a"), "t2": claims("b")})
+
+    for _ in range(3):
+        assert cache.authenticate("t1", decode, lambda c: {"username": c["sub"]}) == {"username": "alice"}
+    assert decode.calls == 1
+    assert cache.stats()["hits"] == 2
+
+    cache.revoke_token(decode.claims["t1"])
+    with pytest.raises(TokenRevokedError):
+        cache.authenticate("t1", decode, lambda c: {"username": c["sub"]})
+    assert cache.authenticate("t2", decode, lambda c: {"username": c["sub"]}) == {"username": "alice"}
+
+
+def test_user_revocation_is_applied_by_other_workers():
+    publisher = FakeRedis()
+    cache = ClaimsCache(maxsize=10, ttl=60, enabled=True, redis_client=publisher)
+    other = ClaimsCache(maxsize=10, ttl=60, enabled=True, redis_client=FakeRedis())
+    decode = Decoder({"t1": claims("a"), "t2": claims("b", sub="bob")})
+    for token in ("t1", "t2"):
+        other.authenticate(token, decode, lambda c: c["sub"])
+
+    cache.revoke_user("alice")
+    other._handle_message({"data": publisher.messages[0][1]})
+    assert other.stats()["size"] == 1
+    other.authenticate("t2", decode, lambda c: c["sub"])
+    assert decode.calls == 2
+
+
+
+def test_user_revocation_spares_tokens_issued_later_in_the_same_second():
+    cache = ClaimsCache(maxsize=10, ttl=60, enabled=True, redis_client=FakeRedis())
+    before = create_access_token({"sub": "alice"})
+    cache.revoke_user("alice")
+    after = create_access_token({"sub": "alice"})
+
+    with pytest.raises(TokenRevokedError):
+        cache.authenticate(before, decode_access_token, lambda c: c["sub"])
+    assert cache.authenticate(after, decode_access_token, lambda c: c["sub"]) == "alice"
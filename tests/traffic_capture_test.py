@@ -0,0 +1,54 @@
+import asyncio
+import json
+
+from app.utils.traffic_capture import TrafficCaptureMiddleware, TrafficRecorder
+
+
+async def echo_app(scope, receive, send):
+    message = await receive()
+    await send({"type": "http.response.start", "status": 201, "headers": []})
+    await send({"type": "http.response.body", "body": message.get("body", b"")})
+
+
+def call(middleware, path, body=b"", headers=()):
+    scope = {"type": "http", "method": "POST", "path": path, "query_string": b"dry_run=1",
+             "headers": list(headers)}
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        pass
+
+    asyncio.run(middleware(scope, receive, send))
+
+
+def test_sampled_requests_are_written_without_credentials(tmp_path):
+    path = str(tmp_path / "traffic.ndjson")
+    recorder = TrafficRecorder(path=path, sample_rate=1.0, max_body=1024, queue_size=10, paths="/api/",
+                               exclude="/api/login", enabled=True)
+    middleware = TrafficCaptureMiddleware(echo_app, recorder)
+
+    call(middleware, "/api/add", b'{"list_id": 1, "value": "abc"}',
+         [(b"content-type", b"application/json"), (b"authorization", b"Bearer secret")])
+    call(middleware, "/api/login", b'{"username": "u", "password": "p"}')
+    call(middleware, "/frontend/index.html")
+    call(middleware, "/api/import/1", b"x" * 2048)
+    recorder.close()
+
+    with open(path) as f:
+        records = [json.loads(line) for line in f]
+    assert [record["path"] for record in records] == ["/api/add", "/api/import/1"]
+    added, imported = records
+    assert added["body"] == '{"list_id": 1, "value": "abc"}'
+    assert added["headers"] == {"content-type": "application/json"}
+    assert added["status"] == 201 and added["query"] == "dry_run=1"
+    assert imported["body_truncated"] is True and "body" not in imported
+    assert recorder.stats()["written"] == 2
+
+
+def test_disabled_recorder_passes_requests_through(tmp_path):
+    recorder = TrafficRecorder(path=str(tmp_path / "traffic.ndjson"), sample_rate=1.0, enabled=False)
+    call(TrafficCaptureMiddleware(echo_app, recorder), "/api/add", b"{}")
+    assert recorder.stats()["captured"] == 0
+    assert not (tmp_path / "traffic.ndjson").exists()
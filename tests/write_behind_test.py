@@ -0,0 +1,135 @@
+import asyncio
+import time
+
+import fakeredis
+import fakeredis.aioredis
+
+from app.services.write_behind import DEAD_LETTER_KEY, LEASE_KEY, STREAM_KEY, AsyncWriteBehindBuffer, WriteBehindBuffer
+
+
+class RecordingDatabase:
+    def __init__(self, fail_times=0, poison=()):
+        self.batches = []
+        self.fail_times = fail_times
+        self.poison = set(poison)
+
+    def apply_mutations(self, mutations, before_commit=None):
+        if self.fail_times:
+            self.fail_times -= 1
+            raise RuntimeError("database unavailable")
+        if any(m["value"] in self.poison for m in mutations):
+            raise RuntimeError("value too long for column")
+        if before_commit is not None:
+            before_commit()
+        self.batches.append([(m["action"], m["list_id"], m["value"]) for m in mutations])
+
+
+def make_buffer(db, client=None, **options):
+    options = {"batch_size": 100, "flush_interval": 0.01, "max_retries": 3, "enabled": True, **options}
+    return WriteBehindBuffer(db=db, redis_client=client or fakeredis.FakeStrictRedis(), **options)
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_latest_mutation_per_key_wins_within_a_batch():
+    db = RecordingDatabase()
+    buffer = make_buffer(db)
+    buffer.submit(1, "a", "add")
+    buffer.submit(1, "b", "add")
+    buffer.submit(1, "a", "delete")
+    buffer.submit_edit(1, "b", "c")
+    assert buffer.pending_action(1, "a") == "delete"
+    assert buffer.pending_action(1, "c") == "add"
+    buffer.close()
+
+    assert db.batches == [[("delete", 1, "a"), ("delete", 1, "b"), ("add", 1, "c")]]
+    stats = buffer.stats()
+    assert stats["coalesced"] == 2
+    assert stats["pending"] == 0
+    assert buffer.pending_action(1, "a") is None
+
+
+def test_queued_mutations_survive_the_worker_that_submitted_them():
+    client = fakeredis.FakeStrictRedis()
+    crashed = make_buffer(RecordingDatabase(), client)
+    crashed.submit(1, "a", "add")
+    crashed.submit(2, "b", "delete")
+
+    # Another worker's flusher picks them up; the first one never flushed or closed
+    db = RecordingDatabase()
+    survivor = make_buffer(db, client)
+    survivor.start()
+    wait_for(lambda: db.batches)
+    survivor.close()
+    assert db.batches == [[("add", 1, "a"), ("delete", 2, "b")]]
+
+
+def test_failed_batch_is_retried():
+    db = RecordingDatabase(fail_times=1)
+    buffer = make_buffer(db)
+    buffer.submit(1, "a", "add")
+    buffer.start()
+    wait_for(lambda: db.batches)
+    buffer.close()
+
+    assert db.batches == [[("add", 1, "a")]]
+    assert buffer.stats()["failed_flushes"] == 1
+
+
+def test_flusher_that_lost_its_lease_mid_flush_does_not_commit():
+    client = fakeredis.FakeStrictRedis()
+
+    class StallingDatabase(RecordingDatabase):
+        def apply_mutations(self, mutations, before_commit=None):
+            # The lease lapses while the statements run and another flusher takes it
+            client.set(LEASE_KEY, "other-flusher")
+            super().apply_mutations(mutations, before_commit)
+
+    db = StallingDatabase()
+    buffer = make_buffer(db, client)
+    buffer.submit(1, "a", "add")
+    assert buffer._hold_lease()
+    entries = client.xrange(STREAM_KEY, "-", "+")
+
+    assert buffer._flush(entries) is False
+    assert db.batches == []
+    assert client.xlen(STREAM_KEY) == 1 and buffer.pending_action(1, "a") == "add"
+    stats = buffer.stats()
+    assert stats["failed_flushes"] == 0 and stats["dead_letters"] == 0
+
+
+def test_poison_mutation_is_dead_lettered_after_max_retries():
+    client = fakeredis.FakeStrictRedis()
+    db = RecordingDatabase(poison={"bad"})
+    buffer = make_buffer(db, client)
+    buffer.submit(1, "good", "add")
+    buffer.submit(1, "bad", "add")
+    buffer.start()
+    wait_for(lambda: buffer.stats()["dead_lettered"])
+    buffer.close()
+
+    assert db.batches == [[("add", 1, "good")]]
+    stats = buffer.stats()
+    assert stats["failed_flushes"] == 3 and stats["pending"] == 0 and stats["dead_letters"] == 1
+    (_, fields), = client.xrange(DEAD_LETTER_KEY)
+    assert fields[b"value"] == b"bad" and b"too long" in fields[b"error"]
+
+
+def test_async_submissions_share_the_stream():
+    server = fakeredis.FakeServer()
+    db = RecordingDatabase()
+    flusher = make_buffer(db, fakeredis.FakeStrictRedis(server=server))
+    buffer = AsyncWriteBehindBuffer(flusher, redis_client=fakeredis.aioredis.FakeRedis(server=server))
+
+    async def submit():
+        await buffer.submit(1, "a", "add")
+        await buffer.submit_edit(1, "x", "y")
+        return await buffer.pending_action(1, "y")
+
+    assert asyncio.run(submit()) == "add"
+    flusher.close()
+    assert db.batches == [[("add", 1, "a"), ("delete", 1, "x"), ("add", 1, "y")]]